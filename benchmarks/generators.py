@@ -0,0 +1,270 @@
+"""
+Generators of synthetic systems used to benchmark the hoomdxml_reader package.
+
+Each generator returns a dict holding the box, positions, particle types, masses,
+charges and topology (bonds and angles) of a system, using the same layout as GSD,
+i.e., integer type ids along with a list of type names. These dicts can be written
+to hoomd XML or GSD files with write_xml and write_gsd.
+
+"""
+
+import numpy as np
+import gsd.hoomd
+
+
+# density of the systems (particles per unit volume), used to set the box size
+_DENSITY = 0.8
+
+
+def _box_for(n_particles):
+    length = float((n_particles / _DENSITY) ** (1.0 / 3.0))
+    return [length, length, length]
+
+
+# angles formed by consecutive particles of linear chains, given as an (n_chains, chain_length) array of indices
+def _chain_angles(chains):
+    if chains.shape[1] < 3:
+        return np.zeros((0, 3), dtype=np.int64)
+    return np.stack([chains[:, :-2], chains[:, 1:-1], chains[:, 2:]], axis=-1).reshape(-1, 3)
+
+
+def polymer_melt(n_particles, chain_length=100, seed=0):
+    """A melt of linear bead-spring chains, each with chain_length beads.
+
+    The two end beads of each chain are type 'E' and the remaining beads are type 'M'.
+    Chains are random walks with unit bond length, wrapped into a cubic box.
+
+    Parameters
+    ----------
+    n_particles : int
+        Approximate number of particles; rounded down to a whole number of chains.
+    chain_length : int, optional, default=100
+        Number of beads per chain.
+    seed : int, optional, default=0
+        Seed of the random number generator.
+
+    Returns
+    -------
+    system : dict
+        The data of the system.
+    """
+    rng = np.random.default_rng(seed)
+    n_chains = max(n_particles // chain_length, 1)
+    n_particles = n_chains * chain_length
+    box = _box_for(n_particles)
+
+    steps = rng.normal(size=(n_chains, chain_length, 3))
+    steps /= np.linalg.norm(steps, axis=-1, keepdims=True)
+    steps[:, 0] = rng.uniform(0, box[0], size=(n_chains, 3))
+    xyz = np.cumsum(steps, axis=1).reshape(-1, 3)
+    xyz = np.mod(xyz, box[0]) - box[0] / 2
+
+    typeid = np.ones((n_chains, chain_length), dtype=np.int64)
+    typeid[:, [0, -1]] = 0
+
+    chains = np.arange(n_particles, dtype=np.int64).reshape(n_chains, chain_length)
+    bonds = np.stack([chains[:, :-1], chains[:, 1:]], axis=-1).reshape(-1, 2)
+    angles = _chain_angles(chains)
+
+    bond_typeid = np.zeros(len(bonds), dtype=np.int64)
+    end = np.zeros((n_chains, chain_length-1), dtype=bool)
+    end[:, [0, -1]] = True
+    bond_typeid[end.ravel()] = 1
+
+    return {'name': 'polymer_melt',
+            'box': box,
+            'xyz': xyz,
+            'typeid': typeid.ravel(),
+            'types': ['E', 'M'],
+            'masses': np.ones(n_particles),
+            'charges': np.zeros(n_particles),
+            'bonds': bonds,
+            'bond_typeid': bond_typeid,
+            'bond_types': ['M-M', 'E-M'],
+            'angles': angles,
+            'angle_typeid': np.zeros(len(angles), dtype=np.int64),
+            'angle_types': ['M-M-M']}
+
+
+def solvent(n_particles, seed=0):
+    """Many small, rigid three-site solvent molecules (in the style of water).
+
+    Each molecule is an 'OW' particle bonded to two 'HW' particles, listed as HW, OW, HW.
+
+    Parameters
+    ----------
+    n_particles : int
+        Approximate number of particles; rounded down to a whole number of molecules.
+    seed : int, optional, default=0
+        Seed of the random number generator.
+
+    Returns
+    -------
+    system : dict
+        The data of the system.
+    """
+    rng = np.random.default_rng(seed)
+    n_molecules = max(n_particles // 3, 1)
+    n_particles = 3 * n_molecules
+    box = _box_for(n_particles)
+
+    centers = rng.uniform(-box[0] / 2, box[0] / 2, size=(n_molecules, 1, 3))
+    geometry = np.array([[-0.8, 0.6, 0.0], [0.0, 0.0, 0.0], [0.8, 0.6, 0.0]]) * 0.1
+    xyz = (centers + geometry).reshape(-1, 3)
+
+    molecules = np.arange(n_particles, dtype=np.int64).reshape(n_molecules, 3)
+    bonds = np.stack([molecules[:, [1, 1]], molecules[:, [0, 2]]], axis=-1).reshape(-1, 2)
+    angles = molecules.copy()
+
+    typeid = np.tile([0, 1, 0], n_molecules)
+    charges = np.tile([0.4238, -0.8476, 0.4238], n_molecules)
+    masses = np.tile([1.008, 15.999, 1.008], n_molecules)
+
+    return {'name': 'solvent',
+            'box': box,
+            'xyz': xyz,
+            'typeid': typeid,
+            'types': ['HW', 'OW'],
+            'masses': masses,
+            'charges': charges,
+            'bonds': bonds,
+            'bond_typeid': np.zeros(len(bonds), dtype=np.int64),
+            'bond_types': ['OW-HW'],
+            'angles': angles,
+            'angle_typeid': np.zeros(len(angles), dtype=np.int64),
+            'angle_types': ['HW-OW-HW']}
+
+
+def network(n_particles, seed=0):
+    """A single giant network: particles on a simple cubic lattice, bonded to their nearest neighbors.
+
+    Every particle belongs to the same molecule, which is the worst case for identifying molecules.
+
+    Parameters
+    ----------
+    n_particles : int
+        Approximate number of particles; rounded down to a cube of a whole number.
+    seed : int, optional, default=0
+        Seed of the random number generator.
+
+    Returns
+    -------
+    system : dict
+        The data of the system.
+    """
+    rng = np.random.default_rng(seed)
+    n_side = max(int(round(n_particles ** (1.0 / 3.0))), 2)
+    while n_side ** 3 > n_particles and n_side > 2:
+        n_side -= 1
+    n_particles = n_side ** 3
+    box = [float(n_side)] * 3
+
+    index = np.arange(n_particles, dtype=np.int64).reshape(n_side, n_side, n_side)
+    grid = np.stack(np.meshgrid(*[np.arange(n_side)] * 3, indexing='ij'), axis=-1).reshape(-1, 3)
+    xyz = grid - n_side / 2 + rng.normal(scale=0.05, size=grid.shape)
+
+    bonds = []
+    for axis in range(3):
+        first = np.take(index, np.arange(n_side - 1), axis=axis).ravel()
+        second = np.take(index, np.arange(1, n_side), axis=axis).ravel()
+        bonds.append(np.stack([first, second], axis=-1))
+    bonds = np.concatenate(bonds)
+
+    typeid = rng.integers(0, 2, size=n_particles)
+
+    return {'name': 'network',
+            'box': box,
+            'xyz': xyz,
+            'typeid': typeid,
+            'types': ['A', 'B'],
+            'masses': np.ones(n_particles),
+            'charges': np.zeros(n_particles),
+            'bonds': bonds,
+            'bond_typeid': np.zeros(len(bonds), dtype=np.int64),
+            'bond_types': ['A-A'],
+            'angles': np.zeros((0, 3), dtype=np.int64),
+            'angle_typeid': np.zeros(0, dtype=np.int64),
+            'angle_types': []}
+
+
+GENERATORS = {'polymer_melt': polymer_melt,
+              'solvent': solvent,
+              'network': network}
+
+
+def _write_topology(f, tag, group, typeid, types):
+    f.write(f'<{tag} num="{len(group)}">\n')
+    names = np.asarray(types, dtype=object)[typeid] if len(group) > 0 else np.zeros(0, dtype=object)
+    columns = [names] + [group[:, i] for i in range(group.shape[1])]
+    rows = np.stack(columns, axis=-1) if len(group) > 0 else np.zeros((0, group.shape[1] + 1), dtype=object)
+    np.savetxt(f, rows, fmt='%s')
+    f.write(f'</{tag}>\n')
+
+
+def write_xml(system, filename):
+    """Write a synthetic system to a hoomd XML file.
+
+    Parameters
+    ----------
+    system : dict
+        The data of the system, as returned by the generators.
+    filename : string
+        Name of the file to write.
+    """
+    n_particles = len(system['xyz'])
+    box = system['box']
+    with open(filename, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<hoomd_xml version="1.7">\n')
+        f.write('<configuration time_step="0" dimensions="3" natoms="%d">\n' % n_particles)
+        f.write('<box Lx="%.17g" Ly="%.17g" Lz="%.17g" xy="0" xz="0" yz="0"/>\n' % tuple(box))
+        f.write(f'<position num="{n_particles}">\n')
+        np.savetxt(f, system['xyz'], fmt='%.9g')
+        f.write('</position>\n')
+        f.write(f'<type num="{n_particles}">\n')
+        f.write('\n'.join(np.asarray(system['types'], dtype=object)[system['typeid']].tolist()))
+        f.write('\n</type>\n')
+        f.write(f'<mass num="{n_particles}">\n')
+        np.savetxt(f, system['masses'], fmt='%.9g')
+        f.write('</mass>\n')
+        f.write(f'<charge num="{n_particles}">\n')
+        np.savetxt(f, system['charges'], fmt='%.9g')
+        f.write('</charge>\n')
+        _write_topology(f, 'bond', system['bonds'], system['bond_typeid'], system['bond_types'])
+        _write_topology(f, 'angle', system['angles'], system['angle_typeid'], system['angle_types'])
+        f.write('</configuration>\n')
+        f.write('</hoomd_xml>\n')
+
+
+def write_gsd(system, filename):
+    """Write a synthetic system to a GSD file.
+
+    Parameters
+    ----------
+    system : dict
+        The data of the system, as returned by the generators.
+    filename : string
+        Name of the file to write.
+    """
+    # gsd >= 2.8 names the frame class Frame (and deprecates the 'wb' mode); earlier versions name it Snapshot
+    if hasattr(gsd.hoomd, 'Frame'):
+        frame, mode = gsd.hoomd.Frame(), 'w'
+    else:
+        frame, mode = gsd.hoomd.Snapshot(), 'wb'
+    frame.configuration.box = list(system['box']) + [0, 0, 0]
+    frame.particles.N = len(system['xyz'])
+    frame.particles.position = system['xyz']
+    frame.particles.typeid = system['typeid']
+    frame.particles.types = system['types']
+    frame.particles.mass = system['masses']
+    frame.particles.charge = system['charges']
+    frame.bonds.N = len(system['bonds'])
+    frame.bonds.group = system['bonds']
+    frame.bonds.typeid = system['bond_typeid']
+    frame.bonds.types = system['bond_types']
+    frame.angles.N = len(system['angles'])
+    frame.angles.group = system['angles']
+    frame.angles.typeid = system['angle_typeid']
+    frame.angles.types = system['angle_types']
+    with gsd.hoomd.open(name=filename, mode=mode) as f:
+        f.append(frame)
@@ -0,0 +1,327 @@
+"""
+Benchmarks of the hoomdxml_reader System class on synthetic systems.
+
+For each generated system and file format, the following phases are timed separately:
+
+* load: constructing a System from the file (molecules are identified lazily, so this is parsing only)
+* bond_order: System._calc_bond_order
+* infer_molecules: System._infer_molecules
+* rename_molecules: System.set_molecule_name_by_dictionary
+* to_compound: hoomdxml_reader.convert.System_to_Compound (requires mbuild; only for small systems)
+
+Each phase reports the best wall time out of a number of repeats, the throughput in
+particles per second, and the peak memory allocated during the phase (measured with
+tracemalloc, in a separate run, so tracing does not affect the timings).
+
+The time to import the package (and its optional heavy dependencies) is measured as
+well, each in a fresh interpreter, since short-lived processes pay it on every start.
+Results are written to a JSON file so that runs can be compared over time, e.g.:
+
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 --output results.json
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 --compare results.json
+
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import hoomdxml_reader as hxml
+from generators import GENERATORS, write_xml, write_gsd
+
+
+WRITERS = {'xml': write_xml, 'gsd': write_gsd}
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment():
+    return {'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'hoomdxml_reader': getattr(hxml, '__version__', None),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor()}
+
+
+# the phases of the benchmark; each takes the filename and returns a callable that runs the phase,
+# such that any set up (e.g., loading the file before inferring molecules) is not timed
+def _setup_load(filename):
+    return lambda: hxml.System(filename)
+
+
+def _setup_bond_order(filename):
+    system = hxml.System(filename)
+    return system._calc_bond_order
+
+
+def _setup_infer_molecules(filename):
+    system = hxml.System(filename)
+    return system._infer_molecules
+
+
+def _setup_rename_molecules(filename):
+    system = hxml.System(filename)
+    system._ensure_molecules()
+    molecule_dict = {pattern: f'renamed{i}' for i, pattern in enumerate(system.unique_molecules)}
+    return lambda: system.set_molecule_name_by_dictionary(molecule_dict)
+
+
+def _setup_to_compound(filename):
+    import hoomdxml_reader.convert as convert
+    system = hxml.System(filename)
+    system._ensure_molecules()
+    return lambda: convert.System_to_Compound(system)
+
+
+PHASES = {'load': _setup_load,
+          'bond_order': _setup_bond_order,
+          'infer_molecules': _setup_infer_molecules,
+          'rename_molecules': _setup_rename_molecules,
+          'to_compound': _setup_to_compound}
+
+
+# modules whose import time is measured, each in a fresh interpreter
+IMPORTS = ['hoomdxml_reader', 'hoomdxml_reader.convert']
+
+# heavy dependencies that should only be imported when they are used
+HEAVY_MODULES = ['networkx', 'gsd', 'mbuild']
+
+_IMPORT_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'time': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_imports(modules=IMPORTS, repeat=5, log=print):
+    """Measure the time to import modules, each in a fresh interpreter.
+
+    Parameters
+    ----------
+    modules : list, dtype=str
+        Names of the modules to import.
+    repeat : int, optional, default=5
+        Number of times each import is timed; the best time is reported.
+    log : callable, optional, default=print
+        Function used to report progress.
+
+    Returns
+    -------
+    results : list, dtype=dict
+        One entry per module, with the import times and the heavy dependencies it imported.
+    """
+    results = []
+    for module in modules:
+        script = _IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+        times = []
+        loaded = []
+        for _ in range(repeat):
+            output = subprocess.check_output([sys.executable, '-c', script], text=True)
+            measurement = json.loads(output.strip().splitlines()[-1])
+            times.append(measurement['time'])
+            loaded = measurement['loaded']
+        entry = {'module': module, 'times': times, 'time': min(times), 'loaded': loaded}
+        results.append(entry)
+        log(f"{'import':>12} {module:>40} {entry['time']:>10.4f} s  heavy modules loaded: {', '.join(loaded) or 'none'}")
+    return results
+
+
+def _time_phase(setup, filename, repeat):
+    times = []
+    for _ in range(repeat):
+        run = setup(filename)
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _peak_memory(setup, filename):
+    run = setup(filename)
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run(systems, sizes, formats, phases, repeat=3, compound_max_particles=20000, directory=None, log=print):
+    """Run the benchmarks.
+
+    Parameters
+    ----------
+    systems : list, dtype=str
+        Names of the generators to use (see generators.GENERATORS).
+    sizes : list, dtype=int
+        Approximate number of particles of each generated system.
+    formats : list, dtype=str
+        File formats to benchmark, 'xml' and/or 'gsd'.
+    phases : list, dtype=str
+        Phases to benchmark (see PHASES).
+    repeat : int, optional, default=3
+        Number of times each phase is timed; the best time is reported.
+    compound_max_particles : int, optional, default=20000
+        The conversion to an mbuild Compound is only benchmarked for systems up to this size.
+    directory : string, optional, default=None
+        Directory in which the generated files are written. If None, a temporary directory is used.
+    log : callable, optional, default=print
+        Function used to report progress.
+
+    Returns
+    -------
+    results : list, dtype=dict
+        One entry per system, size, format and phase.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp:
+        directory = temp if directory is None else directory
+        for name in systems:
+            for size in sizes:
+                data = GENERATORS[name](size)
+                n_particles = len(data['xyz'])
+                for fmt in formats:
+                    filename = os.path.join(directory, f'{name}_{n_particles}.{fmt}')
+                    WRITERS[fmt](data, filename)
+                    for phase in phases:
+                        entry = {'system': name,
+                                 'format': fmt,
+                                 'phase': phase,
+                                 'n_particles': n_particles,
+                                 'n_bonds': len(data['bonds']),
+                                 'file_size': os.path.getsize(filename)}
+                        if phase == 'to_compound':
+                            try:
+                                import mbuild
+                            except ImportError:
+                                entry['skipped'] = 'mbuild is not installed'
+                            if n_particles > compound_max_particles:
+                                entry['skipped'] = f'more than {compound_max_particles} particles'
+                        if 'skipped' not in entry:
+                            times = _time_phase(PHASES[phase], filename, repeat)
+                            entry['times'] = times
+                            entry['time'] = min(times)
+                            entry['throughput'] = n_particles / entry['time'] if entry['time'] > 0 else None
+                            entry['peak_memory'] = _peak_memory(PHASES[phase], filename)
+                        results.append(entry)
+                        log(_format_entry(entry))
+    return results
+
+
+def _format_entry(entry):
+    label = f"{entry['system']:>12} {entry['format']:>4} {entry['n_particles']:>10} {entry['phase']:>16}"
+    if 'skipped' in entry:
+        return f"{label}  skipped ({entry['skipped']})"
+    return (f"{label} {entry['time']:>10.4f} s {entry['throughput']:>12.3e} particles/s "
+            f"{entry['peak_memory'] / 2**20:>10.1f} MiB")
+
+
+def compare_imports(results, previous, log=print):
+    """Report the ratio of the import times of matching modules in two sets of results.
+
+    Parameters
+    ----------
+    results : list, dtype=dict
+        Import results of the current run.
+    previous : list, dtype=dict
+        Import results of a previous run, e.g., loaded from its JSON file.
+    log : callable, optional, default=print
+        Function used to report the comparison.
+    """
+    previous = {entry['module']: entry for entry in previous}
+    for entry in results:
+        if entry['module'] not in previous:
+            continue
+        before = previous[entry['module']]
+        speedup = before['time'] / entry['time'] if entry['time'] > 0 else float('inf')
+        log(f"{'import':>12} {entry['module']:>40} speedup {speedup:>7.2f}x")
+
+
+def compare(results, previous, log=print):
+    """Report the ratio of the times of matching entries in two sets of results.
+
+    Parameters
+    ----------
+    results : list, dtype=dict
+        Results of the current run.
+    previous : list, dtype=dict
+        Results of a previous run, e.g., loaded from its JSON file.
+    log : callable, optional, default=print
+        Function used to report the comparison.
+    """
+    def key(entry):
+        return (entry['system'], entry['format'], entry['n_particles'], entry['phase'])
+
+    previous = {key(entry): entry for entry in previous if 'time' in entry}
+    for entry in results:
+        if 'time' not in entry or key(entry) not in previous:
+            continue
+        before = previous[key(entry)]
+        speedup = before['time'] / entry['time'] if entry['time'] > 0 else float('inf')
+        memory = entry['peak_memory'] / before['peak_memory'] if before['peak_memory'] > 0 else float('inf')
+        log(f"{entry['system']:>12} {entry['format']:>4} {entry['n_particles']:>10} {entry['phase']:>16} "
+            f"speedup {speedup:>7.2f}x  peak memory {memory:>6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the hoomdxml_reader System class on synthetic systems.')
+    parser.add_argument('--systems', nargs='+', default=list(GENERATORS), choices=list(GENERATORS),
+                        help='Synthetic systems to generate')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10000, 100000],
+                        help='Approximate number of particles of each system')
+    parser.add_argument('--formats', nargs='+', default=list(WRITERS), choices=list(WRITERS),
+                        help='File formats to benchmark')
+    parser.add_argument('--phases', nargs='+', default=list(PHASES), choices=list(PHASES),
+                        help='Phases to benchmark')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of times each phase is timed; the best time is reported')
+    parser.add_argument('--import-repeat', type=int, default=5,
+                        help='Number of times the import of each module is timed (0 to skip)')
+    parser.add_argument('--compound-max-particles', type=int, default=20000,
+                        help='Largest system converted to an mbuild Compound')
+    parser.add_argument('--directory', type=str, default=None,
+                        help='Directory for the generated files (default: a temporary directory)')
+    parser.add_argument('--output', type=str, default=None,
+                        help='JSON file the results are written to')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='JSON file of a previous run to compare against')
+    args = parser.parse_args(argv)
+
+    imports = measure_imports(repeat=args.import_repeat) if args.import_repeat > 0 else []
+    results = run(args.systems, args.sizes, args.formats, args.phases, repeat=args.repeat,
+                  compound_max_particles=args.compound_max_particles, directory=args.directory)
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': _environment(), 'imports': imports, 'results': results}, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        compare_imports(imports, previous.get('imports', []))
+        compare(results, previous['results'])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
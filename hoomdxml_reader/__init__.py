@@ -2,6 +2,11 @@
 
 # Add imports here
 from .hoomdxml_reader import *
+from .trajectory import *
+from .batch import *
+from .cache import *
+from .instrumentation import *
+from .selection import *
 
 
 from ._version import __version__
@@ -0,0 +1,169 @@
+"""hoomdxml_reader Conversion functions (see hoomdxml_reader.convert, which imports this module on first use)"""
+import mbuild as mb
+import numpy as np
+from warnings import warn
+
+__all__ = ['Molecule_to_Compound', 'System_to_Compound', 'iter_molecule_compounds']
+
+
+# adding children in a single call relies on Compound.add(new_child=[...], label=[...]), i.e., passing a list of
+# compounds along with a list of labels, one per compound. mbuild only keeps these per-child labels from version
+# 0.11; earlier versions (and versions that cannot be parsed, e.g., development builds) add children one at a time.
+def _supports_batch_add():
+    try:
+        version = tuple(int(v) for v in mb.__version__.split('.')[:2])
+    except (AttributeError, ValueError):
+        return False
+    return version >= (0, 11)
+
+
+# add a list of children to a compound, labeled label[0], label[1], ...
+def _add_children(compound, children, label):
+    if len(children) == 0:
+        return
+    if _supports_batch_add():
+        compound.add(children, label=[f'{label}[$]'] * len(children))
+    else:
+        for child in children:
+            compound.add(child, label=f'{label}[$]')
+
+
+# gather the data of the particles in a molecule from the arrays of the system with a single fancy index per array.
+# Returns the particle indices, type names, positions, charges and masses of the particles,
+# along with the bonds as indices relative to the first particle of the molecule.
+def _molecule_data(system, molecule):
+    system._ensure_sections('position', 'type', 'mass', 'charge')
+    particles = np.asarray(molecule.particles, dtype=np.int64).reshape(-1)
+    types = [system._type_names[t] for t in np.asarray(system._typeid)[particles].tolist()]
+    xyz = np.asarray(system._xyz, dtype=np.float64)[particles]
+    charges = np.asarray(system._charges, dtype=np.float64)[particles].tolist()
+    masses = np.asarray(system._masses, dtype=np.float64)[particles].tolist()
+    
+    # map the system indices of the bonded particles to their position within the molecule
+    order = np.argsort(particles, kind='stable')
+    bonds = np.asarray(molecule.bonds, dtype=np.int64).reshape(-1, 2)
+    bonds = order[np.searchsorted(particles[order], bonds)]
+    return particles, types, xyz, charges, masses, bonds
+
+# convert an individual molecule to a mbuild compound
+class Molecule_to_Compound(mb.Compound):
+    """
+    A child of the mbuild Compound class that is called by the
+    System_to_Compound class.  This will add the particles
+    associated with a given molecule to the mbuild Compound.
+    Individual particles in this class can be accessed sequentially,
+    e.g., for a given Compounded named mb_molecule,
+    mb_molecule['particle'][0] would return the first particle in the
+    molecule.
+    
+    Parameters
+    ----------
+        system : instance of the hoomdxml_reader System class
+        molecule : instance of the hoomdxml_reader Molecule class.
+            Particles associated with the molecule will be added
+            to the mbuild Compound.
+        name : name to give the overall mbuild Compound.
+    """
+    def __init__(self, system, molecule, name):
+        super(Molecule_to_Compound, self).__init__(name=name)
+        
+        particles, types, xyz, charges, masses, bonds = _molecule_data(system, molecule)
+        children = [mb.Particle(name=types[i], pos=xyz[i], charge=charges[i], mass=masses[i]) for i in range(len(particles))]
+        _add_children(self, children, label='particle')
+        
+        # bonds are added between the particle objects directly; indexing the compound (e.g., self[i]) is linear in its size
+        for i, j in bonds.tolist():
+            self.add_bond((children[i], children[j]))
+
+
+class System_to_Compound(mb.Compound):
+    """
+    A child of the mbuild Compound class.  This will convert
+    an instance of the hoomdxml_reader System class to
+    an mbuild Compound, preserving the hierarchy defined
+    in the System class (i.e., system -> molecules -> particles).
+    Individual molecules will be named according to the instance
+    of the System class passed to this class. These can be accessed
+    e.g., for a given Compounded named mb_system,
+    mb_system['molecule'][0] would return  the first molecule in the
+    Compound.
+
+    Parameters
+    ----------
+        system : instance of the hoomdxml_reader System class
+        name_selection : (optional) a list of strings corresponding to
+                         the names of molecules that will be converted to
+                         mBuild compounds.
+        use_templates : (optional, default=True) if True, a template
+                        Compound is built once for each distinct molecule
+                        (same name, particle types, masses, charges and bonds)
+                        that occurs more than once; every further instance is
+                        then a clone of its template, with the positions taken
+                        from the System. See iter_molecule_compounds for the
+                        memory used by the templates.
+    """
+    def __init__(self, system, name_selection=None, use_templates=True):
+        super(System_to_Compound, self).__init__()
+        
+        compounds = list(iter_molecule_compounds(system, name_selection=name_selection, use_templates=use_templates))
+        _add_children(self, compounds, label='molecule')
+        
+        if name_selection is not None and len(compounds) == 0:
+            warn("Zero particles have been converted. Check the selection")
+
+
+def iter_molecule_compounds(system, name_selection=None, use_templates=True):
+    """
+    Convert the molecules of a System to mbuild Compounds one at a time.
+    
+    Unlike System_to_Compound, molecules are only converted as they are
+    requested, so the compounds can be passed on (e.g., to a writer or a filter)
+    without holding all of them in memory, and iteration can stop early.
+    
+    Parameters
+    ----------
+        system : instance of the hoomdxml_reader System class
+        name_selection : (optional) a list of strings corresponding to
+                         the names of molecules that will be converted to
+                         mBuild compounds.
+        use_templates : (optional, default=True) if True, a template Compound
+                        is built the second time a distinct molecule occurs, and
+                        every further instance is a clone of it, with the positions
+                        taken from the System. The first instance of each molecule
+                        is built directly, so molecules that occur only once are
+                        built a single time and no template is kept for them.
+                        Templates are kept until the iteration ends, so their
+                        memory is bounded by one Compound per distinct molecule
+                        that repeats (e.g., one per solvent or polymer species),
+                        along with the small key identifying each distinct molecule.
+    
+    Returns
+    -------
+        compounds : generator of Molecule_to_Compound, in the order of system.molecules
+    """
+    molecules = system.molecules
+    if name_selection is not None:
+        # molecules are looked up in the index of molecule names of the system, rather than scanning every molecule
+        molecules = (molecules[i] for i in system.molecule_ids_by_name(name_selection).tolist())
+    
+    # templates are never added to another compound, so they remain unchanged while being cloned.
+    # A template is only built once a molecule repeats, so no template is kept for molecules that occur once.
+    seen = set()
+    templates = {}
+    for molecule in molecules:
+        if use_templates != True:
+            yield Molecule_to_Compound(system, molecule, name=molecule.name)
+            continue
+        
+        particles, types, xyz, charges, masses, bonds = _molecule_data(system, molecule)
+        key = (molecule.name, tuple(types), tuple(masses), tuple(charges), bonds.tobytes())
+        template = templates.get(key, None)
+        if template is None:
+            if key not in seen:
+                seen.add(key)
+                yield Molecule_to_Compound(system, molecule, name=molecule.name)
+                continue
+            template = templates[key] = Molecule_to_Compound(system, molecule, name=molecule.name)
+        compound = mb.clone(template)
+        compound.xyz = xyz
+        yield compound
@@ -0,0 +1 @@
+__version__ = "1.0.0+23.gc1fe410.dirty"
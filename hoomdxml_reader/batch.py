@@ -0,0 +1,186 @@
+"""
+Module for loading many XML or GSD files in parallel.
+
+"""
+
+__all__ = ["load_batch"]
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from hoomdxml_reader.hoomdxml_reader import System
+
+# offsets of arrays within a shared memory block are aligned to this many bytes
+_ALIGNMENT = 64
+
+
+def _create_shared_memory(size):
+    # the block is handed over to the parent process, which unlinks it once the data has been copied;
+    # it must not be unlinked by the resource tracker when the worker exits.
+    try:
+        return SharedMemory(create=True, size=size, track=False)
+    except TypeError:
+        shm = SharedMemory(create=True, size=size)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+# load a single file and copy its arrays into one shared memory block.
+# Returns the name of the block, the layout of the arrays within it and the metadata of the system.
+def _load_to_shared_memory(file, load_kwargs):
+    system = System(file, **load_kwargs)
+    # molecules are identified in the worker, so that this is also done in parallel
+    system._ensure_molecules()
+    arrays, metadata = system._get_state()
+
+    layout = []
+    size = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        layout.append((name, array.dtype.str, array.shape, size))
+        size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+    shm = _create_shared_memory(max(size, 1))
+    try:
+        for name, dtype, shape, offset in layout:
+            view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            view[...] = arrays[name]
+            del view
+        shm_name = shm.name
+    finally:
+        shm.close()
+    return shm_name, layout, metadata
+
+
+# load a chunk of files. Unless errors is 'raise', a file that fails to load is returned as
+# (None, None, exception) in place of its block. Otherwise, the blocks of the files loaded before it
+# are unlinked, since they are not tracked and the parent process never learns their names.
+def _load_chunk(files, load_kwargs, errors='raise'):
+    results = []
+    try:
+        for file in files:
+            try:
+                results.append(_load_to_shared_memory(file, load_kwargs))
+            except Exception as error:
+                if errors == 'raise':
+                    raise
+                results.append((None, None, error))
+    except BaseException:
+        _release_results(results)
+        raise
+    return results
+
+
+# rebuild a System from a block created by _load_to_shared_memory and release the block
+def _system_from_shared_memory(shm_name, layout, metadata):
+    shm = SharedMemory(name=shm_name)
+    try:
+        arrays = {}
+        for name, dtype, shape, offset in layout:
+            view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            arrays[name] = view.copy()
+            del view
+    finally:
+        shm.close()
+        shm.unlink()
+
+    system = System()
+    system._set_state(arrays, metadata)
+    return system
+
+
+# unlink the shared memory of results that will not be used
+def _release_results(results):
+    for shm_name, layout, metadata in results:
+        if shm_name is None:
+            continue
+        try:
+            shm = SharedMemory(name=shm_name)
+        except FileNotFoundError:
+            continue
+        shm.close()
+        shm.unlink()
+
+
+def load_batch(files, workers=None, chunksize=1, ordered=True, errors='raise', **load_kwargs):
+    """Load many XML or GSD files in parallel using a pool of processes.
+
+    Each file is parsed, and its molecules identified, in a worker process. The arrays of
+    each System are returned to this process through shared memory, rather than being pickled.
+
+    Parameters
+    ----------
+    files : list, dtype=str
+        Names of the hoomd xml or gsd files to load.
+    workers : int, optional, default=None
+        Number of worker processes. If None, the number of CPUs is used.
+    chunksize : int, optional, default=1
+        Number of files each worker loads per task.
+    ordered : bool, optional, default=True
+        If True, results are yielded in the same order as `files`.
+        If False, results are yielded as soon as they are completed.
+    errors : string, optional, default='raise'
+        What to do when a file fails to load. 'raise' raises the exception, discarding the
+        files that were not yet yielded; 'skip' leaves the file out of the results; 'return'
+        yields the file along with the exception that was raised, in place of a System.
+    **load_kwargs
+        Keyword arguments passed to the System constructor for each file, e.g.,
+        `frame`, `ignore_zero_bond_order` or `molecule_dict`.
+
+    Returns
+    -------
+    systems : iterator, dtype=(str, System)
+        Iterator that yields the name of each file along with the loaded System
+        (or, if `errors` is 'return' and the file failed to load, the exception).
+    """
+    files = list(files)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize < 1:
+        raise Exception("chunksize must be at least 1.")
+    if errors not in ('raise', 'skip', 'return'):
+        raise Exception(f"errors must be 'raise', 'skip' or 'return', not {errors!r}.")
+
+    chunks = deque(files[i:i+chunksize] for i in range(0, len(files), chunksize))
+    # limit the number of chunks in flight, so that results waiting to be consumed do not accumulate
+    max_pending = 2 * workers
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        results = deque()
+        try:
+            while chunks or pending:
+                while chunks and len(pending) < max_pending:
+                    chunk = chunks.popleft()
+                    pending.append((chunk, executor.submit(_load_chunk, chunk, load_kwargs, errors)))
+
+                if ordered:
+                    chunk, future = pending.popleft()
+                else:
+                    wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                    index = next(i for i, (_, future) in enumerate(pending) if future.done())
+                    chunk, future = pending[index]
+                    del pending[index]
+
+                results.extend(future.result())
+                for file in chunk:
+                    shm_name, layout, metadata = results.popleft()
+                    if shm_name is None:
+                        if errors == 'return':
+                            yield file, metadata
+                        continue
+                    system = _system_from_shared_memory(shm_name, layout, metadata)
+                    yield file, system
+        finally:
+            # release everything that was loaded but not consumed, e.g., if the iterator is closed early
+            _release_results(results)
+            for _, future in pending:
+                future.cancel()
+            for _, future in pending:
+                if not future.cancelled() and future.exception() is None:
+                    _release_results(future.result())
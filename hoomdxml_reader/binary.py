@@ -0,0 +1,130 @@
+"""
+Module for storing the arrays and metadata of a System in a compact binary file (extension .hxb).
+
+A file starts with a fixed size preamble (magic string, format version and the length
+of the header), followed by a JSON header holding the metadata and the dtype, shape and
+offset of each array. The raw buffers of the arrays follow the header, each aligned to
+64 bytes, such that they can be memory-mapped without copying.
+
+"""
+
+__all__ = []
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+MAGIC = b'HXMLBIN\x00'
+VERSION = 1
+
+# magic string, format version, reserved field and length of the JSON header
+_PREAMBLE = struct.Struct('<8sIIQ')
+
+# offsets of the array buffers are aligned to this many bytes
+_ALIGNMENT = 64
+
+
+def _align(offset):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+# convert NumPy scalars (e.g., type names or box lengths taken from a GSD file) when encoding the header
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} cannot be stored in the header.")
+
+
+def write_state(filename, arrays, metadata):
+    """Write a dict of arrays and a dict of metadata to a binary file.
+
+    Parameters
+    ----------
+    filename : string
+        Name of the file to write.
+    arrays : dict, dtype=numpy.ndarray
+        Arrays to store, keyed by name.
+    metadata : dict
+        JSON serializable metadata to store in the header.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    # the offsets of the arrays depend on the length of the header, which itself contains the offsets;
+    # offsets are therefore stored relative to the start of the data section.
+    layout = []
+    size = 0
+    for name, array in arrays.items():
+        layout.append([name, array.dtype.str, list(array.shape), size])
+        size = _align(size + array.nbytes)
+
+    header = json.dumps({'metadata': metadata, 'arrays': layout}, default=_json_default).encode('utf-8')
+    data_start = _align(_PREAMBLE.size + len(header))
+
+    # write to a temporary file that then replaces the target, such that readers never see a partially
+    # written file, and arrays memory-mapped from a previous version of the file remain valid.
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), suffix='.tmp')
+    try:
+        # mkstemp creates files that are only readable by the owner; use the default permissions instead
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp, 0o666 & ~umask)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_PREAMBLE.pack(MAGIC, VERSION, 0, len(header)))
+            f.write(header)
+            for name, dtype, shape, offset in layout:
+                f.write(b'\x00' * (data_start + offset - f.tell()))
+                arrays[name].tofile(f)
+            f.write(b'\x00' * (data_start + size - f.tell()))
+        os.replace(temp, filename)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+
+def read_state(filename, mmap_mode=True):
+    """Read the arrays and metadata stored in a binary file.
+
+    Parameters
+    ----------
+    filename : string
+        Name of the file to read.
+    mmap_mode : bool, optional, default=True
+        If True, the arrays are copy-on-write views into a memory map of the file;
+        no data is read until it is accessed, and modifying an array does not change the file.
+        If False, the arrays are read into memory.
+
+    Returns
+    -------
+    arrays : dict, dtype=numpy.ndarray
+        Arrays stored in the file, keyed by name.
+    metadata : dict
+        Metadata stored in the header.
+    """
+    with open(filename, 'rb') as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) != _PREAMBLE.size:
+            raise Exception(f"{filename} is not a hoomdxml_reader binary file.")
+        magic, version, _, header_length = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise Exception(f"{filename} is not a hoomdxml_reader binary file.")
+        if version > VERSION:
+            raise Exception(f"{filename} uses format version {version}; only versions up to {VERSION} are supported.")
+        header = json.loads(f.read(header_length).decode('utf-8'))
+        data_start = _align(_PREAMBLE.size + header_length)
+
+        arrays = {}
+        if mmap_mode == True:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            for name, dtype, shape, offset in header['arrays']:
+                arrays[name] = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=buffer, offset=data_start+offset)
+        else:
+            for name, dtype, shape, offset in header['arrays']:
+                dtype = np.dtype(dtype)
+                f.seek(data_start + offset)
+                count = int(np.prod(shape, dtype=np.int64))
+                arrays[name] = np.fromfile(f, dtype=dtype, count=count).reshape(shape)
+    return arrays, header['metadata']
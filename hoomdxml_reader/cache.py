@@ -0,0 +1,208 @@
+"""
+Module for caching parsed systems on disk.
+
+"""
+
+__all__ = ["ParseCache"]
+
+import glob
+import hashlib
+import json
+import os
+
+from hoomdxml_reader.binary import write_state, read_state
+
+
+class ParseCache(object):
+    """
+    An on-disk cache of parsed XML and GSD files.
+
+    The arrays, topology and molecules of a parsed System are stored in a compact
+    binary file, keyed by the absolute path, size and modification time of the source
+    file (and, optionally, a hash of its contents), along with the options that change
+    what is parsed (frame, identify_molecules, ignore_zero_bond_order and sections). Later loads
+    of the same file memory-map the stored arrays, rather than parsing the file again.
+    If the source file changes, its key changes and the stale entry is eventually evicted.
+
+    The total size of the cache is bounded; when it is exceeded, the least recently
+    used entries are removed.
+
+    Parameters
+    ----------
+    directory : string, optional, default=None
+        Directory holding the cache entries. If None, the directory given by the
+        HOOMDXML_READER_CACHE environment variable is used, falling back to
+        ~/.cache/hoomdxml_reader.
+    max_size : int, optional, default=2**31
+        Maximum total size of the cache entries, in bytes.
+    hash_contents : bool, optional, default=False
+        If True, a hash of the contents of the source file is included in the key.
+        This guards against files that are modified without changing their size or
+        modification time, at the cost of reading the file on every load.
+    """
+
+    _extension = '.hxb'
+
+    def __init__(self, directory=None, max_size=2**31, hash_contents=False):
+        if directory is None:
+            directory = os.environ.get('HOOMDXML_READER_CACHE', os.path.join('~', '.cache', 'hoomdxml_reader'))
+        self._directory = os.path.abspath(os.path.expanduser(directory))
+        self._max_size = max_size
+        self._hash_contents = hash_contents
+        os.makedirs(self._directory, exist_ok=True)
+
+    # accepts the values of the cache argument of System.load: True, a directory or a ParseCache
+    @classmethod
+    def _from_option(cls, cache):
+        if isinstance(cache, cls):
+            return cache
+        if cache is True:
+            return cls()
+        if isinstance(cache, (str, os.PathLike)):
+            return cls(directory=cache)
+        raise Exception("cache must be True, the name of a directory or a ParseCache.")
+
+    def _hash_file(self, path):
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(2**20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    # entries are named <hash of the path>-<hash of the full key>, such that all entries of a file can be found
+    def _path_prefix(self, path):
+        return hashlib.blake2b(path.encode('utf-8'), digest_size=8).hexdigest()
+
+    def _key(self, system):
+        path = os.path.abspath(system._filename)
+        stat = os.stat(path)
+        key = {'path': path,
+               'size': stat.st_size,
+               'mtime': stat.st_mtime_ns,
+               'frame': system._frame,
+               'identify_molecules': bool(system._identify_molecules),
+               'ignore_zero_bond_order': bool(system._ignore_zero_bond_order),
+               'sections': sorted(set(system._sections) - system._pending_sections)}
+        if self._hash_contents == True:
+            key['hash'] = self._hash_file(path)
+        return key
+
+    def _entry(self, key):
+        digest = hashlib.blake2b(json.dumps(key, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self._directory, f"{self._path_prefix(key['path'])}-{digest}{self._extension}")
+
+    def _entries(self, pattern='*'):
+        return glob.glob(os.path.join(self._directory, pattern + self._extension))
+
+    # restore the state of the system from the cache entry of a key; returns False if there is no valid entry
+    def _restore(self, system, key):
+        entry = self._entry(key)
+        try:
+            arrays, metadata = read_state(entry)
+        except Exception:
+            return False
+        if metadata.get('cache_key') != key:
+            return False
+
+        # mark the entry as recently used
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+
+        filename = system._filename
+        list_compatibility = system._list_compatibility
+        system._set_state(arrays, metadata)
+        system._filename = filename
+        system._list_compatibility = list_compatibility
+        return True
+
+    # store the state of a freshly parsed system under a key
+    def _store(self, system, key):
+        arrays, metadata = system._get_state()
+        metadata = dict(metadata, cache_key=key)
+
+        write_state(self._entry(key), arrays, metadata)
+        self._evict()
+
+    def _remove(self, entry):
+        try:
+            os.remove(entry)
+        except OSError:
+            # e.g., the entry is still memory-mapped on a platform that does not allow removing it
+            pass
+
+    # remove the least recently used entries until the cache fits within max_size
+    def _evict(self):
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = os.stat(entry)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self._max_size:
+                break
+            self._remove(entry)
+            total -= size
+
+    def invalidate(self, file=None):
+        """Remove cache entries.
+
+        Parameters
+        ----------
+        file : string, optional, default=None
+            Name of the source file whose entries are removed. If None, all entries are removed.
+        """
+        if file is None:
+            entries = self._entries()
+        else:
+            entries = self._entries(self._path_prefix(os.path.abspath(file)) + '-*')
+        for entry in entries:
+            self._remove(entry)
+
+    @property
+    def directory(self):
+        """The directory holding the cache entries.
+
+        Parameters
+        ----------
+        Returns
+        -------
+        directory : string
+        """
+        return self._directory
+
+    @property
+    def max_size(self):
+        """Maximum total size of the cache entries, in bytes.
+
+        Parameters
+        ----------
+        Returns
+        -------
+        max_size : int
+        """
+        return self._max_size
+
+    @property
+    def size(self):
+        """Current total size of the cache entries, in bytes.
+
+        Parameters
+        ----------
+        Returns
+        -------
+        size : int
+        """
+        size = 0
+        for entry in self._entries():
+            try:
+                size += os.path.getsize(entry)
+            except OSError:
+                pass
+        return size
@@ -0,0 +1,288 @@
+"""
+Command line tool for converting hoomd XML files to GSD files.
+
+"""
+
+__all__ = ["convert_files", "main"]
+
+import argparse
+import glob
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from hoomdxml_reader.hoomdxml_reader import System
+from hoomdxml_reader.writers import write_gsd, _gsd_frame
+
+# characters that make a path a glob pattern
+_GLOB_CHARACTERS = re.compile(r'[*?[]')
+
+
+# files are read as hoomd XML if their extension contains 'xml' (e.g., .xml or .hoomdxml), as in System.load
+def _is_xml(filename):
+    return 'xml' in filename.split('.')[-1]
+
+
+# the directory that paths matched by a glob pattern are relative to, i.e., the part of the pattern before any wildcard
+def _glob_base(pattern):
+    parts = pattern.split(os.sep)
+    for i, part in enumerate(parts):
+        if _GLOB_CHARACTERS.search(part):
+            return os.sep.join(parts[:i]) or os.curdir
+    return os.path.dirname(pattern) or os.curdir
+
+
+# expand directories (recursively) and glob patterns into a list of (XML file, base directory) pairs.
+# The base directory is used to recreate the layout of the inputs in the output directory.
+def _collect_inputs(inputs):
+    collected = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                collected.extend((os.path.join(root, name), path) for name in sorted(files) if _is_xml(name))
+        elif _GLOB_CHARACTERS.search(path):
+            base = _glob_base(path)
+            collected.extend((name, base) for name in sorted(glob.glob(path, recursive=True))
+                             if os.path.isfile(name) and _is_xml(name))
+        elif os.path.isfile(path):
+            collected.append((path, os.path.dirname(path) or os.curdir))
+        else:
+            raise Exception(f"No such file or directory: {path}")
+
+    # the same file may be matched by more than one input
+    seen = set()
+    unique = []
+    for name, base in collected:
+        key = os.path.abspath(name)
+        if key not in seen:
+            seen.add(key)
+            unique.append((name, base))
+    return unique
+
+
+# name of the GSD file an XML file is converted to; next to the XML file unless an output directory is given
+def _output_name(filename, base, output_dir):
+    stem = os.path.splitext(filename)[0] + '.gsd'
+    if output_dir is None:
+        return stem
+    return os.path.join(output_dir, os.path.relpath(stem, base))
+
+
+# an output is up to date if it exists and is newer than all of its inputs
+def _up_to_date(output, inputs):
+    try:
+        output_mtime = os.stat(output).st_mtime_ns
+    except OSError:
+        return False
+    return all(os.stat(name).st_mtime_ns <= output_mtime for name in inputs)
+
+
+# outputs are written to a temporary file that then replaces the target, such that an interrupted
+# conversion never leaves a partial file that would be considered up to date when resuming
+def _temporary_output(output):
+    directory = os.path.dirname(os.path.abspath(output))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=directory, suffix='.gsd.tmp')
+    os.close(fd)
+    return temp
+
+
+# convert a single XML file to a GSD file; runs in a worker process.
+# Returns the number of particles converted.
+def _convert_file(filename, output):
+    system = System(filename, identify_molecules=False)
+    temp = _temporary_output(output)
+    try:
+        write_gsd(system, temp)
+        os.replace(temp, output)
+    except BaseException:
+        os.remove(temp)
+        raise
+    return system.n_particles
+
+
+def _convert_separate(jobs, workers, summary, log):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_convert_file, filename, output): (filename, output) for filename, output in jobs}
+        for future in as_completed(futures):
+            filename, output = futures[future]
+            try:
+                summary['particles'] += future.result()
+                summary['converted'] += 1
+                summary['bytes'] += os.path.getsize(filename)
+                log(f"{filename} -> {output}")
+            except Exception as error:
+                summary['failed'].append(filename)
+                log(f"{filename}: failed ({error})")
+
+
+def _convert_trajectory(files, output, workers, summary, log):
+    # imported here, since load_batch is only needed to write trajectories
+    import gsd.hoomd
+    from hoomdxml_reader.batch import load_batch
+
+    temp = _temporary_output(output)
+    try:
+        f = None
+        # files are parsed in parallel, and appended as frames in the order they are given;
+        # files that fail to load are reported and left out, as when converting files separately
+        for filename, system in load_batch(files, workers=workers, ordered=True, errors='return', identify_molecules=False):
+            if isinstance(system, Exception):
+                summary['failed'].append(filename)
+                log(f"{filename}: failed ({system})")
+                continue
+            frame, mode = _gsd_frame(system)
+            # gsd does not store data that matches frame 0, so a frame identical to the first one would
+            # be empty and not be written at all; numbering the steps keeps every frame distinct
+            frame.configuration.step = summary['converted']
+            if f is None:
+                f = gsd.hoomd.open(name=temp, mode=mode)
+            f.append(frame)
+            summary['particles'] += system.n_particles
+            summary['converted'] += 1
+            summary['bytes'] += os.path.getsize(filename)
+            log(f"{filename} -> {output} (frame {summary['converted'] - 1})")
+        if f is not None:
+            f.close()
+            os.replace(temp, output)
+            if len(summary['failed']) > 0:
+                # date the trajectory before the files that failed, such that it is not considered
+                # up to date, and is written again once these files have been fixed
+                mtime = min(os.stat(filename).st_mtime_ns for filename in summary['failed']) - 10**9
+                os.utime(output, ns=(mtime, mtime))
+        else:
+            os.remove(temp)
+    except BaseException:
+        if f is not None:
+            f.close()
+        os.remove(temp)
+        raise
+
+
+def convert_files(inputs, output_dir=None, trajectory=None, workers=None, force=False, log=print):
+    """Convert hoomd XML files to GSD files, using a pool of worker processes.
+
+    Each XML file is converted to its own GSD file, or, if `trajectory` is given, all files are
+    written as consecutive frames of a single GSD file. Outputs that are newer than their inputs
+    are skipped, so an interrupted conversion can be resumed by running it again; outputs are
+    written to a temporary file first, so partially written outputs are never mistaken for
+    complete ones.
+
+    Parameters
+    ----------
+    inputs : list, dtype=str
+        XML files, directories (searched recursively for files with an extension
+        containing 'xml') and/or glob patterns (e.g., 'runs/**/*.xml').
+    output_dir : string, optional, default=None
+        Directory the GSD files are written to, following the layout of the inputs relative to
+        the directory (or the part of the glob pattern before the first wildcard) they were found in.
+        If None, each GSD file is written next to its XML file. Ignored if `trajectory` is given.
+    trajectory : string, optional, default=None
+        Name of a GSD file to which all inputs are written as frames, in the order they are found.
+        Inputs that fail to load are left out of the trajectory and listed as failed.
+    workers : int, optional, default=None
+        Number of worker processes. If None, the number of CPUs is used.
+    force : bool, optional, default=False
+        If True, outputs are written even if they are up to date.
+    log : callable, optional, default=print
+        Function used to report progress.
+
+    Returns
+    -------
+    summary : dict
+        The number of files converted and skipped, the files that failed, the total number of
+        particles and bytes of XML converted, and the elapsed time.
+    """
+    start = time.perf_counter()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    summary = {'converted': 0, 'skipped': 0, 'failed': [], 'particles': 0, 'bytes': 0, 'time': 0.0}
+    collected = _collect_inputs(inputs)
+
+    if trajectory is not None:
+        files = [filename for filename, base in collected]
+        if len(files) > 0 and force == False and _up_to_date(trajectory, files):
+            summary['skipped'] = len(files)
+        elif len(files) > 0:
+            _convert_trajectory(files, trajectory, workers, summary, log)
+    else:
+        jobs = []
+        outputs = {}
+        for filename, base in collected:
+            output = _output_name(filename, base, output_dir)
+            if os.path.abspath(output) in outputs:
+                raise Exception(f"{filename} and {outputs[os.path.abspath(output)]} would both be converted to {output}.")
+            outputs[os.path.abspath(output)] = filename
+            if force == False and _up_to_date(output, [filename]):
+                summary['skipped'] += 1
+            else:
+                jobs.append((filename, output))
+        if len(jobs) > 0:
+            _convert_separate(jobs, workers, summary, log)
+
+    summary['time'] = time.perf_counter() - start
+    return summary
+
+
+def _format_summary(summary):
+    elapsed = summary['time']
+    rate = (lambda value: value / elapsed) if elapsed > 0 else (lambda value: float('inf'))
+    lines = [f"converted {summary['converted']} file(s), skipped {summary['skipped']} up to date, "
+             f"{len(summary['failed'])} failed, in {elapsed:.2f} s"]
+    if summary['converted'] > 0:
+        lines.append(f"throughput: {rate(summary['converted']):.1f} files/s, "
+                     f"{rate(summary['particles']):.3e} particles/s, "
+                     f"{rate(summary['bytes']) / 2**20:.1f} MiB/s of XML")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Entry point of the hoomdxml-to-gsd command.
+
+    Parameters
+    ----------
+    argv : list, dtype=str, optional, default=None
+        Command line arguments. If None, sys.argv is used.
+
+    Returns
+    -------
+    status : int
+        0 if all files were converted (or up to date), 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog='hoomdxml-to-gsd',
+                                     description='Convert hoomd XML files to GSD files in parallel.')
+    parser.add_argument('inputs', nargs='+',
+                        help='XML files, directories (searched recursively) or glob patterns, e.g., "runs/**/*.xml"')
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('-o', '--output-dir', default=None,
+                        help='Directory for the GSD files (default: next to each XML file)')
+    output.add_argument('-t', '--trajectory', default=None,
+                        help='Write all inputs as the frames of this GSD file, in the order they are found')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='Number of worker processes (default: the number of CPUs)')
+    parser.add_argument('-f', '--force', action='store_true',
+                        help='Convert files even if their output is up to date')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='Only print the summary')
+    args = parser.parse_args(argv)
+
+    log = (lambda message: None) if args.quiet else print
+    try:
+        summary = convert_files(args.inputs, output_dir=args.output_dir, trajectory=args.trajectory,
+                                workers=args.workers, force=args.force, log=log)
+    except Exception as error:
+        print(f"hoomdxml-to-gsd: {error}", file=sys.stderr)
+        return 1
+
+    print(_format_summary(summary))
+    for filename in summary['failed']:
+        print(f"failed: {filename}", file=sys.stderr)
+    return 1 if len(summary['failed']) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
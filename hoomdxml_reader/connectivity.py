@@ -0,0 +1,179 @@
+"""hoomdxml_reader connectivity functions """
+import numpy as np
+
+__all__ = ['connected_components', 'component_offsets', 'group_by_component']
+
+
+def connected_components(n_nodes, edges):
+    """Label the connected components of a graph defined by an array of edges.
+
+    Components are found with a vectorized union-find: in each round, every root
+    that shares an edge with a smaller root is hooked onto the smallest such root
+    (with np.minimum.at, so that a root joined by many edges, such as the hub of
+    a star, merges with all of its neighbours in the same round), followed by
+    pointer jumping until every node points directly to its root. Only edges that
+    still join different components are carried to the next round, so each round
+    is linear in the number of remaining edges; molecular topologies typically
+    need only a few rounds.
+
+    Parameters
+    ----------
+    n_nodes : int
+        Total number of nodes (i.e., particles) in the graph.
+    edges : array-like, shape=(n_edges, 2), dtype=int
+        Indices of the nodes connected by each edge.
+
+    Returns
+    -------
+    labels : numpy.ndarray, shape=(n_nodes,), dtype=int64
+        The component label of each node, defined as the smallest node index in
+        the component. Nodes without any edges are their own component.
+    """
+    parent = np.arange(n_nodes, dtype=np.int64)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    a = edges[:, 0]
+    b = edges[:, 1]
+
+    while a.size > 0:
+        root_a = parent[a]
+        root_b = parent[b]
+        active = root_a != root_b
+        if not np.any(active):
+            break
+        a = a[active]
+        b = b[active]
+        root_a = root_a[active]
+        root_b = root_b[active]
+
+        # hooking the larger root onto the smaller root can never create a cycle. Plain fancy assignment
+        # would keep only the last write to a root that appears in several edges, i.e., merge one
+        # neighbour per round, so the smallest of all candidates is taken instead
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+
+        # pointer jumping, so that each node refers directly to its root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    return parent
+
+
+def component_offsets(n_nodes, edges, vectors):
+    """Place every node relative to the root of its component by adding up edge vectors.
+
+    This is the union-find of connected_components, extended to keep the offset of each node
+    relative to its parent: when a root is hooked onto another, its offset follows from the
+    vector of the edge that hooked it, and pointer jumping adds up the offsets along the way
+    to the root. The offsets are therefore sums of edge vectors along a spanning tree of each
+    component, e.g., positions unwrapped along the bonds of a molecule from the minimum image
+    bond vectors, however large the molecule is compared to the box. Edges that close a cycle
+    are not used, so for rings the result assumes that the vectors around the ring sum to zero.
+
+    Parameters
+    ----------
+    n_nodes : int
+        Total number of nodes (i.e., particles) in the graph.
+    edges : array-like, shape=(n_edges, 2), dtype=int
+        Indices of the nodes connected by each edge.
+    vectors : array-like, shape=(n_edges, dim), dtype=float
+        Vector from the first to the second node of each edge.
+
+    Returns
+    -------
+    labels : numpy.ndarray, shape=(n_nodes,), dtype=int64
+        The component label of each node, defined as the smallest node index in the component.
+    offsets : numpy.ndarray, shape=(n_nodes, dim), dtype=float64
+        Vector from the root of its component (i.e., node labels[i]) to each node i.
+    """
+    parent = np.arange(n_nodes, dtype=np.int64)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    vectors = np.asarray(vectors, dtype=np.float64).reshape(len(edges), -1)
+    offsets = np.zeros((n_nodes, vectors.shape[1]))
+    a = edges[:, 0]
+    b = edges[:, 1]
+
+    while a.size > 0:
+        root_a = parent[a]
+        root_b = parent[b]
+        active = root_a != root_b
+        if not np.any(active):
+            break
+        a = a[active]
+        b = b[active]
+        vectors = vectors[active]
+        root_a = root_a[active]
+        root_b = root_b[active]
+
+        # orient each edge from node x, in the component with the larger root, to node y in the other one
+        high = np.maximum(root_a, root_b)
+        low = np.minimum(root_a, root_b)
+        flip = root_a < root_b
+        x = np.where(flip, b, a)
+        y = np.where(flip, a, b)
+        vector = np.where(flip[:, None], -vectors, vectors)
+
+        np.minimum.at(parent, high, low)
+        # the offset of each hooked root follows from one of the edges that hooked it onto its new parent;
+        # the offsets of x and y are relative to their roots, which are only updated below
+        hooked = np.flatnonzero(parent[high] == low)
+        hooked = hooked[np.unique(high[hooked], return_index=True)[1]]
+        offsets[high[hooked]] = offsets[y[hooked]] - offsets[x[hooked]] - vector[hooked]
+
+        # pointer jumping, adding up the offsets, so that each node refers directly to its root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            offsets = offsets + offsets[parent]
+            parent = grandparent
+
+    return parent, offsets
+
+
+def group_by_component(component_id, n_components, edges=None):
+    """Group node indices (and optionally edges) by component.
+
+    Parameters
+    ----------
+    component_id : numpy.ndarray, shape=(n_nodes,), dtype=int
+        The component id of each node, ranging from 0 to n_components-1.
+        Nodes with a negative id are not assigned to any component.
+    n_components : int
+        Total number of components.
+    edges : array-like, shape=(n_edges, 2), dtype=int, optional, default=None
+        Indices of the nodes connected by each edge. Edges are grouped by the component
+        of their first node; edges whose nodes are not assigned to a component are dropped.
+
+    Returns
+    -------
+    nodes : numpy.ndarray, dtype=int64
+        Node indices sorted by component; within a component, nodes are in ascending order.
+    node_offsets : numpy.ndarray, shape=(n_components+1,), dtype=int64
+        Nodes of component i are nodes[node_offsets[i]:node_offsets[i+1]].
+    sorted_edges : numpy.ndarray, shape=(n_grouped_edges, 2), dtype=int64
+        Edges sorted by component. Only returned if edges is not None.
+    edge_offsets : numpy.ndarray, shape=(n_components+1,), dtype=int64
+        Edges of component i are sorted_edges[edge_offsets[i]:edge_offsets[i+1]].
+        Only returned if edges is not None.
+    """
+    component_id = np.asarray(component_id, dtype=np.int64)
+    assigned = np.flatnonzero(component_id >= 0)
+    order = np.argsort(component_id[assigned], kind='stable')
+    nodes = assigned[order]
+    node_offsets = np.zeros(n_components+1, dtype=np.int64)
+    np.cumsum(np.bincount(component_id[assigned], minlength=n_components), out=node_offsets[1:])
+
+    if edges is None:
+        return nodes, node_offsets
+
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    edge_component = component_id[edges[:, 0]]
+    keep = np.flatnonzero(edge_component >= 0)
+    order = np.argsort(edge_component[keep], kind='stable')
+    sorted_edges = edges[keep[order]]
+    edge_offsets = np.zeros(n_components+1, dtype=np.int64)
+    np.cumsum(np.bincount(edge_component[keep], minlength=n_components), out=edge_offsets[1:])
+
+    return nodes, node_offsets, sorted_edges, edge_offsets
@@ -5,13 +5,21 @@ Module for reading legacy hoomd XML formatted files.
 
 __all__ = ["System"]
 
-import networkx as nx
-import gsd.hoomd
+import os
+import numpy as np
 
 import xml.etree.ElementTree as ET
 
-from hoomdxml_reader.molecule import Molecule
+from hoomdxml_reader.molecule import MoleculeList
+from hoomdxml_reader.connectivity import connected_components, component_offsets, group_by_component
+from hoomdxml_reader.cache import ParseCache
+from hoomdxml_reader.binary import read_state, write_state
+from hoomdxml_reader.writers import write_xml, write_gsd, _gsd_modes
+from hoomdxml_reader.instrumentation import LoadStats
+from hoomdxml_reader.selection import Selection, _group_indices, _gather_groups
+from contextlib import nullcontext
 from warnings import warn
+import warnings
 
 class System(object):
     """
@@ -31,7 +39,8 @@ class System(object):
     frame : int, optional, default=0
     identify_molecules : bool, optional, default=True
         If True, the code will group the particles based upon their underlying connectivity.
-        Particles bonded together will be considered a molecule
+        Particles bonded together will be considered a molecule. Molecules are identified
+        the first time they are accessed, rather than when the file is loaded.
     ignore_zero_bond_order : bool, optional, default=False
         If True, particles without any bonds (i.e., bond order = 0) will be ignored when
         identifying molecules (i.e., they will not appear in the molecule list).
@@ -39,11 +48,42 @@ class System(object):
     molecule_dict : dict, dtype=str, optional, default=None
         A dict that defines the molecule 'pattern' and associated user defined name.
         This is used for renaming molecules automatically identified.
+    list_compatibility : bool, optional, default=False
+        If True, properties such as `xyz`, `types`, `masses` and `charges` will return
+        Python lists rather than NumPy arrays, matching the behavior of earlier versions.
+        Each list is built on first access and returned again until another file is loaded.
+    cache : bool, string or ParseCache, optional, default=None
+        If set, parsed files are stored in, and restored from, an on-disk cache (see ParseCache).
+        True uses the default cache directory; a string is the name of the cache directory.
+    sections : list, dtype=str, optional, default=None
+        Sections of the file to parse, out of 'position', 'type', 'mass', 'charge', 'bond',
+        'angle', 'dihedral' and 'improper'. If None, all sections are parsed. The box and
+        number of particles are always read. Sections that are skipped are parsed from the
+        source file the first time they are accessed. Since an XML file has to be read in
+        full to find any section, the first access parses all skipped sections in one pass.
+    instrument : bool or str, optional, default=False
+        If True, the wall time of each phase of the load (e.g., reading the file, parsing each
+        section, calculating the bond order and identifying molecules) is recorded in `load_stats`.
+        If 'memory', the peak memory allocated in each phase is recorded as well.
     Returns
     ------
     """
+    
+    # sections of a file that can be selectively loaded (see the sections argument of load)
+    _sections = ('position', 'type', 'mass', 'charge', 'bond', 'angle', 'dihedral', 'improper')
+    
+    # arrays and metadata that fully define the state of a System (see _get_state and _set_state)
+    _state_arrays = ('xyz', 'typeid', 'masses', 'charges', 'bond_order',
+                     'bonds', 'bond_typeid', 'angles', 'angle_typeid',
+                     'dihedrals', 'dihedral_typeid', 'impropers', 'improper_typeid',
+                     'molecule_id', 'molecule_particles', 'molecule_particle_offsets',
+                     'molecule_bonds', 'molecule_bond_offsets', 'molecule_pattern_id')
+    _state_metadata = ('filename', 'frame', 'n_particles', 'box', 'type_names',
+                       'bond_types', 'angle_types', 'dihedral_types', 'improper_types',
+                       'identify_molecules', 'ignore_zero_bond_order', 'list_compatibility',
+                       'molecules_inferred', 'molecule_dict', 'molecule_patterns', 'unique_molecules')
 
-    def __init__(self, file=None, frame=0, identify_molecules=True, ignore_zero_bond_order=False, molecule_dict=None):
+    def __init__(self, file=None, frame=0, identify_molecules=True, ignore_zero_bond_order=False, molecule_dict=None, list_compatibility=False, cache=None, sections=None, instrument=False):
         """Initialize the System class.
         
         This initializes the System class.  If an XML or GSD file is passed during instantiation,
@@ -56,7 +96,8 @@ class System(object):
         frame : int, optional, default=0
         identify_molecules : bool, optional, default=True
             If True, the code will group the particles based upon their underlying connectivity.
-            Particles bonded together will be considered a molecule
+            Particles bonded together will be considered a molecule. Molecules are identified
+            the first time they are accessed, rather than when the file is loaded.
         ignore_zero_bond_order : bool, optional, default=False
             If True, particles without any bonds (i.e., bond order = 0) will be ignored when
             identifying molecules (i.e., they will not appear in the molecule list).
@@ -64,61 +105,123 @@ class System(object):
         molecule_dict : dict, dtype=str, optional, default=None
             A dict that defines the molecule 'pattern' and associated user defined name.
             This is used for renaming molecules automatically identified.
+        list_compatibility : bool, optional, default=False
+            If True, properties such as `xyz`, `types`, `masses` and `charges` will return
+            Python lists rather than NumPy arrays, matching the behavior of earlier versions.
+            Each list is built on first access and returned again until another file is loaded.
+        cache : bool, string or ParseCache, optional, default=None
+            If set, parsed files are stored in, and restored from, an on-disk cache (see ParseCache).
+            True uses the default cache directory; a string is the name of the cache directory.
+        sections : list, dtype=str, optional, default=None
+            Sections of the file to parse, out of 'position', 'type', 'mass', 'charge', 'bond',
+            'angle', 'dihedral' and 'improper'. If None, all sections are parsed. The box and
+            number of particles are always read. Sections that are skipped are parsed from the
+            source file the first time they are accessed. Since an XML file has to be read in
+            full to find any section, the first access parses all skipped sections in one pass.
+        instrument : bool or str, optional, default=False
+            If True, the wall time of each phase of the load (e.g., reading the file, parsing each
+            section, calculating the bond order and identifying molecules) is recorded in `load_stats`.
+            If 'memory', the peak memory allocated in each phase is recorded as well.
         Returns
         ------
         """
-        self._filename = None
-        self._xyz = []
-        self._n_particles = 0
-        self._types = []
-        self._bond_order = []
-        self._bonds = []
-        self._angles = []
-        self._dihedrals = []
-        self._impropers = []
-        self._charges = []
-        self._masses = []
+        self._molecule_generation = 0
+        self._clear()
         self._frame = frame
-        self._box = []
-            
-        self._molecules = []
-        self._unique_molecules = {}
         
         self._identify_molecules = identify_molecules
         self._ignore_zero_bond_order = ignore_zero_bond_order
+        self._list_compatibility = list_compatibility
         
         if file is not None:
             self._filename = file
-            ext = file.split('.')[-1]
-            if "xml" in ext:
-                self._load_xml()
-            elif "gsd" in ext:
-                self._load_gsd(frame=self._frame)
+            self._load_stats = LoadStats._create(file, instrument)
+            self._pending_sections = set(self._sections) - self._check_sections(sections)
+            self._load_file(cache)
 
-            if self._identify_molecules == True:
-                self._infer_molecules()
+            # molecules are identified (and named) the first time they are accessed
             if molecule_dict is not None:
                 self.set_molecule_name_by_dictionary(molecule_dict)
                 
     def _clear(self):
         self._filename = None
-        self._xyz = []
+        self._xyz = np.zeros((0, 3))
         self._n_particles = 0
-        self._types = []
-        self._bond_order = []
-        self._bonds = []
-        self._angles = []
-        self._dihedrals = []
-        self._impropers = []
-        self._charges = []
-        self._masses = []
+        self._typeid = np.zeros(0, dtype=np.uint32)
+        self._type_names = []
+        self._bond_order = np.zeros(0, dtype=np.int64)
+        self._bonds = np.zeros((0, 2), dtype=np.uint32)
+        self._bond_typeid = np.zeros(0, dtype=np.uint32)
+        self._bond_types = []
+        self._angles = np.zeros((0, 3), dtype=np.uint32)
+        self._angle_typeid = np.zeros(0, dtype=np.uint32)
+        self._angle_types = []
+        self._dihedrals = np.zeros((0, 4), dtype=np.uint32)
+        self._dihedral_typeid = np.zeros(0, dtype=np.uint32)
+        self._dihedral_types = []
+        self._impropers = np.zeros((0, 4), dtype=np.uint32)
+        self._improper_typeid = np.zeros(0, dtype=np.uint32)
+        self._improper_types = []
+        self._charges = np.zeros(0)
+        self._masses = np.zeros(0)
         self._box = []
             
+        self._graph = None
+        self._molecule_dict = None
+        self._pending_sections = set()
+        self._load_stats = None
+        self._type_index = None
+        self._views = {}
+        self._clear_molecules()
+    
+    # resets the molecules, such that they are identified again the next time they are accessed.
+    # Molecule views created before the reset refer to the previous generation and can no longer be used.
+    def _clear_molecules(self):
+        self._molecule_generation += 1
         self._molecules = []
         self._unique_molecules = {}
+        self._molecule_id = np.zeros(0, dtype=np.int64)
+        self._molecule_particles = np.zeros(0, dtype=np.int64)
+        self._molecule_particle_offsets = np.zeros(1, dtype=np.int64)
+        self._molecule_bonds = np.zeros((0, 2), dtype=np.int64)
+        self._molecule_bond_offsets = np.zeros(1, dtype=np.int64)
+        self._molecule_pattern_id = np.zeros(0, dtype=np.int64)
+        self._molecule_patterns = []
+        self._molecule_name_overrides = {}
+        self._molecule_name_index = None
+        self._molecules_inferred = False
+        
+    # returns a dict of the arrays and a dict of the (JSON serializable) metadata that define the system,
+    # e.g., to transfer a system between processes or store it on disk without re-parsing the source file.
+    def _get_state(self):
+        arrays = {}
+        for name in self._state_arrays:
+            arrays[name] = getattr(self, '_' + name)
+        metadata = {}
+        for name in self._state_metadata:
+            metadata[name] = getattr(self, '_' + name)
+        metadata['molecule_name_overrides'] = [[int(i), name] for i, name in self._molecule_name_overrides.items()]
+        metadata['pending_sections'] = sorted(self._pending_sections)
+        return arrays, metadata
+    
+    # restore a system from the arrays and metadata returned by _get_state
+    def _set_state(self, arrays, metadata):
+        load_stats = self._load_stats
+        self._clear()
+        self._load_stats = load_stats
+        for name in self._state_arrays:
+            if name in arrays:
+                setattr(self, '_' + name, arrays[name])
+        for name in self._state_metadata:
+            if name in metadata:
+                setattr(self, '_' + name, metadata[name])
+        self._molecule_name_overrides = {int(i): name for i, name in metadata.get('molecule_name_overrides', [])}
+        self._pending_sections = set(metadata.get('pending_sections', []))
+        if self._molecules_inferred == True and self._identify_molecules == True:
+            self._molecules = MoleculeList(self)
         
     # essentially the same workflow as the constructor
-    def load(self, file=None, frame=0, identify_molecules=True, ignore_zero_bond_order=False, molecule_dict=None):
+    def load(self, file=None, frame=0, identify_molecules=True, ignore_zero_bond_order=False, molecule_dict=None, list_compatibility=False, cache=None, sections=None, instrument=False):
         """Loads an xml or gsd file.
         
         Load the xml or GSD file into the system class. This function will clear
@@ -131,7 +234,8 @@ class System(object):
         frame : int, optional, default=0
         identify_molecules : bool, optional, default=True
             If True, the code will group the particles based upon their underlying connectivity.
-            Particles bonded together will be considered a molecule
+            Particles bonded together will be considered a molecule. Molecules are identified
+            the first time they are accessed, rather than when the file is loaded.
         ignore_zero_bond_order : bool, optional, default=False
             If True, particles without any bonds (i.e., bond order = 0) will be ignored when
             identifying molecules (i.e., they will not appear in the molecule list).
@@ -139,6 +243,23 @@ class System(object):
         molecule_dict : dict, dtype=str, optional, default=None
             A dict that defines the molecule 'pattern' and associated user defined name.
             This is used for renaming molecules automatically identified.
+        list_compatibility : bool, optional, default=False
+            If True, properties such as `xyz`, `types`, `masses` and `charges` will return
+            Python lists rather than NumPy arrays, matching the behavior of earlier versions.
+            Each list is built on first access and returned again until another file is loaded.
+        cache : bool, string or ParseCache, optional, default=None
+            If set, parsed files are stored in, and restored from, an on-disk cache (see ParseCache).
+            True uses the default cache directory; a string is the name of the cache directory.
+        sections : list, dtype=str, optional, default=None
+            Sections of the file to parse, out of 'position', 'type', 'mass', 'charge', 'bond',
+            'angle', 'dihedral' and 'improper'. If None, all sections are parsed. The box and
+            number of particles are always read. Sections that are skipped are parsed from the
+            source file the first time they are accessed. Since an XML file has to be read in
+            full to find any section, the first access parses all skipped sections in one pass.
+        instrument : bool or str, optional, default=False
+            If True, the wall time of each phase of the load (e.g., reading the file, parsing each
+            section, calculating the bond order and identifying molecules) is recorded in `load_stats`.
+            If 'memory', the peak memory allocated in each phase is recorded as well.
         Returns
         ------
         """
@@ -148,19 +269,80 @@ class System(object):
             self._clear()
             self._identify_molecules = identify_molecules
             self._ignore_zero_bond_order = ignore_zero_bond_order
+            self._list_compatibility = list_compatibility
             self._frame = frame
             self._filename = file
+            self._load_stats = LoadStats._create(file, instrument)
+            self._pending_sections = set(self._sections) - self._check_sections(sections)
             
-            ext = file.split('.')[-1]
-            if "xml" in ext:
-                self._load_xml()
-            elif "gsd" in ext:
-                self._load_gsd(frame=self._frame)
-            if self._identify_molecules == True:
-                self._infer_molecules()
+            self._load_file(cache)
+            
+            # molecules are identified (and named) the first time they are accessed
             if molecule_dict is not None:
                 self.set_molecule_name_by_dictionary(molecule_dict)
                 
+    # parse the file based upon its extension, or restore it from the parse cache if one is given
+    def _load_file(self, cache=None):
+        if cache is not None and cache is not False:
+            cache = ParseCache._from_option(cache)
+            # the key is based upon the sections requested, rather than those loaded when identifying molecules
+            key = cache._key(self)
+            with self._phase('cache_restore'):
+                restored = cache._restore(self, key)
+            if restored:
+                return
+        
+        ext = self._filename.split('.')[-1]
+        if ext == "hxb":
+            # arrays in hxb files are memory-mapped, so no sections need to be skipped
+            self._load_hxb()
+            return
+        elif "xml" in ext:
+            self._load_xml(sections=set(self._sections) - self._pending_sections)
+        elif "gsd" in ext:
+            self._load_gsd(frame=self._frame, sections=set(self._sections) - self._pending_sections)
+        
+        if cache is not None and cache is not False:
+            # molecules are stored in the cache as well, so that later loads do not need to identify them
+            self._ensure_molecules()
+            with self._phase('cache_store'):
+                cache._store(self, key)
+    
+    # record the time (and memory) spent within a block of code in load_stats, if the load is instrumented
+    def _phase(self, name):
+        if self._load_stats is None:
+            return nullcontext()
+        return self._load_stats.phase(name)
+    
+    # validate the sections argument of load; returns the set of sections to parse
+    def _check_sections(self, sections):
+        if sections is None:
+            return set(self._sections)
+        if isinstance(sections, str):
+            sections = [sections]
+        unknown = set(sections) - set(self._sections)
+        if len(unknown) > 0:
+            raise Exception(f"Unknown section(s): {', '.join(sorted(unknown))}. Valid sections are: {', '.join(self._sections)}.")
+        return set(sections)
+    
+    # sections skipped when loading are parsed from the source file the first time they are accessed.
+    # XML files are read from the start to find any section, so all pending sections are parsed in that single
+    # pass, rather than reading the file again for each section; GSD chunks are read individually.
+    def _ensure_sections(self, *sections):
+        pending = self._pending_sections.intersection(sections)
+        if len(pending) == 0:
+            return
+        if self._filename is None or not os.path.isfile(self._filename):
+            raise Exception(f"The {', '.join(sorted(pending))} section(s) were not loaded, "
+                            f"and the source file ({self._filename}) is not available to load them from.")
+        ext = self._filename.split('.')[-1]
+        if "xml" in ext:
+            pending = set(self._pending_sections)
+            self._load_xml(sections=pending)
+        elif "gsd" in ext:
+            self._load_gsd(frame=self._frame, sections=pending)
+        self._pending_sections = self._pending_sections - pending
+    
     """
     # This would populate the fields from an mdtraj trajectory.
     # I've commented this out because mdtraj format requires us to assume information,
@@ -193,160 +375,387 @@ class System(object):
                 self._infer_molecules()
     """
     # generic function to parse the topology entries,
-    # takes the element as an argument and  number of entries per line
-    def _parse_topology(self, element, length):
-        temp_element = self._config.find(element)
-        if temp_element is not None:
-            temp_text = temp_element.text
-            agg_array = []
-            entry_temp = temp_text.split()
-            for i in range(0, len(entry_temp), length):
-                temp_array = []
-                temp_array.append(entry_temp[i])
-                for j in range(1, length):
-                    temp_array.append(int(entry_temp[i+j]))
-                agg_array.append(temp_array)
-            return agg_array
+    # takes the text of the element, the number of entries per line and the name of the section as arguments.
+    # Returns an (n, length-1) array of particle indices, an array of integer type ids
+    # and a list of the type names, matching the layout used by GSD.
+    # Indices that cannot be stored as uint32 (e.g., negative indices) are rejected before they are cast;
+    # indices past the last particle are checked once the whole file is read (see _check_topology).
+    def _parse_topology(self, text, length, section):
+        if text is None:
+            text = ''
+        entry_temp = text.split()
+        if len(entry_temp) % length != 0:
+            raise Exception(f"Topology entries must have {length} values per line; found {len(entry_temp)} values in total.")
+        n_entries = len(entry_temp) // length
+        
+        names = entry_temp[0::length]
+        types = sorted(set(names))
+        type_lookup = {name: i for i, name in enumerate(types)}
+        typeid = np.fromiter(map(type_lookup.__getitem__, names), dtype=np.uint32, count=n_entries)
+        
+        indices = np.empty((n_entries, length-1), dtype=np.int64)
+        for j in range(1, length):
+            indices[:, j-1] = np.fromiter(map(int, entry_temp[j::length]), dtype=np.int64, count=n_entries)
+        invalid = (indices < 0) | (indices > np.iinfo(np.uint32).max)
+        if np.any(invalid):
+            raise Exception(f"The {section} section contains the particle index {indices[invalid][0]}, which is out of range.")
+        return indices.astype(np.uint32), typeid, types
+    
+    # check that the topology sections that were loaded only refer to particles of the system
+    def _check_topology(self, sections):
+        for section in ('bond', 'angle', 'dihedral', 'improper'):
+            group = getattr(self, f'_{section}s')
+            if section in sections and len(group) > 0 and int(group.max()) >= self._n_particles:
+                raise Exception(f"The {section} section contains the particle index {int(group.max())}, "
+                                f"but the system only has {self._n_particles} particles.")
     
     # a generic function to parse a list of floats defined in the text between opening/closing tags for a given element
     def _parse_floats(self, element):
-        temp_element = self._config.find(element)
-        temp_text = temp_element.text
-        agg_array = []
-        entry_temp = temp_text.split()
-        for i in range(0, len(entry_temp)):
-            agg_array.append(float(entry_temp[i]))
-        return agg_array
+        num = element.attrib.get('num', None)
+        if num is not None:
+            num = int(num)
+        elif self._n_particles > 0:
+            num = self._n_particles
+        return self._parse_text_block(element.text, num=num, width=1)
+    
+    # convert the whitespace delimited text of a section into a typed array of shape (num, width) in a single call.
+    # If the text cannot be converted in bulk, or the number of entries does not match the expected number,
+    # fall back to converting each entry individually. If num is None, the number of entries is not checked.
+    def _parse_text_block(self, text, num, width=1, dtype=np.float64):
+        if text is None:
+            text = ''
+        data = None
+        with warnings.catch_warnings():
+            # numpy only warns (rather than raising) when it encounters text it cannot convert
+            warnings.simplefilter('error')
+            try:
+                data = np.fromstring(text, dtype=dtype, sep=' ')
+            except (ValueError, DeprecationWarning):
+                data = None
+        
+        if data is None or (num is not None and data.size != num*width):
+            entry_temp = text.split()
+            agg_array = []
+            for i in range(0, len(entry_temp)):
+                agg_array.append(float(entry_temp[i]))
+            data = np.array(agg_array, dtype=dtype)
+            if num is not None and data.size != num*width:
+                warn(f"Expected {num*width} entries but found {data.size}.")
+        
+        if width > 1:
+            return data.reshape(-1, width)
+        return data
 
     def _calc_bond_order(self):
         # calculate bond_order
-        for i in range(0, self.n_particles):
-            self._bond_order.append(0)
-            
-        for bond in self._bonds:
-            i = bond[1]
-            j = bond[2]
-            self._bond_order[i] += 1
-            self._bond_order[j] += 1
+        with self._phase('bond_order'):
+            self._bond_order = self._calc_participation(self._bonds)
+    
+    # count the number of entries in a topology section (e.g., bonds or angles) that each particle belongs to.
+    # Sections read from a file are checked when they are loaded; indices are checked again here since an
+    # out of range index would make bincount allocate an array of that length (or return too many counts).
+    def _calc_participation(self, group):
+        group = np.asarray(group).ravel()
+        if len(group) > 0 and int(group.max()) >= self._n_particles:
+            raise Exception(f"Topology entries contain the particle index {int(group.max())}, "
+                            f"but the system only has {self._n_particles} particles.")
+        return np.bincount(group, minlength=self._n_particles).astype(np.int64)
     
     #  function to load and parse the XML
-    def _load_xml(self):
-        self._tree = ET.parse(self._filename)
-        self._root = self._tree.getroot()
-        self._config =  self._root.find('configuration')
+    #  The file is parsed incrementally; each section is converted as soon as its closing tag is read
+    #  and then cleared, so that the text of the file is never held in memory all at once.
+    #  Only the given sections are converted; the box and number of particles are always read.
+    def _load_xml(self, sections=None):
+        if sections is None:
+            sections = self._sections
+        root = None
+        in_configuration = False
+        with self._phase('read_xml'):
+            for event, element in ET.iterparse(self._filename, events=('start', 'end')):
+                if event == 'start':
+                    if root is None:
+                        root = element
+                    elif element.tag == 'configuration':
+                        in_configuration = True
+                    continue
+                
+                if element.tag == 'configuration':
+                    # only the first configuration in the file is loaded
+                    break
+                if not in_configuration:
+                    continue
+                    
+                # parse box information
+                if element.tag == 'box':
+                    self._box = [float(element.attrib['Lx']), float(element.attrib['Ly']), float(element.attrib['Lz'])]
+                elif element.tag == 'position':
+                    self._n_particles = int(element.attrib['num'])
+                
+                if element.tag in sections:
+                    with self._phase(f'parse_{element.tag}'):
+                        self._parse_xml_section(element)
+                
+                # release the text of the element (and any children) now that it has been converted
+                element.clear()
+            
+            if root is not None:
+                root.clear()
         
-        # parse box information
-        box_element = self._config.find('box')
-        self._box = [float(box_element.attrib['Lx']), float(box_element.attrib['Ly']), float(box_element.attrib['Lz'])]
+        self._check_topology(sections)
         
+        # calculate bond_order
+        if 'bond' in sections:
+            self._calc_bond_order()
+    
+    # convert the text of a single section of the XML file
+    def _parse_xml_section(self, element):
         # parse position data
-        pos_element = self._config.find('position')
-        self._n_particles = int(pos_element.attrib['num'])
-        positions_text = pos_element.text
-
-        pos_temp = positions_text.split()
-        xyz_temp = []
-        for i in range(0, len(pos_temp), 3):
-            temp_array = [float(pos_temp[i]), float(pos_temp[i+1]), float(pos_temp[i+2])]
-            self._xyz.append(temp_array)
-        
-        
-        # parse types
-        type_element = self._config.find('type')
-        type_text = type_element.text
-        self._types = type_text.split()
-
+        if element.tag == 'position':
+            self._xyz = self._parse_text_block(element.text, num=self._n_particles, width=3)
+            
+        # parse types; store an integer type id per particle along with a table of type names
+        elif element.tag == 'type':
+            self._set_types(element.text.split())
+            
         # parse mass
-        self._masses = self._parse_floats(element='mass')
-    
+        elif element.tag == 'mass':
+            self._masses = self._parse_floats(element)
+        
         # parse charge
-        self._charges = self._parse_floats(element='charge')
-
+        elif element.tag == 'charge':
+            self._charges = self._parse_floats(element)
+        
         # parse topological info
-        self._bonds = self._parse_topology(element='bond', length=3)
-        self._angles = self._parse_topology(element='angle', length=4)
-        self._dihedrals = self._parse_topology(element='dihedral', length=5)
-        self._impropers = self._parse_topology(element='improper', length=5)
-
-        # calculate bond_order
-        self._calc_bond_order()
+        elif element.tag == 'bond':
+            self._bonds, self._bond_typeid, self._bond_types = self._parse_topology(element.text, length=3, section='bond')
+        elif element.tag == 'angle':
+            self._angles, self._angle_typeid, self._angle_types = self._parse_topology(element.text, length=4, section='angle')
+        elif element.tag == 'dihedral':
+            self._dihedrals, self._dihedral_typeid, self._dihedral_types = self._parse_topology(element.text, length=5, section='dihedral')
+        elif element.tag == 'improper':
+            self._impropers, self._improper_typeid, self._improper_types = self._parse_topology(element.text, length=5, section='improper')
         
     # function to load and parse the GSD
-    def _load_gsd(self, frame):
+    # If only some sections are requested, only the chunks of the frame that hold these sections are read.
+    def _load_gsd(self, frame, sections=None):
+        # gsd is imported when it is first needed, so that it is not imported by programs that only read XML files
+        import gsd.hoomd
+        with self._phase('read_gsd'):
+            with gsd.hoomd.open(name=self._filename, mode=_gsd_modes()[0]) as f:
+                if sections is None or set(sections) == set(self._sections):
+                    snapshot = f[frame]
+                    self._load_gsd_snapshot(snapshot)
+                else:
+                    self._load_gsd_chunks(f.file, frame, sections)
+    
+    # read a chunk of a GSD frame; as in GSD, data not stored in a frame is taken from frame 0
+    def _read_gsd_chunk(self, gsd_file, frame, name):
+        if gsd_file.chunk_exists(frame=frame, name=name):
+            return gsd_file.read_chunk(frame=frame, name=name)
+        if frame != 0 and gsd_file.chunk_exists(frame=0, name=name):
+            return gsd_file.read_chunk(frame=0, name=name)
+        return None
+    
+    # read a list of type names, which GSD stores as a 2D array of characters
+    def _read_gsd_types(self, gsd_file, frame, name, default):
+        data = self._read_gsd_chunk(gsd_file, frame, name)
+        if data is None:
+            return list(default)
+        data = data.view(dtype=np.dtype((bytes, data.shape[1]))).reshape(-1)
+        return [entry.decode('utf-8') for entry in data]
+    
+    # load the given sections of a GSD frame directly from its chunks,
+    # using the same defaults as GSD for data that is not stored in the file
+    def _load_gsd_chunks(self, gsd_file, frame, sections):
+        n_particles = self._read_gsd_chunk(gsd_file, frame, 'particles/N')
+        self._n_particles = int(n_particles[0]) if n_particles is not None else 0
+        box = self._read_gsd_chunk(gsd_file, frame, 'configuration/box')
+        self._box = [float(box[0]), float(box[1]), float(box[2])] if box is not None else [1.0, 1.0, 1.0]
+        
+        if 'position' in sections:
+            position = self._read_gsd_chunk(gsd_file, frame, 'particles/position')
+            self._xyz = position.reshape(-1, 3) if position is not None else np.zeros((self._n_particles, 3), dtype=np.float32)
+        if 'type' in sections:
+            typeid = self._read_gsd_chunk(gsd_file, frame, 'particles/typeid')
+            self._typeid = np.asarray(typeid, dtype=np.uint32) if typeid is not None else np.zeros(self._n_particles, dtype=np.uint32)
+            self._type_names = self._read_gsd_types(gsd_file, frame, 'particles/types', default=['A'])
+        if 'mass' in sections:
+            mass = self._read_gsd_chunk(gsd_file, frame, 'particles/mass')
+            self._masses = mass if mass is not None else np.ones(self._n_particles, dtype=np.float32)
+        if 'charge' in sections:
+            charge = self._read_gsd_chunk(gsd_file, frame, 'particles/charge')
+            self._charges = charge if charge is not None else np.zeros(self._n_particles, dtype=np.float32)
         
-        f = gsd.hoomd.open(name=self._filename, mode='rb')
-        snapshot = f[frame]
+        for name, width in [('bond', 2), ('angle', 3), ('dihedral', 4), ('improper', 4)]:
+            if name not in sections:
+                continue
+            n_entries = self._read_gsd_chunk(gsd_file, frame, f'{name}s/N')
+            n_entries = int(n_entries[0]) if n_entries is not None else 0
+            group = self._read_gsd_chunk(gsd_file, frame, f'{name}s/group')
+            typeid = self._read_gsd_chunk(gsd_file, frame, f'{name}s/typeid')
+            if group is None or n_entries == 0:
+                group = np.zeros((n_entries, width), dtype=np.uint32)
+            if typeid is None or n_entries == 0:
+                typeid = np.zeros(n_entries, dtype=np.uint32)
+            setattr(self, f'_{name}s', np.asarray(group, dtype=np.uint32).reshape(-1, width))
+            setattr(self, f'_{name}_typeid', np.asarray(typeid, dtype=np.uint32))
+            setattr(self, f'_{name}_types', self._read_gsd_types(gsd_file, frame, f'{name}s/types', default=[]))
         
+        if 'bond' in sections:
+            self._calc_bond_order()
+    
+    # function to load the native binary format written by save;
+    # the arrays are memory-mapped, such that only the data that is accessed is read from disk.
+    def _load_hxb(self):
+        with self._phase('read_hxb'):
+            arrays, metadata = read_state(self._filename, mmap_mode=True)
+        settings = (self._filename, self._frame, self._identify_molecules, self._ignore_zero_bond_order, self._list_compatibility)
+        self._set_state(arrays, metadata)
+        
+        # molecules stored in the file are only reused if they were identified with the same settings
+        if self._identify_molecules != settings[2] or self._ignore_zero_bond_order != settings[3]:
+            self._clear_molecules()
+        self._filename, self._frame, self._identify_molecules, self._ignore_zero_bond_order, self._list_compatibility = settings
         
-        for i, xyz in enumerate(snapshot.particles.position):
-            self._xyz.append(list(xyz))
-            self._masses.append(float(snapshot.particles.mass[i]))
-            self._charges.append(float(snapshot.particles.charge[i]))
+    # function to parse a single frame read from a GSD file
+    def _load_gsd_snapshot(self, snapshot):
+        # GSD already stores particle data as arrays, so these are kept as is
+        self._xyz = np.asarray(snapshot.particles.position).reshape(-1, 3)
+        self._masses = np.asarray(snapshot.particles.mass)
+        self._charges = np.asarray(snapshot.particles.charge)
             
         self._box = [float(snapshot.configuration.box[0]), float(snapshot.configuration.box[1]), float(snapshot.configuration.box[2])]
         
-        for typeid in snapshot.particles.typeid:
-            self._types.append(snapshot.particles.types[typeid])
+        self._typeid = np.asarray(snapshot.particles.typeid, dtype=np.uint32)
+        self._type_names = list(snapshot.particles.types)
 
-        for bond, typeid in zip(snapshot.bonds.group,snapshot.bonds.typeid):
-            temp_bond = [snapshot.bonds.types[typeid], int(bond[0]), int(bond[1])]
-            self._bonds.append(temp_bond)
+        self._bonds = np.asarray(snapshot.bonds.group, dtype=np.uint32).reshape(-1, 2)
+        self._bond_typeid = np.asarray(snapshot.bonds.typeid, dtype=np.uint32)
+        self._bond_types = list(snapshot.bonds.types)
         
-        for angle, typeid in zip(snapshot.angles.group,snapshot.angles.typeid):
-            temp_angle = [snapshot.angles.types[typeid], int(angle[0]), int(angle[1]), int(angle[2])]
-            self._angles.append(temp_angle)
+        self._angles = np.asarray(snapshot.angles.group, dtype=np.uint32).reshape(-1, 3)
+        self._angle_typeid = np.asarray(snapshot.angles.typeid, dtype=np.uint32)
+        self._angle_types = list(snapshot.angles.types)
         
-        for dihedral, typeid in zip(snapshot.dihedrals.group,snapshot.dihedrals.typeid):
-            temp_dihedral = [snapshot.dihedrals.types[typeid], int(dihedral[0]), int(dihedral[1]), int(dihedral[2]), int(dihedral[3])]
-            self._dihedrals.append(temp_dihedral)
-
-        for improper, typeid in zip(snapshot.impropers.group,snapshot.impropers.typeid):
-            temp_improper = [snapshot.impropers.types[typeid], int(improper[0]), int(improper[1]), int(improper[2]), int(improper[3])]
-            self._impropers.append(temp_improper)
+        self._dihedrals = np.asarray(snapshot.dihedrals.group, dtype=np.uint32).reshape(-1, 4)
+        self._dihedral_typeid = np.asarray(snapshot.dihedrals.typeid, dtype=np.uint32)
+        self._dihedral_types = list(snapshot.dihedrals.types)
+        
+        self._impropers = np.asarray(snapshot.impropers.group, dtype=np.uint32).reshape(-1, 4)
+        self._improper_typeid = np.asarray(snapshot.impropers.typeid, dtype=np.uint32)
+        self._improper_types = list(snapshot.impropers.types)
         
         self._n_particles = len(self._xyz)
         
         # calculate bond_order
         self._calc_bond_order()
+    
+    # build the list representation of a topology section, i.e., [name, i, j, ...] for each entry
+    def _topology_as_list(self, group, typeid, types):
+        names = [types[t] for t in typeid.tolist()]
+        return [[name] + entry for name, entry in zip(names, group.tolist())]
+    
+    # convert a list of per-particle type names into integer type ids and a table of type names
+    def _set_types(self, type_list):
+        type_names, typeid = np.unique(np.asarray(type_list, dtype=str), return_inverse=True)
+        self._type_names = type_names.tolist()
+        self._typeid = typeid.astype(np.uint32).reshape(-1)
             
-    # use networkx to create a graph, then look for which components are connected
+    # identify which particles are connected using the bonds, then group connected particles into molecules.
+    # Molecules that contain bonds are listed first, ordered by their lowest particle index,
+    # followed by any particles with bond order = 0 (unless these are ignored).
     def _infer_molecules(self):
-        self._graph = nx.Graph()
-        for bond in self._bonds:
-            self._graph.add_edge(bond[1],bond[2])
-        
-        for c in nx.connected_components(self._graph):
-            mol_temp = Molecule()
-            temp = list(c)
-            temp.sort()
-            
-            for item in temp:
-                mol_temp.add_particle(item, self._types[item])
-            for edge in self._graph.subgraph(c).edges:
-                mol_temp.add_bond(list(edge))
-            
-            self._molecules.append(mol_temp)
-            
+        self._molecules = []
+        labels = connected_components(self._n_particles, self._bonds)
+        bonded = self._bond_order > 0
+        
+        molecule_id = np.full(self._n_particles, -1, dtype=np.int64)
+        roots, molecule_id[bonded] = np.unique(labels[bonded], return_inverse=True)
+        n_molecules = len(roots)
         if self._ignore_zero_bond_order == False:
-            for i, bo in enumerate(self._bond_order):
-                if bo == 0:
-                    mol_temp = Molecule()
-                    mol_temp.add_particle(i, self._types[i])
-                    
-                    self._molecules.append(mol_temp)
+            isolated = np.flatnonzero(~bonded)
+            molecule_id[isolated] = np.arange(n_molecules, n_molecules+len(isolated))
+            n_molecules += len(isolated)
+        self._molecule_id = molecule_id
         
-        temp_set = set()
-        self._unique_molecules = {}
-        for molecule in self._molecules:
-            temp_set.add(molecule.pattern)
+        # particles (and bonds) are sorted by molecule; each Molecule is a view into these arrays
+        (self._molecule_particles, self._molecule_particle_offsets,
+         self._molecule_bonds, self._molecule_bond_offsets) = group_by_component(molecule_id, n_molecules, self._bonds)
+        self._molecule_name_overrides = {}
+        self._molecule_name_index = None
+        self._calc_molecule_patterns()
         
-        temp_list = list(temp_set)
-        for i, temp_str in enumerate(temp_list):
+        self._unique_molecules = {}
+        for i, temp_str in enumerate(self._molecule_patterns):
             self._unique_molecules[temp_str] = f'molecule{i}'
         
-        for molecule in self._molecules:
-             molecule.set_molecule_name(self._unique_molecules[molecule.pattern])
+        self._molecules = MoleculeList(self)
+    
+    # determine the pattern (i.e., the concatenated type names) of each molecule.
+    # Molecules with the same number of particles are compared as rows of type ids, so that a pattern string
+    # is only constructed once for each unique sequence of types. Patterns are numbered in the order they first appear.
+    def _calc_molecule_patterns(self):
+        offsets = self._molecule_particle_offsets
+        n_molecules = len(offsets) - 1
+        lengths = np.diff(offsets)
+        
+        raw_pattern_id = np.zeros(n_molecules, dtype=np.int64)
+        pattern_lookup = {}
+        for length in np.unique(lengths).tolist():
+            members = np.flatnonzero(lengths == length)
+            index = offsets[members][:, None] + np.arange(length)
+            sequences = self._typeid[self._molecule_particles[index]].astype(np.int64)
+            
+            # short sequences are encoded as a single integer, which is much faster to compare than rows
+            n_types = max(len(self._type_names), 2)
+            if length * np.log2(n_types) < 62:
+                codes = sequences @ (n_types ** np.arange(length, dtype=np.int64))
+                _, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+                unique_sequences = sequences[first]
+            else:
+                # longer sequences are compared by their raw bytes; sorting the rows (np.unique with axis=0)
+                # scales poorly with the length of the rows, e.g., for a single network spanning the system
+                first = []
+                lookup = {}
+                inverse = np.empty(len(sequences), dtype=np.int64)
+                for i, sequence in enumerate(sequences):
+                    key = sequence.tobytes()
+                    if key not in lookup:
+                        lookup[key] = len(first)
+                        first.append(i)
+                    inverse[i] = lookup[key]
+                unique_sequences = sequences[first]
+            
+            ids = []
+            for sequence in unique_sequences.tolist():
+                pattern = ''.join([self._type_names[t] for t in sequence])
+                ids.append(pattern_lookup.setdefault(pattern, len(pattern_lookup)))
+            raw_pattern_id[members] = np.asarray(ids, dtype=np.int64)[inverse.reshape(-1)]
+        
+        patterns = list(pattern_lookup)
+        _, first_molecule = np.unique(raw_pattern_id, return_index=True)
+        order = np.argsort(first_molecule, kind='stable')
+        renumber = np.zeros(len(patterns), dtype=np.int64)
+        renumber[order] = np.arange(len(patterns))
+        
+        self._molecule_patterns = [patterns[i] for i in order.tolist()]
+        self._molecule_pattern_id = renumber[raw_pattern_id]
              
+    # molecules are only identified the first time they are needed (e.g., when the molecules property is accessed),
+    # at which point any molecule names passed via molecule_dict are also applied.
+    def _ensure_molecules(self):
+        if self._molecules_inferred == False:
+            if self._identify_molecules == True:
+                self._ensure_sections('type', 'bond')
+            self._molecules_inferred = True
+            if self._identify_molecules == True:
+                with self._phase('infer_molecules'):
+                    self._infer_molecules()
+            if self._molecule_dict is not None:
+                molecule_dict = self._molecule_dict
+                self._molecule_dict = None
+                self.set_molecule_name_by_dictionary(molecule_dict)
+    
     # reads in a dictionary that includes the molecule pattern as a key with the user defined name as the associated value,
     # and re-assigns names of each molecule found for that pattern.
     
@@ -367,11 +776,301 @@ class System(object):
         Returns
         -------
         """
+        if self._molecules_inferred == False:
+            # defer renaming until the molecules have been identified
+            if self._molecule_dict is None:
+                self._molecule_dict = {}
+            self._molecule_dict.update(molecule_dict)
+            return
+        
         for mol_name in molecule_dict:
             self._unique_molecules[mol_name] = molecule_dict[mol_name]
+        
+        # names of molecules are looked up by pattern, so only names set on individual molecules need to be reset
+        self._molecule_name_overrides = {}
+        self._molecule_name_index = None
+    
+    # materialized views of the arrays, e.g., the lists returned with list_compatibility, are built once and cached.
+    # A view is rebuilt when any of the arrays it was built from has been replaced, e.g., by loading another file.
+    def _cached_view(self, name, sources, build):
+        cached = self._views.get(name)
+        if cached is None or any(old is not new for old, new in zip(cached[0], sources)):
+            cached = (sources, build())
+            self._views[name] = cached
+        return cached[1]
+    
+    # inverted index of the particles of each type id: the particles of type t are order[offsets[t]:offsets[t+1]].
+    # The index is rebuilt whenever the type ids are replaced, e.g., when the type section is loaded lazily.
+    def _particles_by_type(self):
+        self._ensure_sections('type')
+        if self._type_index is None or self._type_index[0] is not self._typeid:
+            order, offsets = _group_indices(self._typeid, len(self._type_names))
+            self._type_index = (self._typeid, order, offsets)
+        return self._type_index[1], self._type_index[2]
+    
+    # inverted index from each molecule name to the sorted ids of the molecules with that name.
+    # The index is reset whenever molecules are identified or renamed.
+    def _molecules_by_name(self):
+        self._ensure_molecules()
+        if self._molecule_name_index is None:
+            name_codes = {}
+            pattern_code = np.array([name_codes.setdefault(self._unique_molecules[pattern], len(name_codes))
+                                     for pattern in self._molecule_patterns], dtype=np.int64)
+            molecule_code = pattern_code[self._molecule_pattern_id]
+            for i, name in self._molecule_name_overrides.items():
+                molecule_code[i] = name_codes.setdefault(name, len(name_codes))
+            order, offsets = _group_indices(molecule_code, len(name_codes))
+            self._molecule_name_index = {name: order[offsets[code]:offsets[code+1]] for name, code in name_codes.items()}
+        return self._molecule_name_index
+    
+    def molecule_ids_by_name(self, names):
+        """Find the molecules with the given name(s).
+        
+        Molecules are looked up in an index that is built the first time it is needed,
+        so the cost of a lookup is proportional to the number of molecules found.
+        
+        Parameters
+        ----------
+        names : str or list, dtype=str
+            Name, or list of names, of the molecules to find.
+        Returns
+        -------
+        molecule_ids : numpy.ndarray, dtype=int64
+            Sorted indices into the `molecules` list of the molecules with any of the names.
+        """
+        if isinstance(names, str):
+            names = [names]
+        index = self._molecules_by_name()
+        found = [index[name] for name in dict.fromkeys(names) if name in index]
+        if len(found) == 0:
+            return np.zeros(0, dtype=np.int64)
+        if len(found) == 1:
+            return found[0]
+        return np.sort(np.concatenate(found))
+    
+    def select_types(self, types):
+        """Select the particles with the given type(s).
+        
+        Parameters
+        ----------
+        types : str or list, dtype=str
+            Type name, or list of type names, of the particles to select.
+        Returns
+        -------
+        selection : Selection
+            The selected particles.
+        """
+        if isinstance(types, str):
+            types = [types]
+        order, offsets = self._particles_by_type()
+        lookup = {name: i for i, name in enumerate(self._type_names)}
+        typeids = [lookup[name] for name in dict.fromkeys(types) if name in lookup]
+        indices = _gather_groups(order, offsets, typeids)
+        if len(typeids) > 1:
+            indices = np.sort(indices)
+        return Selection(indices, self._n_particles)
+    
+    def select_molecule_names(self, names):
+        """Select the particles of the molecules with the given name(s).
+        
+        Parameters
+        ----------
+        names : str or list, dtype=str
+            Name, or list of names, of the molecules whose particles are selected.
+        Returns
+        -------
+        selection : Selection
+            The selected particles.
+        """
+        molecule_ids = self.molecule_ids_by_name(names)
+        indices = _gather_groups(self._molecule_particles, self._molecule_particle_offsets, molecule_ids)
+        return Selection(np.sort(indices), self._n_particles)
+    
+    def select_range(self, start=0, stop=None):
+        """Select a contiguous range of particles, by index.
+        
+        Parameters
+        ----------
+        start : int, optional, default=0
+            Index of the first particle to select.
+        stop : int, optional, default=None
+            Index one past the last particle to select. If None, all particles from start are selected.
+            Negative values count from the end, as for slices.
+        Returns
+        -------
+        selection : Selection
+            The selected particles.
+        """
+        start, stop, _ = slice(start, stop).indices(self._n_particles)
+        return Selection(np.arange(start, max(start, stop), dtype=np.int64), self._n_particles)
+    
+    def subset(self, selection=None, molecule_names=None):
+        """Create a new System containing a subset of the particles of this system.
+        
+        Bonds, angles, dihedrals and impropers are kept if all of their particles are in the subset,
+        and are renumbered to the indices of the particles in the new system. If the selected particles
+        form a contiguous range, the per-particle arrays of the new system are views into the arrays of
+        this system, rather than copies. If the molecules of this system have already been identified and
+        the subset only contains whole molecules, the molecules (and their names) are carried over;
+        otherwise, molecules are identified in the new system when they are first accessed.
+        
+        Parameters
+        ----------
+        selection : Selection or array-like, dtype=int, optional, default=None
+            Particles to include, e.g., as returned by select_types, or an array of particle indices.
+        molecule_names : str or list, dtype=str, optional, default=None
+            Name, or list of names, of the molecules to include. If both selection and molecule_names
+            are given, only particles that match both are included.
+        Returns
+        -------
+        system : System
+            A new System containing the selected particles.
+        """
+        self._ensure_sections(*self._sections)
+        if selection is None:
+            selection = self.select_range()
+        if not isinstance(selection, Selection):
+            selection = Selection(selection, self._n_particles, presorted=False)
+        if selection.n_particles != self._n_particles:
+            raise Exception("The selection was not made from this system.")
+        if molecule_names is not None:
+            selection = selection & self.select_molecule_names(molecule_names)
+        indices = selection.indices
+        n_particles = len(indices)
+        if n_particles > 0 and (indices[0] < 0 or indices[-1] >= self._n_particles):
+            raise Exception("Particle indices of the selection are out of range.")
+        
+        # particles in a contiguous range are taken as a slice, such that the arrays are views
+        contiguous = n_particles == 0 or int(indices[-1] - indices[0]) + 1 == n_particles
+        take = slice(int(indices[0]), int(indices[-1]) + 1) if n_particles > 0 else slice(0, 0)
+        if not contiguous:
+            take = indices
+        
+        # index of each particle in the new system, or -1 if it is not included
+        new_index = None
+        if not contiguous:
+            new_index = np.full(self._n_particles, -1, dtype=np.int64)
+            new_index[indices] = np.arange(n_particles, dtype=np.int64)
+        
+        system = System(identify_molecules=self._identify_molecules,
+                        ignore_zero_bond_order=self._ignore_zero_bond_order,
+                        list_compatibility=self._list_compatibility)
+        system._frame = self._frame
+        system._box = list(self._box)
+        system._n_particles = n_particles
+        system._xyz = self._xyz[take]
+        system._typeid = self._typeid[take]
+        system._masses = self._masses[take]
+        system._charges = self._charges[take]
+        system._type_names = list(self._type_names)
+        for name in ('bond', 'angle', 'dihedral', 'improper'):
+            group, typeid = self._subset_group(getattr(self, f'_{name}s'), getattr(self, f'_{name}_typeid'),
+                                               take.start if contiguous else None, n_particles, new_index)
+            setattr(system, f'_{name}s', group)
+            setattr(system, f'_{name}_typeid', typeid)
+            setattr(system, f'_{name}_types', list(getattr(self, f'_{name}_types')))
+        system._calc_bond_order()
+        
+        if self._molecules_inferred == True:
+            self._subset_molecules(system, indices, new_index, take.start if contiguous else None)
+        elif self._molecule_dict is not None:
+            system._molecule_dict = dict(self._molecule_dict)
+        return system
+    
+    # keep the entries of a topology group whose particles are all in a subset, renumbered to the indices of the subset.
+    # A contiguous subset is given by its first particle (start); otherwise, new_index maps each particle to the subset.
+    def _subset_group(self, group, typeid, start, n_particles, new_index):
+        if start is not None:
+            if start == 0 and n_particles == self._n_particles:
+                return group, typeid
+            remapped = group.astype(np.int64) - start
+            keep = np.all((remapped >= 0) & (remapped < n_particles), axis=1)
+        else:
+            remapped = new_index[group]
+            keep = np.all(remapped >= 0, axis=1)
+        return remapped[keep].astype(np.uint32), typeid[keep]
+    
+    # carry the molecules of this system over to a subset, if the subset only contains whole molecules
+    def _subset_molecules(self, system, indices, new_index, start):
+        if self._identify_molecules == True:
+            offsets = self._molecule_particle_offsets
+            n_molecules = len(offsets) - 1
+            molecule_id = self._molecule_id[indices]
+            counts = np.bincount(molecule_id[molecule_id >= 0], minlength=n_molecules)
+            kept = np.flatnonzero(counts)
+            if not np.array_equal(counts[kept], np.diff(offsets)[kept]):
+                # the subset splits molecules, which therefore need to be identified again
+                return
+            
+            # the extra entry maps particles without a molecule (molecule_id -1) to -1
+            renumber = np.full(n_molecules + 1, -1, dtype=np.int64)
+            renumber[kept] = np.arange(len(kept), dtype=np.int64)
+            system._molecule_id = renumber[molecule_id]
+            
+            def remap(values):
+                return values - start if start is not None else new_index[values]
             
-        for molecule in self._molecules:
-             molecule.set_molecule_name(self._unique_molecules[molecule.pattern])
+            particles = _gather_groups(self._molecule_particles, offsets, kept)
+            system._molecule_particles = remap(particles)
+            system._molecule_particle_offsets = np.concatenate([[0], np.cumsum(np.diff(offsets)[kept])]).astype(np.int64)
+            bond_offsets = self._molecule_bond_offsets
+            bonds = _gather_groups(self._molecule_bonds, bond_offsets, kept)
+            system._molecule_bonds = remap(bonds).reshape(-1, 2)
+            system._molecule_bond_offsets = np.concatenate([[0], np.cumsum(np.diff(bond_offsets)[kept])]).astype(np.int64)
+            
+            # patterns are numbered in the order they first appear, as when molecules are identified
+            pattern_id = self._molecule_pattern_id[kept]
+            patterns, first, inverse = np.unique(pattern_id, return_index=True, return_inverse=True)
+            order = np.argsort(first, kind='stable')
+            pattern_renumber = np.zeros(len(patterns), dtype=np.int64)
+            pattern_renumber[order] = np.arange(len(patterns), dtype=np.int64)
+            system._molecule_pattern_id = pattern_renumber[inverse.reshape(-1)]
+            system._molecule_patterns = [self._molecule_patterns[i] for i in patterns[order].tolist()]
+            system._unique_molecules = {pattern: self._unique_molecules[pattern] for pattern in system._molecule_patterns}
+            system._molecule_name_overrides = {int(renumber[i]): name for i, name in self._molecule_name_overrides.items()
+                                               if renumber[i] >= 0}
+            system._molecules = MoleculeList(system)
+        system._molecules_inferred = True
+    
+    def save(self, file):
+        """Save the system to a file.
+        
+        The format is chosen based upon the extension of the file:
+        
+        * hoomd XML (extension containing 'xml', e.g., .xml or .hoomdxml): the box, positions, types,
+          masses, charges and topology are written in bulk and streamed to the file. Floating point
+          values are written with enough digits to be read back exactly at the precision they are
+          stored in (e.g., single precision for data loaded from GSD files).
+        * GSD (.gsd): the same data is written as a single frame.
+        * native binary format (.hxb): this stores the positions, masses, charges, type ids, topology,
+          molecules and name tables as raw, aligned arrays, such that loading the file memory-maps the
+          arrays instead of parsing them; data is only read from disk when it is accessed.
+        
+        Molecule names are only stored in the binary format.
+        
+        Parameters
+        ----------
+        file : string
+            Name of the file to write.
+        Returns
+        -------
+        """
+        ext = file.split('.')[-1]
+        if ext == "hxb":
+            # molecules are stored as well, so that they do not need to be identified when the file is loaded
+            self._ensure_sections(*self._sections)
+            self._ensure_molecules()
+            arrays, metadata = self._get_state()
+            write_state(file, arrays, metadata)
+        elif "xml" in ext:
+            self._ensure_sections(*self._sections)
+            write_xml(self, file)
+        elif "gsd" in ext:
+            self._ensure_sections(*self._sections)
+            write_gsd(self, file)
+        else:
+            raise Exception(f"Unsupported file format: {ext}. Files can be saved in the xml, gsd and hxb formats.")
+        
     @property
     def n_particles(self):
         """The total number of particles in the system
@@ -396,6 +1095,7 @@ class System(object):
         n_bonds : int
             Number of bonds in the system
         """
+        self._ensure_sections('bond')
         return len(self._bonds)
     
     @property
@@ -409,6 +1109,7 @@ class System(object):
         n_angles : int
             Number of angles in the system
         """
+        self._ensure_sections('angle')
         return len(self._angles)
         
     @property
@@ -422,6 +1123,7 @@ class System(object):
         n_dihedrals : int
             Number of dihedrals in the system
         """
+        self._ensure_sections('dihedral')
         return len(self._dihedrals)
     
     @property
@@ -435,116 +1137,299 @@ class System(object):
         n_impropers : int
             Number of impropers in the system
         """
+        self._ensure_sections('improper')
         return len(self._impropers)
  
     @property
     def xyz(self):
-        """A list of xyz coordinates for each particle.
+        """An array of xyz coordinates for each particle.
         
         Parameters
         ----------
         Returns
         -------
-        xyz : list shape=(3,n_particles), dtype=float
-            List containing a list of x, y, z coordinates of each particle.
+        xyz : numpy.ndarray, shape=(n_particles, 3), dtype=float
+            Array containing the x, y, z coordinates of each particle.
+            If `list_compatibility` is True, a list of lists is returned instead.
         """
+        self._ensure_sections('position')
+        if self._list_compatibility:
+            return self._cached_view('xyz', (self._xyz,), self._xyz.tolist)
         return self._xyz
     
     @property
     def types(self):
-        """A list of all particle types.
+        """An array of all particle types.
                 
         Parameters
         ----------
         Returns
         -------
-        types : list, shape=(1,n_particles), dtype=str
-            List of type names of all particles in the system.
+        types : numpy.ndarray, shape=(n_particles,), dtype=str
+            Array of type names of all particles in the system.
+            If `list_compatibility` is True, a list is returned instead.
 
         """
-        return self._types
+        self._ensure_sections('type')
+        sources = (self._typeid, self._type_names)
+        types = self._cached_view('types', sources, lambda: np.asarray(self._type_names, dtype=str)[self._typeid])
+        if self._list_compatibility:
+            return self._cached_view('types_list', sources, types.tolist)
+        return types
+    
+    @property
+    def typeid(self):
+        """An array of the integer type id of each particle.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        typeid : numpy.ndarray, shape=(n_particles,), dtype=uint32
+            Index of the type of each particle in the `type_names` list.
+        """
+        self._ensure_sections('type')
+        return self._typeid
+    
+    @property
+    def type_names(self):
+        """A list of the unique particle type names.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        type_names : list, dtype=str
+            List of the type names referenced by `typeid`.
+        """
+        self._ensure_sections('type')
+        return self._type_names
  
     @property
     def masses(self):
-        """A list of all masses defined in the source file.
+        """An array of all masses defined in the source file.
                         
         Parameters
         ----------
         Returns
         -------
-        masses : list, shape=(1,n_particles), dtype=float
-            List of masses of all particles in the system.
+        masses : numpy.ndarray, shape=(n_particles,), dtype=float
+            Array of masses of all particles in the system.
+            If `list_compatibility` is True, a list is returned instead.
         """
+        self._ensure_sections('mass')
+        if self._list_compatibility:
+            return self._cached_view('masses', (self._masses,), self._masses.tolist)
         return self._masses
         
     @property
     def charges(self):
-        """A list of all charges defined in the source file.
+        """An array of all charges defined in the source file.
                                 
         Parameters
         ----------
         Returns
         -------
-        charges : list, shape=(1,n_particles), dtype=float
-            List of charges of all particles in the system.
+        charges : numpy.ndarray, shape=(n_particles,), dtype=float
+            Array of charges of all particles in the system.
+            If `list_compatibility` is True, a list is returned instead.
         """
+        self._ensure_sections('charge')
+        if self._list_compatibility:
+            return self._cached_view('charges', (self._charges,), self._charges.tolist)
         return self._charges
         
     @property
     def bonds(self):
-        """A list of all bonds defined in the source file.
+        """An array of the particle indices of all bonds defined in the source file.
                                         
         Parameters
         ----------
         Returns
         -------
-        bonds : list, shape=(3, n_bonds), dtype=(str, int, int)
-            List of all bonds in the system.  The first entry per bond is the
-            name of the bond (str) as defined in the source file.
+        bonds : numpy.ndarray, shape=(n_bonds, 2), dtype=uint32
+            Array of the indices of the particles in each bond. The name of each bond is given by
+            `bond_types[bond_typeid]`. If `list_compatibility` is True, a list is returned instead,
+            with shape=(3, n_bonds) and dtype=(str, int, int), where the first entry per bond is the name
+            of the bond (str) as defined in the source file.
         """
+        self._ensure_sections('bond')
+        if self._list_compatibility:
+            sources = (self._bonds, self._bond_typeid, self._bond_types)
+            return self._cached_view('bonds', sources, lambda: self._topology_as_list(*sources))
         return self._bonds
+    
+    @property
+    def bond_typeid(self):
+        """An array of the integer type id of each bond.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        bond_typeid : numpy.ndarray, shape=(n_bonds,), dtype=uint32
+            Index of the type of each bond in the `bond_types` list.
+        """
+        self._ensure_sections('bond')
+        return self._bond_typeid
+    
+    @property
+    def bond_types(self):
+        """A list of the unique bond type names.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        bond_types : list, dtype=str
+            List of the bond type names referenced by `bond_typeid`.
+        """
+        self._ensure_sections('bond')
+        return self._bond_types
 
     @property
     def angles(self):
-        """A list of all angles defined in the source file.
-        
+        """An array of the particle indices of all angles defined in the source file.
+                                        
         Parameters
         ----------
         Returns
         -------
-        angles : list, shape=(4, n_angles), dtype=(str, int, int, int)
-            List of all angles in the system.  The first entry per angles is the
-            name of the angle (str) as defined in the source file.
+        angles : numpy.ndarray, shape=(n_angles, 3), dtype=uint32
+            Array of the indices of the particles in each angle. The name of each angle is given by
+            `angle_types[angle_typeid]`. If `list_compatibility` is True, a list is returned instead,
+            with shape=(4, n_angles) and dtype=(str, int, int, int), where the first entry per angle is the name
+            of the angle (str) as defined in the source file.
         """
+        self._ensure_sections('angle')
+        if self._list_compatibility:
+            sources = (self._angles, self._angle_typeid, self._angle_types)
+            return self._cached_view('angles', sources, lambda: self._topology_as_list(*sources))
         return self._angles
-   
+    
+    @property
+    def angle_typeid(self):
+        """An array of the integer type id of each angle.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        angle_typeid : numpy.ndarray, shape=(n_angles,), dtype=uint32
+            Index of the type of each angle in the `angle_types` list.
+        """
+        self._ensure_sections('angle')
+        return self._angle_typeid
+    
+    @property
+    def angle_types(self):
+        """A list of the unique angle type names.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        angle_types : list, dtype=str
+            List of the angle type names referenced by `angle_typeid`.
+        """
+        self._ensure_sections('angle')
+        return self._angle_types
+
     @property
     def dihedrals(self):
-        """A list of all dihedrals defined in the source file
-                
+        """An array of the particle indices of all dihedrals defined in the source file.
+                                        
         Parameters
         ----------
         Returns
         -------
-        dihedrals : list, shape=(5, n_dihedrals), dtype=(str, int, int, int, int)
-            List of all dihedrals in the system.  The first entry per dihedral is the
-            name of the dihedral (str) as defined in the source file.
+        dihedrals : numpy.ndarray, shape=(n_dihedrals, 4), dtype=uint32
+            Array of the indices of the particles in each dihedral. The name of each dihedral is given by
+            `dihedral_types[dihedral_typeid]`. If `list_compatibility` is True, a list is returned instead,
+            with shape=(5, n_dihedrals) and dtype=(str, int, int, int, int), where the first entry per dihedral is the name
+            of the dihedral (str) as defined in the source file.
         """
+        self._ensure_sections('dihedral')
+        if self._list_compatibility:
+            sources = (self._dihedrals, self._dihedral_typeid, self._dihedral_types)
+            return self._cached_view('dihedrals', sources, lambda: self._topology_as_list(*sources))
         return self._dihedrals
+    
+    @property
+    def dihedral_typeid(self):
+        """An array of the integer type id of each dihedral.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        dihedral_typeid : numpy.ndarray, shape=(n_dihedrals,), dtype=uint32
+            Index of the type of each dihedral in the `dihedral_types` list.
+        """
+        self._ensure_sections('dihedral')
+        return self._dihedral_typeid
+    
+    @property
+    def dihedral_types(self):
+        """A list of the unique dihedral type names.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        dihedral_types : list, dtype=str
+            List of the dihedral type names referenced by `dihedral_typeid`.
+        """
+        self._ensure_sections('dihedral')
+        return self._dihedral_types
 
     @property
     def impropers(self):
-        """A list of all impropers defined in the source file
-        
+        """An array of the particle indices of all impropers defined in the source file.
+                                        
         Parameters
         ----------
         Returns
         -------
-        impropers : list, shape=(5, n_impropers), dtype=(str, int, int, int, int)
-            List of all impropers in the system.  The first entry per improper is the
-            name of the improper (str) as defined in the source file.
+        impropers : numpy.ndarray, shape=(n_impropers, 4), dtype=uint32
+            Array of the indices of the particles in each improper. The name of each improper is given by
+            `improper_types[improper_typeid]`. If `list_compatibility` is True, a list is returned instead,
+            with shape=(5, n_impropers) and dtype=(str, int, int, int, int), where the first entry per improper is the name
+            of the improper (str) as defined in the source file.
         """
+        self._ensure_sections('improper')
+        if self._list_compatibility:
+            sources = (self._impropers, self._improper_typeid, self._improper_types)
+            return self._cached_view('impropers', sources, lambda: self._topology_as_list(*sources))
         return self._impropers
+    
+    @property
+    def improper_typeid(self):
+        """An array of the integer type id of each improper.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        improper_typeid : numpy.ndarray, shape=(n_impropers,), dtype=uint32
+            Index of the type of each improper in the `improper_types` list.
+        """
+        self._ensure_sections('improper')
+        return self._improper_typeid
+    
+    @property
+    def improper_types(self):
+        """A list of the unique improper type names.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        improper_types : list, dtype=str
+            List of the improper type names referenced by `improper_typeid`.
+        """
+        self._ensure_sections('improper')
+        return self._improper_types
 
     @property
     def molecules(self):
@@ -558,6 +1443,7 @@ class System(object):
             List containing each molecule identified by the code. Each entry
             in the list is an instance of the Molecule class.
         """
+        self._ensure_molecules()
         return self._molecules
 
     @property
@@ -573,6 +1459,7 @@ class System(object):
             for each unique molecule type identified in the system. This is useful for allowing definition of
             the molecule_dict for assigning molecules names.
         """
+        self._ensure_molecules()
         return self._unique_molecules
 
     @property
@@ -584,26 +1471,261 @@ class System(object):
         Returns
         -------
         graph : networkx graph
-            NetworkX graph constructed from all bonds defined in the XML file
+            NetworkX graph constructed from all bonds defined in the XML file.
+            The graph is only constructed the first time it is accessed.
 
         """
+        self._ensure_sections('bond')
+        if self._graph is None:
+            # networkx is slow to import and only needed for the graph, so it is imported on first use
+            import networkx as nx
+            self._graph = nx.Graph()
+            self._graph.add_edges_from(self._bonds.tolist())
         return self._graph
+    
+    @property
+    def molecule_id(self):
+        """An array containing the index of the molecule each particle belongs to.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        molecule_id : numpy.ndarray, shape=(n_particles,), dtype=int64
+            Index into the `molecules` list for each particle. Particles that do not belong
+            to any molecule (e.g., when `ignore_zero_bond_order` is True) are assigned -1.
+        """
+        self._ensure_molecules()
+        return self._molecule_id
+    
+    # sum per-particle values (listed in the order of _molecule_particles) over each molecule, in a single pass
+    def _molecule_sum(self, values):
+        offsets = self._molecule_particle_offsets
+        if len(offsets) == 1:
+            return np.zeros((0,) + values.shape[1:], dtype=values.dtype)
+        return np.add.reduceat(values, offsets[:-1], axis=0)
+    
+    # per-molecule weights of the particles (listed in the order of _molecule_particles) and the total mass of each molecule.
+    # Particles of molecules without any mass are weighted equally, so that their center and size are still defined.
+    def _molecule_weights(self):
+        self._ensure_sections('mass')
+        self._ensure_molecules()
+        weights = np.asarray(self._masses, dtype=np.float64)[self._molecule_particles]
+        total = self._molecule_sum(weights)
+        massless = np.repeat(total == 0, np.diff(self._molecule_particle_offsets))
+        weights = np.where(massless, 1.0, weights)
+        return weights, self._molecule_sum(weights), total
+    
+    # positions of the particles of each molecule (in the order of _molecule_particles), unwrapped across the periodic
+    # boundaries along the bonds: starting from the first particle of each molecule, which stays in place, the minimum
+    # image of each bond vector is added along a spanning tree of the bonds. This only assumes that bonds are shorter
+    # than half the box, not molecules. Box lengths of zero are treated as non-periodic.
+    def _unwrapped_molecule_positions(self):
+        self._ensure_sections('position', 'bond')
+        self._ensure_molecules()
+        xyz = np.asarray(self._xyz, dtype=np.float64).reshape(-1, 3)
+        bonds = np.asarray(self._bonds, dtype=np.int64).reshape(-1, 2)
+        roots, offsets = component_offsets(self._n_particles, bonds, self._minimum_image(xyz[bonds[:, 1]] - xyz[bonds[:, 0]]))
+        particles = self._molecule_particles
+        return xyz[roots[particles]] + offsets[particles]
+    
+    # apply the minimum image convention to an (n, 3) array of displacements, in place
+    def _minimum_image(self, delta):
+        box = np.zeros(3)
+        box[:len(self._box[:3])] = self._box[:3]
+        # operate on whole rows (with a single temporary array), rather than selecting the periodic columns
+        periodic = box > 0
+        lengths = np.where(periodic, box, np.inf)
+        shift = np.divide(delta, lengths)
+        np.round(shift, out=shift)
+        shift *= np.where(periodic, box, 0.0)
+        delta -= shift
+        return delta
+    
+    # wrap positions into the box, centered at the origin as in hoomd
+    def _wrap_into_box(self, xyz):
+        return self._minimum_image(xyz.copy())
+    
+    # (unwrapped) center of mass of each molecule, along with the unwrapped positions and weights it was calculated from
+    def _molecule_com(self):
+        weights, weight_total, _ = self._molecule_weights()
+        xyz = self._unwrapped_molecule_positions()
+        com = self._molecule_sum(xyz * weights[:, None]) / weight_total[:, None]
+        return com, xyz, weights, weight_total
+    
+    def _molecule_gyration(self):
+        com, xyz, weights, weight_total = self._molecule_com()
+        relative = xyz - np.repeat(com, np.diff(self._molecule_particle_offsets), axis=0)
+        # only the 6 independent components of the symmetric tensor are summed
+        rows, columns = np.triu_indices(3)
+        moments = self._molecule_sum(weights[:, None] * relative[:, rows] * relative[:, columns]) / weight_total[:, None]
+        gyration = np.empty((len(moments), 3, 3))
+        gyration[:, rows, columns] = moments
+        gyration[:, columns, rows] = moments
+        return gyration
+    
+    def _as_output(self, array):
+        if self._list_compatibility:
+            return array.tolist()
+        return array
+    
+    @property
+    def molecule_masses(self):
+        """An array containing the total mass of each molecule.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        molecule_masses : numpy.ndarray, shape=(n_molecules,), dtype=float64
+            Sum of the masses of the particles of each molecule, in the order of the `molecules` list.
+        """
+        return self._as_output(self._molecule_weights()[2])
+    
+    @property
+    def molecule_charges(self):
+        """An array containing the net charge of each molecule.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        molecule_charges : numpy.ndarray, shape=(n_molecules,), dtype=float64
+            Sum of the charges of the particles of each molecule, in the order of the `molecules` list.
+        """
+        self._ensure_sections('charge')
+        self._ensure_molecules()
+        charges = np.asarray(self._charges, dtype=np.float64)[self._molecule_particles]
+        return self._as_output(self._molecule_sum(charges))
+    
+    @property
+    def molecule_centers_of_mass(self):
+        """An array containing the center of mass of each molecule.
+        
+        Molecules that cross the periodic boundaries are unwrapped before the center of mass is calculated,
+        by following the bonds from the first particle of each molecule and placing each bonded particle at its
+        minimum image distance from the particle it is bonded to (this assumes bonds, but not molecules, are
+        shorter than half the box). The centers of mass are then wrapped back into the box.
+        The particles of molecules without any mass are weighted equally.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        molecule_centers_of_mass : numpy.ndarray, shape=(n_molecules, 3), dtype=float64
+            The x, y, z coordinates of the center of mass of each molecule, in the order of the `molecules` list.
+        """
+        return self._as_output(self._wrap_into_box(self._molecule_com()[0]))
+    
+    @property
+    def molecule_gyration_tensors(self):
+        """An array containing the mass-weighted gyration tensor of each molecule.
+        
+        Positions are unwrapped across the periodic boundaries as for `molecule_centers_of_mass`.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        molecule_gyration_tensors : numpy.ndarray, shape=(n_molecules, 3, 3), dtype=float64
+            The gyration tensor, sum_i m_i (r_i - r_com)(r_i - r_com)^T / sum_i m_i, of each molecule,
+            in the order of the `molecules` list.
+        """
+        return self._as_output(self._molecule_gyration())
+    
+    @property
+    def molecule_radii_of_gyration(self):
+        """An array containing the mass-weighted radius of gyration of each molecule.
+        
+        Positions are unwrapped across the periodic boundaries as for `molecule_centers_of_mass`.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        molecule_radii_of_gyration : numpy.ndarray, shape=(n_molecules,), dtype=float64
+            The square root of the trace of the gyration tensor of each molecule, in the order of the `molecules` list.
+        """
+        gyration = self._molecule_gyration()
+        return self._as_output(np.sqrt(np.trace(gyration, axis1=1, axis2=2)))
         
     @property
     def bond_order(self):
-        """A list containing an integer bond order (i.e., total number of bonds) of each particle in the system.
+        """An array containing an integer bond order (i.e., total number of bonds) of each particle in the system.
                                         
         Parameters
         ----------
         Returns
         -------
-        bond_order : list, shape=(1,n_particles), dtype=int
-            A list of the bond order of each particle in the system.
+        bond_order : numpy.ndarray, shape=(n_particles,), dtype=int64
+            An array of the bond order of each particle in the system.
+            If `list_compatibility` is True, a list is returned instead.
         """
+        self._ensure_sections('bond')
+        if self._list_compatibility:
+            return self._cached_view('bond_order', (self._bond_order,), self._bond_order.tolist)
         return self._bond_order
+    
+    @property
+    def angle_participation(self):
+        """An array containing the number of angles each particle in the system belongs to.
+                                        
+        Parameters
+        ----------
+        Returns
+        -------
+        angle_participation : numpy.ndarray, shape=(n_particles,), dtype=int64
+            An array of the total number of angles that include each particle.
+        """
+        self._ensure_sections('angle')
+        return self._calc_participation(self._angles)
+    
+    @property
+    def dihedral_participation(self):
+        """An array containing the number of dihedrals each particle in the system belongs to.
+                                        
+        Parameters
+        ----------
+        Returns
+        -------
+        dihedral_participation : numpy.ndarray, shape=(n_particles,), dtype=int64
+            An array of the total number of dihedrals that include each particle.
+        """
+        self._ensure_sections('dihedral')
+        return self._calc_participation(self._dihedrals)
+    
+    @property
+    def improper_participation(self):
+        """An array containing the number of impropers each particle in the system belongs to.
+                                        
+        Parameters
+        ----------
+        Returns
+        -------
+        improper_participation : numpy.ndarray, shape=(n_particles,), dtype=int64
+            An array of the total number of impropers that include each particle.
+        """
+        self._ensure_sections('improper')
+        return self._calc_participation(self._impropers)
 
 
     
+    @property
+    def load_stats(self):
+        """Timing (and memory) statistics of each phase of loading the system.
+        
+        Statistics are only recorded if `instrument` was passed to the constructor or load function,
+        or if a hook has been registered with `add_load_hook`. Phases that run after the file is loaded,
+        e.g., identifying molecules the first time they are accessed, are added as they run.
+        
+        Parameters
+        ----------
+        Returns
+        -------
+        load_stats : instance of the hoomdxml_reader LoadStats class, or None if the load was not instrumented
+        """
+        return self._load_stats
+    
     @property
     def box(self):
         """List of the box lengths defined in the source file.
@@ -0,0 +1,251 @@
+"""
+Module for recording the time and memory spent in each phase of loading a System.
+
+"""
+
+__all__ = ["LoadStats", "PhaseStats", "add_load_hook", "remove_load_hook"]
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from warnings import warn
+
+# callables that are passed the stats of each phase of a load as it completes
+_load_hooks = []
+
+
+def add_load_hook(hook):
+    """Register a function that is called each time a phase of loading a System completes.
+
+    The hook is called as ``hook(stats, phase)``, where `stats` is the LoadStats of the
+    System being loaded and `phase` is the PhaseStats of the phase that just completed.
+    This can be used to forward the timings to an external metrics system.
+    While any hook is registered, all loads record their timings, even if `instrument`
+    is not passed to System.
+
+    Parameters
+    ----------
+    hook : callable
+        Function to call, with signature hook(stats, phase).
+    """
+    if hook not in _load_hooks:
+        _load_hooks.append(hook)
+
+
+def remove_load_hook(hook):
+    """Remove a function registered with add_load_hook.
+
+    Parameters
+    ----------
+    hook : callable
+        Function to remove.
+    """
+    if hook in _load_hooks:
+        _load_hooks.remove(hook)
+
+
+class PhaseStats(object):
+    """
+    Time and memory spent in a single phase of loading a System.
+
+    Returns
+    -------
+    name : str
+        Name of the phase, e.g., 'read_xml', 'parse_position', 'bond_order' or 'infer_molecules'.
+    time : float
+        Wall time spent in the phase, in seconds, excluding the time spent in any nested phase.
+        If the phase ran more than once (e.g., a section loaded lazily), the total time.
+    peak_memory : int
+        Peak memory allocated during the phase (including nested phases), in bytes.
+        None, unless memory tracing was requested.
+    calls : int
+        Number of times the phase ran.
+    """
+    __slots__ = ['name', 'time', 'peak_memory', 'calls']
+
+    def __init__(self, name):
+        self.name = name
+        self.time = 0.0
+        self.peak_memory = None
+        self.calls = 0
+
+    def as_dict(self):
+        return {'name': self.name, 'time': self.time, 'peak_memory': self.peak_memory, 'calls': self.calls}
+
+    def __repr__(self):
+        memory = '' if self.peak_memory is None else f", peak_memory={self.peak_memory}"
+        return f"PhaseStats(name={self.name!r}, time={self.time:.6f}{memory}, calls={self.calls})"
+
+
+class LoadStats(object):
+    """
+    Per-phase timing (and optionally, memory) statistics of loading a System.
+
+    Phases are recorded in the order they first run. Phases that happen after the file
+    is loaded, e.g., identifying molecules the first time they are accessed or lazily
+    loading a skipped section, are added as they run.
+
+    Parameters
+    ----------
+    filename : string, optional, default=None
+        Name of the file being loaded.
+    trace_memory : bool, optional, default=False
+        If True, the peak memory allocated during each phase is recorded using tracemalloc.
+        Tracing memory slows down loading considerably, so timings are less representative.
+    """
+
+    def __init__(self, filename=None, trace_memory=False):
+        self._filename = filename
+        self._trace_memory = trace_memory
+        self._phases = {}
+        # entries of the phases currently running: [stats, start time, memory at start, peak memory]
+        self._stack = []
+        self._owns_tracing = False
+
+    # returns the LoadStats for a load, given the instrument argument of System.load, or None if it is not instrumented
+    @classmethod
+    def _create(cls, filename, instrument):
+        if instrument is not None and instrument not in (True, False, 'memory'):
+            raise Exception("instrument must be True, False or 'memory'.")
+        if instrument == 'memory':
+            return cls(filename, trace_memory=True)
+        if instrument == True or len(_load_hooks) > 0:
+            return cls(filename)
+        return None
+
+    @contextmanager
+    def phase(self, name):
+        """Record the time (and memory) spent within a block of code as a phase.
+
+        Phases can be nested; the time of a phase excludes that of phases nested within it.
+
+        Parameters
+        ----------
+        name : str
+            Name of the phase.
+        """
+        stats = self._phases.get(name, None)
+        if stats is None:
+            stats = self._phases[name] = PhaseStats(name)
+
+        if self._trace_memory and len(self._stack) == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+
+        now = time.perf_counter()
+        memory = None
+        if self._trace_memory:
+            memory, peak = tracemalloc.get_traced_memory()
+            if len(self._stack) > 0:
+                self._stack[-1][3] = max(self._stack[-1][3], peak)
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+        if len(self._stack) > 0:
+            # pause the enclosing phase
+            parent = self._stack[-1]
+            parent[0].time += now - parent[1]
+        entry = [stats, now, memory, memory]
+        self._stack.append(entry)
+        try:
+            yield stats
+        finally:
+            now = time.perf_counter()
+            self._stack.pop()
+            stats.time += now - entry[1]
+            stats.calls += 1
+            if self._trace_memory:
+                peak = max(entry[3], tracemalloc.get_traced_memory()[1])
+                stats.peak_memory = max(stats.peak_memory or 0, peak - entry[2])
+                if len(self._stack) > 0:
+                    self._stack[-1][3] = max(self._stack[-1][3], peak)
+            if len(self._stack) > 0:
+                # resume the enclosing phase
+                self._stack[-1][1] = now
+            elif self._owns_tracing:
+                tracemalloc.stop()
+                self._owns_tracing = False
+
+            for hook in list(_load_hooks):
+                # a failing metrics hook should not prevent the system from loading
+                try:
+                    hook(self, stats)
+                except Exception as error:
+                    warn(f"Load hook {hook!r} raised an exception: {error!r}")
+
+    def __getitem__(self, name):
+        return self._phases[name]
+
+    def __contains__(self, name):
+        return name in self._phases
+
+    def __iter__(self):
+        return iter(self._phases.values())
+
+    def __repr__(self):
+        phases = ', '.join(f"{phase.name}={phase.time:.6f}" for phase in self)
+        return f"LoadStats(filename={self._filename!r}, total_time={self.total_time:.6f}, {phases})"
+
+    def as_dict(self):
+        """The statistics as a dict, e.g., to serialize them as JSON.
+
+        Parameters
+        ----------
+        Returns
+        -------
+        stats : dict
+            The filename, total time and a list of the statistics of each phase.
+        """
+        return {'filename': self._filename,
+                'total_time': self.total_time,
+                'peak_memory': self.peak_memory,
+                'phases': [phase.as_dict() for phase in self]}
+
+    @property
+    def filename(self):
+        """Name of the file that was loaded.
+
+        Parameters
+        ----------
+        Returns
+        -------
+        filename : string
+        """
+        return self._filename
+
+    @property
+    def phases(self):
+        """The statistics of each phase, in the order the phases first ran.
+
+        Parameters
+        ----------
+        Returns
+        -------
+        phases : list, dtype=PhaseStats
+        """
+        return list(self._phases.values())
+
+    @property
+    def total_time(self):
+        """Total wall time of all recorded phases, in seconds.
+
+        Parameters
+        ----------
+        Returns
+        -------
+        total_time : float
+        """
+        return sum(phase.time for phase in self)
+
+    @property
+    def peak_memory(self):
+        """Largest peak memory of any phase, in bytes; None unless memory tracing was requested.
+
+        Parameters
+        ----------
+        Returns
+        -------
+        peak_memory : int
+        """
+        if not self._trace_memory:
+            return None
+        return max([phase.peak_memory or 0 for phase in self], default=0)
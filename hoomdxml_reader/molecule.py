@@ -1,82 +1,194 @@
 """hoomdxml_reader Molecule class """
+from collections.abc import Sequence
 
-__all__ = ['Molecule']
+import numpy as np
+
+__all__ = ['Molecule', 'MoleculeList']
 
 class Molecule(object):
     """
     A class to store information about an individual molecule in the system.
 
+    A Molecule is either a standalone container, populated via `add_particle` and
+    `add_bond`, or a lightweight view into the arrays of the System class that
+    identified it. Views only store the System and the index of the molecule;
+    particles, types and bonds are read from the System when accessed. A view can
+    no longer be used once the System identifies its molecules again, e.g., after
+    another file is loaded.
+
     Parameters
     ----------
-        particle_index : int
-            Index of the particle to add to the molecule
-        particle_type : str
-            Type name associated with a given particle
-        molecule_name : str
-            Name of the molecule
+        system : instance of the hoomdxml_reader System class, optional, default=None
+            System the molecule belongs to. If None, a standalone molecule is created.
+        index : int, optional, default=None
+            Index of the molecule in the System.
 
     Returns
     -------
     n_particles : int
         Number of particles in the molecule
-    particles : list, shape=(1,n_particles), dtype=int
-        List of particles in the system.
-    types : list, shape=(1,n_particles), dtype=str
-        List of type names of particles in the molecule
+    particles : list or numpy.ndarray, shape=(n_particles,), dtype=int
+        Indices of the particles in the molecule.
+    types : list or numpy.ndarray, shape=(n_particles,), dtype=str
+        Type names of particles in the molecule
     pattern : str
         String constructed by concatenating entries in types list.
     name : str
         Name of the molecule.
-        
+
     """
+    __slots__ = ['_system', '_index', '_generation', '_particles', '_types', '_bonds', '_name']
 
+    def __init__(self, system=None, index=None):
+        self._system = system
+        self._index = index
+        self._name = None
+        self._generation = None
+        if system is not None:
+            self._generation = system._molecule_generation
+        else:
+            self._particles = []
+            self._types = []
+            self._bonds = []
+            self._name = 'none'
 
-    def __init__(self):
-        self._particles = []
-        self._types = []
-        self._bonds = []
-        self._pattern = ''
-        self._name = 'none'
-    
     def add_particle(self, particle_index, particle_type):
+        if self._system is not None:
+            raise Exception("Particles cannot be added to a molecule identified by a System.")
         self._particles.append(particle_index)
         self._types.append(particle_type)
-        self._pattern = self._pattern + particle_type
-        
+
+    # views read the arrays of the System, so they must not outlive the molecules they were created for
+    def _check_view(self):
+        if self._generation != self._system._molecule_generation:
+            raise Exception("The molecules of the System have been identified again (e.g., after loading "
+                            "another file) since this molecule was accessed.")
+
     def set_molecule_name(self, molecule_name):
-        self._name = molecule_name
-        
+        if self._system is not None:
+            self._check_view()
+            self._system._molecule_name_overrides[self._index] = molecule_name
+            self._system._molecule_name_index = None
+        else:
+            self._name = molecule_name
+
     def add_bond(self, bond):
+        if self._system is not None:
+            raise Exception("Bonds cannot be added to a molecule identified by a System.")
         self._bonds.append(bond)
 
+    # indices of the particles of the molecule, as a view into the sorted particle array of the System
+    def _particle_array(self):
+        offsets = self._system._molecule_particle_offsets
+        return self._system._molecule_particles[offsets[self._index]:offsets[self._index+1]]
+
     @property
     def particles(self):
         """A list of indices correspoding to the particles in the molecule. These are listed in numerical order from lowest to highest. These correspond to the numbers assigned in the system class."""
-        return self._particles
-        
+        if self._system is None:
+            return self._particles
+        self._check_view()
+        particles = self._particle_array()
+        if self._system._list_compatibility:
+            return particles.tolist()
+        return particles
+
     @property
     def types(self):
         """A list containing the type of the particle stores in the particles list, listed in the same order."""
-        return self._types
+        if self._system is None:
+            return self._types
+        self._check_view()
+        types = np.asarray(self._system._type_names, dtype=str)[self._system._typeid[self._particle_array()]]
+        if self._system._list_compatibility:
+            return types.tolist()
+        return types
 
     @property
     def bonds(self):
         """A list containing the bonds in the molecule. Integer particle ids refer to numbers in the entire system."""
-        return self._bonds
+        if self._system is None:
+            return self._bonds
+        self._check_view()
+        offsets = self._system._molecule_bond_offsets
+        bonds = self._system._molecule_bonds[offsets[self._index]:offsets[self._index+1]]
+        if self._system._list_compatibility:
+            return bonds.tolist()
+        return bonds
 
     @property
     def pattern(self):
         """Returns a string constructed by concatenating entries in the types list.
         This is used to identify the total number of unique molecules in a system."""
-        return self._pattern
+        if self._system is None:
+            return ''.join(self._types)
+        self._check_view()
+        return self._system._molecule_patterns[self._system._molecule_pattern_id[self._index]]
 
     @property
     def name(self):
         """A string corresponding to the name of the molecule. Note, molecules with the same pattern will be assigned the same name."""
-        return self._name
-        
+        if self._system is None:
+            return self._name
+        self._check_view()
+        name = self._system._molecule_name_overrides.get(self._index, None)
+        if name is None:
+            name = self._system._unique_molecules[self.pattern]
+        return name
+
     @property
     def n_particles(self):
         """The total number of particles in the molecule."""
-        return len(self._particles)
+        if self._system is None:
+            return len(self._particles)
+        self._check_view()
+        offsets = self._system._molecule_particle_offsets
+        return int(offsets[self._index+1] - offsets[self._index])
+
+
+class MoleculeList(Sequence):
+    """
+    A read-only sequence of the molecules identified in a System.
+
+    Molecule views are created when an entry is accessed, such that a System with
+    millions of molecules does not need to store millions of Molecule objects.
+    Like the views, the list can no longer be used once the System identifies its
+    molecules again.
+
+    Parameters
+    ----------
+        system : instance of the hoomdxml_reader System class
+            System whose molecules are listed.
+    """
+    __slots__ = ['_system', '_generation']
+
+    def __init__(self, system):
+        self._system = system
+        self._generation = system._molecule_generation
+
+    def __len__(self):
+        if self._generation != self._system._molecule_generation:
+            raise Exception("The molecules of the System have been identified again (e.g., after loading "
+                            "another file) since this list was created.")
+        return len(self._system._molecule_particle_offsets) - 1
+
+    # a view of molecule i, tied to the molecules this list was created for
+    def _view(self, index):
+        molecule = Molecule(self._system, index)
+        molecule._generation = self._generation
+        return molecule
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._view(i) for i in range(*index.indices(len(self)))]
+        index = int(index)
+        n_molecules = len(self)
+        if index < 0:
+            index += n_molecules
+        if index < 0 or index >= n_molecules:
+            raise IndexError("Molecule index out of range.")
+        return self._view(index)
 
+    def __iter__(self):
+        for i in range(0, len(self)):
+            yield self._view(i)
@@ -0,0 +1,190 @@
+"""
+Module for selecting particles of a System by type, molecule name and index.
+
+"""
+
+__all__ = ["Selection"]
+
+import numpy as np
+
+
+def _group_indices(keys, n_keys):
+    """Build an inverted index of an array of integer keys.
+
+    Parameters
+    ----------
+    keys : numpy.ndarray, shape=(n,), dtype=int
+        Key of each entry, between 0 and n_keys-1.
+    n_keys : int
+        Number of distinct keys.
+
+    Returns
+    -------
+    order : numpy.ndarray, shape=(n,), dtype=int64
+        Indices of the entries, sorted by key (and by index within each key).
+    offsets : numpy.ndarray, shape=(n_keys+1,), dtype=int64
+        The entries with key k are order[offsets[k]:offsets[k+1]].
+    """
+    keys = np.asarray(keys, dtype=np.int64).reshape(-1)
+    order = np.argsort(keys, kind='stable')
+    offsets = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n_keys)[:n_keys], out=offsets[1:])
+    return order, offsets
+
+
+def _gather_groups(values, offsets, groups):
+    """Concatenate the slices values[offsets[g]:offsets[g+1]] of a number of groups, without a Python loop.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Values of all groups, stored contiguously by group.
+    offsets : numpy.ndarray, shape=(n_groups+1,), dtype=int64
+        Start of each group in values.
+    groups : numpy.ndarray, dtype=int
+        Groups to gather.
+
+    Returns
+    -------
+    gathered : numpy.ndarray
+        Values of the requested groups, in the order of groups.
+    """
+    groups = np.asarray(groups, dtype=np.int64).reshape(-1)
+    starts = offsets[groups]
+    lengths = offsets[groups + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return values[:0]
+    # the position of each gathered value relative to the start of its group
+    shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return values[np.arange(total, dtype=np.int64) + shifts]
+
+
+class Selection(object):
+    """
+    A set of particles of a System, stored as a sorted array of particle indices.
+
+    Selections are created by the select_* methods of the System class and can be
+    combined with the set operators & (intersection), | (union), - (difference)
+    and ~ (complement, i.e., all other particles of the System).
+
+    Parameters
+    ----------
+    indices : array-like, dtype=int
+        Indices of the selected particles. These must be sorted and unique, unless
+        `presorted` is False.
+    n_particles : int
+        Total number of particles in the System, used to take the complement.
+    presorted : bool, optional, default=True
+        If False, the indices are sorted and duplicates are removed.
+    Returns
+    -------
+    indices : numpy.ndarray, dtype=int64
+        Sorted indices of the selected particles.
+    n_particles : int
+        Total number of particles in the System.
+    """
+    __slots__ = ['_indices', '_n_particles']
+
+    def __init__(self, indices, n_particles, presorted=True):
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        if presorted != True:
+            indices = np.unique(indices)
+        self._indices = indices
+        self._n_particles = int(n_particles)
+
+    def _check_compatible(self, other):
+        if not isinstance(other, Selection):
+            return NotImplemented
+        if other._n_particles != self._n_particles:
+            raise Exception("Selections of systems with a different number of particles cannot be combined.")
+        return None
+
+    def __and__(self, other):
+        if self._check_compatible(other) is NotImplemented:
+            return NotImplemented
+        return Selection(np.intersect1d(self._indices, other._indices, assume_unique=True), self._n_particles)
+
+    def __or__(self, other):
+        if self._check_compatible(other) is NotImplemented:
+            return NotImplemented
+        return Selection(np.union1d(self._indices, other._indices), self._n_particles)
+
+    def __sub__(self, other):
+        if self._check_compatible(other) is NotImplemented:
+            return NotImplemented
+        keep = ~np.isin(self._indices, other._indices, assume_unique=True)
+        return Selection(self._indices[keep], self._n_particles)
+
+    def __invert__(self):
+        mask = np.ones(self._n_particles, dtype=bool)
+        mask[self._indices] = False
+        return Selection(np.flatnonzero(mask), self._n_particles)
+
+    def __eq__(self, other):
+        if not isinstance(other, Selection):
+            return NotImplemented
+        return self._n_particles == other._n_particles and np.array_equal(self._indices, other._indices)
+
+    __hash__ = None
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __iter__(self):
+        return iter(self._indices.tolist())
+
+    def __contains__(self, index):
+        i = np.searchsorted(self._indices, index)
+        return bool(i < len(self._indices) and self._indices[i] == index)
+
+    # copy=None (NumPy 2) returns the indices themselves where possible; copy=False raises if a copy is needed
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or np.dtype(dtype) == self._indices.dtype:
+            if copy == True:
+                return self._indices.copy()
+            return self._indices
+        if copy == False:
+            raise ValueError(f"Unable to avoid a copy while converting a Selection to dtype {np.dtype(dtype)}.")
+        return self._indices.astype(dtype)
+
+    def __repr__(self):
+        return f"Selection(n_selected={len(self)}, n_particles={self._n_particles})"
+
+    @property
+    def indices(self):
+        """Sorted indices of the selected particles.
+
+        Parameters
+        ----------
+        Returns
+        -------
+        indices : numpy.ndarray, dtype=int64
+        """
+        return self._indices
+
+    @property
+    def n_particles(self):
+        """Total number of particles in the System the selection was made from.
+
+        Parameters
+        ----------
+        Returns
+        -------
+        n_particles : int
+        """
+        return self._n_particles
+
+    @property
+    def mask(self):
+        """A boolean mask of the selected particles.
+
+        Parameters
+        ----------
+        Returns
+        -------
+        mask : numpy.ndarray, shape=(n_particles,), dtype=bool
+        """
+        mask = np.zeros(self._n_particles, dtype=bool)
+        mask[self._indices] = True
+        return mask
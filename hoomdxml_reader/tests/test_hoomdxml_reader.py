@@ -5,10 +5,13 @@ Unit and regression test for the hoomdxml_reader package.
 # Import package, test suite, and other packages as needed
 import sys
 import os
+import subprocess
 import pytest
+import numpy as np
 
 import hoomdxml_reader as hxml
 from hoomdxml_reader.molecule import Molecule
+from hoomdxml_reader.connectivity import connected_components, component_offsets, group_by_component
 import hoomdxml_reader.convert as convert
 import mbuild as mb
 
@@ -29,13 +32,13 @@ def test_loader_gsd():
     assert system.box == [7.0, 5.0, 4.0]
     assert system.n_particles == 8
     assert len(system.xyz) == 8
-    assert system.xyz == [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 0.0, 0.0], [3.0, 0.0, 0.0], [0.0, 1.0, 0.0], [1.0, 1.0, 0.0], [2.0, 1.0, 0.0], [3.0, 1.0, 0.0]]
+    assert system.xyz.tolist() == [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 0.0, 0.0], [3.0, 0.0, 0.0], [0.0, 1.0, 0.0], [1.0, 1.0, 0.0], [2.0, 1.0, 0.0], [3.0, 1.0, 0.0]]
     
     assert len(system.bond_order) == 8
-    assert system.bond_order == [1, 2, 2, 1, 1, 2, 2, 1]
+    assert system.bond_order.tolist() == [1, 2, 2, 1, 1, 2, 2, 1]
     
     assert len(system.types) == 8
-    assert system.types == ['A', 'A', 'B', 'B', 'A', 'A', 'B', 'B']
+    assert system.types.tolist() == ['A', 'A', 'B', 'B', 'A', 'A', 'B', 'B']
     
     assert len(system.bonds) == 6
     assert len(system.angles) == 4
@@ -47,18 +50,24 @@ def test_loader_gsd():
     assert len(system.dihedrals) == system.n_dihedrals
     assert len(system.impropers) == system.n_impropers
     
-    assert system.bonds == [['A-A', 0, 1], ['A-B', 1, 2], ['B-B', 2, 3], ['A-A', 4, 5], ['A-B', 5, 6], ['B-B', 6, 7]]
+    assert system.bonds.shape == (6, 2)
+    assert system.bonds.tolist() == [[0, 1], [1, 2], [2, 3], [4, 5], [5, 6], [6, 7]]
+    assert [system.bond_types[t] for t in system.bond_typeid] == ['A-A', 'A-B', 'B-B', 'A-A', 'A-B', 'B-B']
     
-    assert system.angles == [['A-A-B', 0, 1, 2], ['A-B-B', 1, 2, 3], ['A-A-B', 4, 5, 6], ['A-B-B', 5, 6, 7]]
+    assert system.angles.shape == (4, 3)
+    assert system.angles.tolist() == [[0, 1, 2], [1, 2, 3], [4, 5, 6], [5, 6, 7]]
+    assert [system.angle_types[t] for t in system.angle_typeid] == ['A-A-B', 'A-B-B', 'A-A-B', 'A-B-B']
     
-    assert system.dihedrals == [['A-A-B-B', 0, 1, 2, 3], ['A-A-B-B', 4, 5, 6, 7]]
-    assert system.impropers == [['improp', 0, 1, 2, 3], ['improp', 4, 5, 6, 7]]
+    assert system.dihedrals.tolist() == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert [system.dihedral_types[t] for t in system.dihedral_typeid] == ['A-A-B-B', 'A-A-B-B']
+    assert system.impropers.tolist() == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert [system.improper_types[t] for t in system.improper_typeid] == ['improp', 'improp']
     
     assert len(system.masses) == 8
-    assert system.masses == [1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0]
+    assert system.masses.tolist() == [1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0]
     
     assert len(system.charges) == 8
-    assert system.charges == [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+    assert system.charges.tolist() == [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
     
     assert len(system.molecules) == 2
     assert len(system.unique_molecules) == 1
@@ -86,7 +95,7 @@ def test_loader_gsd():
     assert system.box == [7.0, 5.0, 4.0]
     assert system.n_particles == 8
     assert len(system.xyz) == 8
-    assert system.xyz == [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 0.0, 0.0], [3.0, 0.0, 0.0], [0.0, 1.0, 0.0], [1.0, 1.0, 0.0], [2.0, 1.0, 0.0], [3.0, 1.0, 0.0]]
+    assert system.xyz.tolist() == [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 0.0, 0.0], [3.0, 0.0, 0.0], [0.0, 1.0, 0.0], [1.0, 1.0, 0.0], [2.0, 1.0, 0.0], [3.0, 1.0, 0.0]]
     
     assert len(system.bonds) == 6
     assert len(system.angles) == 4
@@ -109,31 +118,39 @@ def test_loader_xml_basic():
 
     assert system.n_particles == 10
     assert len(system.xyz) == 10
-    assert system.xyz == [[0.0, 0.0, 0.0], [0.5, 0.0, 0.0], [1.0, 0.0, 0.0], [1.5, 0.0, 0.0], [2.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.5, 0.5, 2.0], [3.0, 1.0, 3.0], [2.5, 0.0, 1.0], [0.0, 2.0, 4.0]]
+    assert system.xyz.tolist() == [[0.0, 0.0, 0.0], [0.5, 0.0, 0.0], [1.0, 0.0, 0.0], [1.5, 0.0, 0.0], [2.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.5, 0.5, 2.0], [3.0, 1.0, 3.0], [2.5, 0.0, 1.0], [0.0, 2.0, 4.0]]
     
     assert len(system.bond_order) == 10
-    assert system.bond_order == [1, 2, 2, 2, 1, 0, 0, 0, 0, 0]
+    assert system.bond_order.tolist() == [1, 2, 2, 2, 1, 0, 0, 0, 0, 0]
+    assert system.angle_participation.tolist() == [1, 2, 3, 2, 1, 0, 0, 0, 0, 0]
+    assert system.dihedral_participation.tolist() == [1, 2, 2, 2, 1, 0, 0, 0, 0, 0]
+    assert system.improper_participation.tolist() == [1, 2, 2, 2, 1, 0, 0, 0, 0, 0]
     
     assert len(system.types) == 10
-    assert system.types == ['CH3', 'CH2', 'CH2', 'CH2', 'CH3', 'water', 'water', 'water', 'water', 'water']
+    assert system.types.tolist() == ['CH3', 'CH2', 'CH2', 'CH2', 'CH3', 'water', 'water', 'water', 'water', 'water']
     
     assert len(system.bonds) == 4
-    assert system.bonds == [['CH3-CH2', 0, 1], ['CH2-CH2', 1, 2], ['CH2-CH2', 2, 3], ['CH2-CH3', 3, 4]]
+    assert system.bonds.tolist() == [[0, 1], [1, 2], [2, 3], [3, 4]]
+    assert system.bond_types == ['CH2-CH2', 'CH2-CH3', 'CH3-CH2']
+    assert system.bond_typeid.tolist() == [2, 0, 0, 1]
     
     assert len(system.angles) == 3
-    assert system.angles == [['CH3-CH2-CH2', 0, 1, 2], ['CH2-CH2-CH2', 1, 2, 3], ['CH3-CH2-CH3', 2, 3, 4]]
+    assert system.angles.tolist() == [[0, 1, 2], [1, 2, 3], [2, 3, 4]]
+    assert [system.angle_types[t] for t in system.angle_typeid] == ['CH3-CH2-CH2', 'CH2-CH2-CH2', 'CH3-CH2-CH3']
     
     assert len(system.dihedrals) == 2
-    assert system.dihedrals == [['CH3-CH2-CH2-CH2', 0, 1, 2, 3], ['CH2-CH2-CH2-CH3', 1, 2, 3, 4]]
+    assert system.dihedrals.tolist() == [[0, 1, 2, 3], [1, 2, 3, 4]]
+    assert [system.dihedral_types[t] for t in system.dihedral_typeid] == ['CH3-CH2-CH2-CH2', 'CH2-CH2-CH2-CH3']
  
     assert len(system.impropers) == 2
-    assert system.impropers == [['CH3-CH2-CH2-CH2', 0, 1, 2, 3], ['CH2-CH2-CH2-CH3', 1, 2, 3, 4]]
+    assert system.impropers.tolist() == [[0, 1, 2, 3], [1, 2, 3, 4]]
+    assert [system.improper_types[t] for t in system.improper_typeid] == ['CH3-CH2-CH2-CH2', 'CH2-CH2-CH2-CH3']
 
     assert len(system.masses) == 10
-    assert system.masses == [15.0, 14.0, 14.0, 14.0, 15.0, 18.0, 18.0, 18.0, 18.0, 18.0]
+    assert system.masses.tolist() == [15.0, 14.0, 14.0, 14.0, 15.0, 18.0, 18.0, 18.0, 18.0, 18.0]
 
     assert len(system.charges) == 10
-    assert system.charges == [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+    assert system.charges.tolist() == [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
     
     assert len(system.molecules) == 6
     assert len(system.graph) == 5
@@ -143,6 +160,118 @@ def test_loader_xml_basic():
     assert 'CH3CH2CH2CH2CH3' in system.unique_molecules
  
     
+def test_list_compatibility():
+    cwd = os.getcwd()
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml")
+    
+    assert system.xyz.shape == (10, 3)
+    assert system.masses.shape == (10,)
+    assert system.charges.shape == (10,)
+    assert system.type_names == ['CH2', 'CH3', 'water']
+    assert system.typeid.tolist() == [1, 0, 0, 0, 1, 2, 2, 2, 2, 2]
+    
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", list_compatibility=True)
+    assert system.xyz == [[0.0, 0.0, 0.0], [0.5, 0.0, 0.0], [1.0, 0.0, 0.0], [1.5, 0.0, 0.0], [2.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.5, 0.5, 2.0], [3.0, 1.0, 3.0], [2.5, 0.0, 1.0], [0.0, 2.0, 4.0]]
+    assert system.types == ['CH3', 'CH2', 'CH2', 'CH2', 'CH3', 'water', 'water', 'water', 'water', 'water']
+    assert system.masses == [15.0, 14.0, 14.0, 14.0, 15.0, 18.0, 18.0, 18.0, 18.0, 18.0]
+    assert system.charges == [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+    assert system.bond_order == [1, 2, 2, 2, 1, 0, 0, 0, 0, 0]
+    assert system.bonds == [['CH3-CH2', 0, 1], ['CH2-CH2', 1, 2], ['CH2-CH2', 2, 3], ['CH2-CH3', 3, 4]]
+    assert system.angles == [['CH3-CH2-CH2', 0, 1, 2], ['CH2-CH2-CH2', 1, 2, 3], ['CH3-CH2-CH3', 2, 3, 4]]
+    assert system.dihedrals == [['CH3-CH2-CH2-CH2', 0, 1, 2, 3], ['CH2-CH2-CH2-CH3', 1, 2, 3, 4]]
+    assert system.impropers == [['CH3-CH2-CH2-CH2', 0, 1, 2, 3], ['CH2-CH2-CH2-CH3', 1, 2, 3, 4]]
+    
+    # the lists are built once, and rebuilt only after the arrays they are built from are replaced
+    for name in ('xyz', 'types', 'masses', 'charges', 'bond_order', 'bonds', 'angles', 'dihedrals', 'impropers'):
+        assert getattr(system, name) is getattr(system, name)
+    system.load(cwd + "/hoomdxml_reader/tests/test.gsd", list_compatibility=True)
+    assert system.types == ['A', 'A', 'B', 'B', 'A', 'A', 'B', 'B']
+    assert system.bonds[0] == ['A-A', 0, 1]
+    assert len(system.xyz) == 8
+    assert isinstance(hxml.System(cwd + "/hoomdxml_reader/tests/test.gsd").types, np.ndarray)
+    
+    system = hxml.System()
+    system.load(cwd + "/hoomdxml_reader/tests/test.gsd", list_compatibility=True)
+    assert system.xyz == [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 0.0, 0.0], [3.0, 0.0, 0.0], [0.0, 1.0, 0.0], [1.0, 1.0, 0.0], [2.0, 1.0, 0.0], [3.0, 1.0, 0.0]]
+    assert system.types == ['A', 'A', 'B', 'B', 'A', 'A', 'B', 'B']
+    assert system.bonds == [['A-A', 0, 1], ['A-B', 1, 2], ['B-B', 2, 3], ['A-A', 4, 5], ['A-B', 5, 6], ['B-B', 6, 7]]
+    assert system.angles == [['A-A-B', 0, 1, 2], ['A-B-B', 1, 2, 3], ['A-A-B', 4, 5, 6], ['A-B-B', 5, 6, 7]]
+    assert system.dihedrals == [['A-A-B-B', 0, 1, 2, 3], ['A-A-B-B', 4, 5, 6, 7]]
+    assert system.impropers == [['improp', 0, 1, 2, 3], ['improp', 4, 5, 6, 7]]
+
+def test_loader_xml_streaming(tmp_path):
+    cwd = os.getcwd()
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml")
+    
+    # the parsed tree should not be kept after loading
+    assert not hasattr(system, '_tree')
+    assert not hasattr(system, '_root')
+    assert not hasattr(system, '_config')
+    
+    # sections may appear in any order and topology sections may be omitted
+    xml = """<hoomd_xml version="1.2">
+    <configuration time_step="0">
+        <type>A B A</type>
+        <mass>1.0 2.0 1.0</mass>
+        <box Lx="3.0" Ly="4.0" Lz="5.0" />
+        <position num="3">0.0 0.0 0.0 1.0 0.0 0.0 2.0 0.0 0.0</position>
+        <velocity num="3">0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0</velocity>
+        <charge>0.5 -1.0 0.5</charge>
+        <bond>A-B 0 1</bond>
+    </configuration>
+</hoomd_xml>
+"""
+    filename = tmp_path / "unordered.hoomdxml"
+    filename.write_text(xml)
+    
+    system = hxml.System(str(filename))
+    assert system.box == [3.0, 4.0, 5.0]
+    assert system.n_particles == 3
+    assert system.xyz.tolist() == [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 0.0, 0.0]]
+    assert system.types.tolist() == ['A', 'B', 'A']
+    assert system.masses.tolist() == [1.0, 2.0, 1.0]
+    assert system.charges.tolist() == [0.5, -1.0, 0.5]
+    assert system.n_bonds == 1
+    assert system.n_angles == 0
+    assert system.n_dihedrals == 0
+    assert system.n_impropers == 0
+    assert len(system.molecules) == 2
+    
+    # topology entries must refer to particles of the system
+    for bond, message in [('A-B 1 -1', 'bond section contains the particle index -1'),
+                          ('A-B 1 5', 'bond section contains the particle index 5')]:
+        filename.write_text(xml.replace('A-B 0 1', bond))
+        with pytest.raises(Exception, match=message):
+            hxml.System(str(filename))
+    filename.write_text(xml.replace('</bond>', '</bond>\n<angle>A-B-A 0 1 3</angle>'))
+    with pytest.raises(Exception, match='angle section'):
+        hxml.System(str(filename))
+    
+    # indices of GSD files are checked when counting the bond order
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml")
+    system._bonds = np.array([[0, 1], [1, 4294967295]], dtype=np.uint32)
+    system._bond_typeid = np.zeros(2, dtype=np.uint32)
+    system.save(str(tmp_path / "out_of_range.gsd"))
+    with pytest.raises(Exception, match='particle index 4294967295'):
+        hxml.System(str(tmp_path / "out_of_range.gsd"))
+
+def test_parse_text_block():
+    system = hxml.System()
+    
+    data = system._parse_text_block("0.0 1.0 2.0\n 3.0 4.0 5.0\n", num=2, width=3)
+    assert data.shape == (2, 3)
+    assert data.tolist() == [[0.0, 1.0, 2.0], [3.0, 4.0, 5.0]]
+    
+    # text numpy cannot convert in bulk falls back to converting each entry individually
+    data = system._parse_text_block("1_0 2.0", num=2)
+    assert data.tolist() == [10.0, 2.0]
+    
+    with pytest.warns(UserWarning):
+        data = system._parse_text_block("1.0 2.0 3.0", num=2)
+    
+    with pytest.raises(ValueError):
+        system._parse_text_block("1.0 two", num=2)
+
 def test_loader_xml_ignore_zero_bo():
     cwd = os.getcwd()
     # test ignoring particles with zero bond order
@@ -164,8 +293,8 @@ def test_loader_xml_ignore_zero_bo():
     assert len(system.molecules[0].types) == 5
     assert len(system.molecules[0].particles) == 5
     assert system.molecules[0].n_particles == 5
-    assert system.molecules[0].particles == [0, 1, 2, 3, 4]
-    assert system.molecules[0].types  == ['CH3', 'CH2', 'CH2', 'CH2', 'CH3']
+    assert system.molecules[0].particles.tolist() == [0, 1, 2, 3, 4]
+    assert system.molecules[0].types.tolist() == ['CH3', 'CH2', 'CH2', 'CH2', 'CH3']
     
     #test ignoring identify molecules
     system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", identify_molecules=False)
@@ -176,6 +305,88 @@ def test_loader_xml_ignore_zero_bo():
     assert len(system.molecules) == 0
     assert len(system.unique_molecules) == 0
 
+def test_connected_components():
+    # two chains, listed out of order, plus an isolated particle
+    edges = [[5, 6], [0, 1], [6, 7], [2, 3], [1, 2], [3, 4]]
+    labels = connected_components(9, edges)
+    assert labels.tolist() == [0, 0, 0, 0, 0, 5, 5, 5, 8]
+    
+    # a long chain bonded from the end with the highest index
+    n = 1000
+    edges = [[i, i-1] for i in range(n-1, 0, -1)]
+    labels = connected_components(n, edges)
+    assert (labels == 0).all()
+    
+    # offsets relative to the root add up the edge vectors, whatever the order and orientation of the edges
+    rng = np.random.default_rng(0)
+    n = 500
+    position = rng.normal(size=(n, 3))
+    tree = np.column_stack([np.arange(1, n), [rng.integers(0, i) for i in range(1, n)]])
+    tree = tree[rng.permutation(n-1)]
+    flip = rng.random(n-1) < 0.5
+    tree[flip] = tree[flip][:, ::-1]
+    labels, offsets = component_offsets(n + 1, tree, position[tree[:, 1]] - position[tree[:, 0]])
+    assert labels.tolist() == [0] * n + [n]
+    assert np.allclose(offsets[:n], position - position[0])
+    assert np.allclose(offsets[n], 0.0)
+    
+    # a star whose hub has the highest index merges all leaves at once
+    n = 65537
+    edges = np.column_stack([np.full(n-1, n-1), np.arange(n-1)])
+    labels = connected_components(n + 1, edges)
+    assert (labels[:n] == 0).all() and labels[n] == n
+    
+    # no edges
+    assert connected_components(3, []).tolist() == [0, 1, 2]
+    
+    particles, particle_offsets, bonds, bond_offsets = group_by_component([1, 1, 0, -1], 2, [[0, 1], [2, 3]])
+    assert particles.tolist() == [2, 0, 1]
+    assert particle_offsets.tolist() == [0, 1, 3]
+    assert bonds.tolist() == [[2, 3], [0, 1]]
+    assert bond_offsets.tolist() == [0, 1, 2]
+
+def test_molecule_id():
+    cwd = os.getcwd()
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml")
+    assert system.molecule_id.tolist() == [0, 0, 0, 0, 0, 1, 2, 3, 4, 5]
+    assert system.molecules[0].bonds.tolist() == [[0, 1], [1, 2], [2, 3], [3, 4]]
+    
+    # the networkx graph is only built on request
+    assert system._graph is None
+    assert sorted(system.graph.nodes) == [0, 1, 2, 3, 4]
+    
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", ignore_zero_bond_order=True)
+    assert system.molecule_id.tolist() == [0, 0, 0, 0, 0, -1, -1, -1, -1, -1]
+    
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/test.gsd")
+    assert system.molecule_id.tolist() == [0, 0, 0, 0, 1, 1, 1, 1]
+    assert system.molecules[1].particles.tolist() == [4, 5, 6, 7]
+    assert system.molecules[1].bonds.tolist() == [[4, 5], [5, 6], [6, 7]]
+
+def test_lazy_molecules():
+    cwd = os.getcwd()
+    molecule_dict = {'CH3CH2CH2CH2CH3': 'pentane', 'water': 'SOL'}
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", molecule_dict=molecule_dict)
+    
+    # loading the file should not identify molecules
+    assert system._molecules_inferred == False
+    assert system._molecules == []
+    assert system.n_particles == 10
+    assert system._molecules_inferred == False
+    
+    # accessing the unique molecules triggers identification and naming
+    assert system.unique_molecules == {'CH3CH2CH2CH2CH3': 'pentane', 'water': 'SOL'}
+    assert system._molecules_inferred == True
+    assert system.molecules[0].name == 'pentane'
+    assert system.molecules[1].name == 'SOL'
+    
+    # renaming before the molecules are accessed is deferred as well
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml")
+    system.set_molecule_name_by_dictionary({'water': 'SOL'})
+    assert system._molecules_inferred == False
+    assert system.molecules[1].name == 'SOL'
+    assert system.molecules[0].name == 'molecule0'
+
 def test_rename_molecules():
     cwd = os.getcwd()
 
@@ -228,6 +439,663 @@ def test_Molecule_class():
     assert molecule.n_particles == 2
     assert molecule.name == 'test_molecule'
 
+def write_test_trajectory(filename, n_frames=4):
+    import gsd.hoomd
+    from hoomdxml_reader.writers import _gsd_modes
+    cwd = os.getcwd()
+    read_mode, write_mode = _gsd_modes()
+    with gsd.hoomd.open(cwd + "/hoomdxml_reader/tests/test.gsd", mode=read_mode) as f:
+        snapshot = f[0]
+    position = snapshot.particles.position.copy()
+    with gsd.hoomd.open(str(filename), mode=write_mode) as f:
+        for i in range(0, n_frames):
+            snapshot.configuration.step = i*100
+            snapshot.configuration.box = [7.0+i, 5.0, 4.0, 0.0, 0.0, 0.0]
+            snapshot.particles.position = position + [0.0, 0.0, float(i)]
+            snapshot.particles.velocity = [[float(i), 0.0, 0.0]]*snapshot.particles.N
+            f.append(snapshot)
+            
+def test_trajectory(tmp_path):
+    filename = tmp_path / "traj.gsd"
+    write_test_trajectory(filename)
+    
+    traj = hxml.Trajectory(str(filename))
+    assert traj.n_frames == 4
+    assert traj.system.n_particles == 8
+    assert traj.system.n_bonds == 6
+    assert len(traj.system.molecules) == 2
+    
+    steps = []
+    z = []
+    for frame in traj:
+        steps.append(frame.step)
+        z.append(float(frame.xyz[0][2]))
+        assert frame.velocities is None
+        assert frame.box == [7.0+frame.index, 5.0, 4.0]
+        # the system reflects the current frame
+        assert traj.system.xyz[0][2] == frame.xyz[0][2]
+        assert traj.system.box == frame.box
+    assert steps == [0, 100, 200, 300]
+    assert z == [0.0, 1.0, 2.0, 3.0]
+    
+    # frame slices and strides, with velocities and images
+    frames = []
+    for frame in traj.iterate(start=1, step=2, velocities=True, images=True):
+        frames.append(frame.index)
+        assert frame.velocities[0].tolist() == [float(frame.index), 0.0, 0.0]
+        assert frame.images.tolist() == [[0, 0, 0]]*8
+    assert frames == [1, 3]
+    
+    # the topology is not re-parsed when iterating
+    molecules = traj.system.molecules
+    for frame in traj.iterate(stop=2):
+        pass
+    assert traj.system.molecules is molecules
+    
+    traj.close()
+    with pytest.raises(Exception):
+        next(traj.iterate())
+    
+    with hxml.Trajectory(str(filename), frame=2) as traj:
+        assert traj.system.box == [9.0, 5.0, 4.0]
+
+def test_trajectory_stack_positions(tmp_path):
+    filename = tmp_path / "traj.gsd"
+    write_test_trajectory(filename)
+    
+    with hxml.Trajectory(str(filename)) as traj:
+        positions = traj.stack_positions()
+        assert positions.shape == (4, 8, 3)
+        assert positions[:, 0, 2].tolist() == [0.0, 1.0, 2.0, 3.0]
+        
+        positions = traj.stack_positions(start=1, step=2)
+        assert positions.shape == (2, 8, 3)
+        assert positions[:, 0, 2].tolist() == [1.0, 3.0]
+        
+        mmap_file = str(tmp_path / "positions.npy")
+        positions = traj.stack_positions(filename=mmap_file)
+        assert isinstance(positions, np.memmap)
+        assert positions[:, 7].tolist() == [[3.0, 1.0, float(i)] for i in range(0, 4)]
+        del positions
+    
+    positions = np.load(mmap_file, mmap_mode='r')
+    assert positions.shape == (4, 8, 3)
+    assert positions[3, 0].tolist() == [0.0, 0.0, 3.0]
+
+def test_load_batch(tmp_path):
+    cwd = os.getcwd()
+    files = [cwd + "/hoomdxml_reader/tests/example.hoomdxml", cwd + "/hoomdxml_reader/tests/test.gsd"] * 3
+    
+    for ordered in [True, False]:
+        loaded = list(hxml.load_batch(files, workers=2, chunksize=2, ordered=ordered, molecule_dict={'water': 'SOL'}))
+        assert len(loaded) == len(files)
+        if ordered:
+            assert [file for file, _ in loaded] == files
+        else:
+            assert sorted(file for file, _ in loaded) == sorted(files)
+        
+        for file, system in loaded:
+            reference = hxml.System(file, molecule_dict={'water': 'SOL'})
+            assert system.n_particles == reference.n_particles
+            assert np.array_equal(system.xyz, reference.xyz)
+            assert system.types.tolist() == reference.types.tolist()
+            assert np.array_equal(system.bonds, reference.bonds)
+            assert system.bond_types == reference.bond_types
+            assert system.box == reference.box
+            assert system.bond_order.tolist() == reference.bond_order.tolist()
+            assert [molecule.name for molecule in system.molecules] == [molecule.name for molecule in reference.molecules]
+            assert system.unique_molecules == reference.unique_molecules
+    
+    # closing the iterator early releases the results that were not consumed
+    batch = hxml.load_batch(files, workers=2)
+    file, system = next(batch)
+    batch.close()
+    assert system.n_particles == 10
+    
+    # a file that fails to load does not leak the shared memory of the files loaded before it in the same chunk
+    broken = tmp_path / "broken.hoomdxml"
+    broken.write_text("<hoomd_xml><configuration>")
+    shm_before = set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+    with pytest.raises(Exception):
+        list(hxml.load_batch([files[0], str(broken)], workers=1, chunksize=2))
+    if os.path.isdir('/dev/shm'):
+        assert set(os.listdir('/dev/shm')) - shm_before == set()
+    
+    # files that fail to load can be skipped, or returned along with the exception, without losing the others
+    batch = [files[0], str(broken), files[1]]
+    loaded = list(hxml.load_batch(batch, workers=2, chunksize=2, errors='skip'))
+    assert [file for file, _ in loaded] == [files[0], files[1]]
+    loaded = list(hxml.load_batch(batch, workers=2, chunksize=2, errors='return'))
+    assert [file for file, _ in loaded] == batch
+    assert isinstance(loaded[0][1], hxml.System) and isinstance(loaded[2][1], hxml.System)
+    assert isinstance(loaded[1][1], Exception)
+    if os.path.isdir('/dev/shm'):
+        assert set(os.listdir('/dev/shm')) - shm_before == set()
+
+def test_parse_cache(tmp_path):
+    cwd = os.getcwd()
+    source = tmp_path / "example.hoomdxml"
+    source.write_text(open(cwd + "/hoomdxml_reader/tests/example.hoomdxml").read())
+    cache = hxml.ParseCache(str(tmp_path / "cache"))
+    
+    reference = hxml.System(str(source), molecule_dict={'water': 'SOL'})
+    system = hxml.System(str(source), molecule_dict={'water': 'SOL'}, cache=cache)
+    assert len(os.listdir(cache.directory)) == 1
+    assert cache.size > 0
+    
+    # the second load is restored from the cache, without parsing the file
+    cached = hxml.System()
+    cached._load_xml = None
+    cached.load(str(source), molecule_dict={'water': 'SOL'}, list_compatibility=True, cache=cache)
+    assert cached._filename == str(source)
+    assert cached.xyz == reference.xyz.tolist()
+    assert cached.types == reference.types.tolist()
+    assert cached.bond_order == reference.bond_order.tolist()
+    assert cached.box == reference.box
+    assert cached.bonds == [['CH3-CH2', 0, 1], ['CH2-CH2', 1, 2], ['CH2-CH2', 2, 3], ['CH2-CH3', 3, 4]]
+    assert [molecule.name for molecule in cached.molecules] == [molecule.name for molecule in reference.molecules]
+    
+    # different options are cached separately
+    system = hxml.System(str(source), ignore_zero_bond_order=True, cache=cache)
+    assert len(system.molecules) == 1
+    assert len(os.listdir(cache.directory)) == 2
+    
+    # modifying the file changes its key
+    source.write_text(source.read_text() + "\n")
+    system = hxml.System(str(source), cache=cache)
+    assert len(os.listdir(cache.directory)) == 3
+    
+    cache.invalidate(str(source))
+    assert len(os.listdir(cache.directory)) == 0
+    
+    # the least recently used entries are evicted once the cache exceeds its maximum size
+    small_cache = hxml.ParseCache(str(tmp_path / "small_cache"), max_size=1)
+    system = hxml.System(str(source), cache=small_cache)
+    assert small_cache.size == 0
+    assert system.n_particles == 10
+    
+    hash_cache = hxml.ParseCache(str(tmp_path / "cache"), hash_contents=True)
+    system = hxml.System(str(source), cache=hash_cache)
+    system = hxml.System(str(source), cache=hash_cache)
+    assert system.n_particles == 10
+    hash_cache.invalidate()
+    assert hash_cache.size == 0
+
+def test_save_hxb(tmp_path):
+    cwd = os.getcwd()
+    filename = str(tmp_path / "example.hxb")
+    
+    for source in [cwd + "/hoomdxml_reader/tests/example.hoomdxml", cwd + "/hoomdxml_reader/tests/test.gsd"]:
+        reference = hxml.System(source, molecule_dict={'water': 'SOL'})
+        reference.save(filename)
+        
+        system = hxml.System(filename)
+        assert system._filename == filename
+        assert system.n_particles == reference.n_particles
+        assert np.array_equal(system.xyz, reference.xyz)
+        assert system.xyz.dtype == reference.xyz.dtype
+        assert system.types.tolist() == reference.types.tolist()
+        assert np.array_equal(system.masses, reference.masses)
+        assert np.array_equal(system.charges, reference.charges)
+        assert system.box == reference.box
+        for name in ['bonds', 'angles', 'dihedrals', 'impropers']:
+            assert np.array_equal(getattr(system, name), getattr(reference, name))
+            assert getattr(system, name[:-1] + '_types') == getattr(reference, name[:-1] + '_types')
+        assert system.bond_order.tolist() == reference.bond_order.tolist()
+        assert system.molecule_id.tolist() == reference.molecule_id.tolist()
+        assert system.unique_molecules == reference.unique_molecules
+        assert [molecule.name for molecule in system.molecules] == [molecule.name for molecule in reference.molecules]
+    
+    # arrays are memory-mapped copy-on-write; changes are not written back to the file
+    system.xyz[0] = [100.0, 100.0, 100.0]
+    assert hxml.System(filename).xyz[0].tolist() != [100.0, 100.0, 100.0]
+    
+    # molecules are identified again if the file is loaded with different settings
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml")
+    system.save(filename)
+    system = hxml.System(filename, ignore_zero_bond_order=True, list_compatibility=True)
+    assert len(system.molecules) == 1
+    assert system.molecules[0].particles == [0, 1, 2, 3, 4]
+    
+    system = hxml.System(filename, identify_molecules=False)
+    assert len(system.molecules) == 0
+    
+    with pytest.raises(Exception):
+        system.save(str(tmp_path / "example.pdb"))
+
+def test_sections(tmp_path):
+    cwd = os.getcwd()
+    
+    for source in [cwd + "/hoomdxml_reader/tests/example.hoomdxml", cwd + "/hoomdxml_reader/tests/test.gsd"]:
+        reference = hxml.System(source)
+        
+        system = hxml.System(source, sections=['position'])
+        assert system._pending_sections == {'type', 'mass', 'charge', 'bond', 'angle', 'dihedral', 'improper'}
+        assert system.n_particles == reference.n_particles
+        assert system.box == reference.box
+        assert np.array_equal(system.xyz, reference.xyz)
+        
+        # skipped sections are loaded the first time they are accessed; XML files are only read once more,
+        # loading all skipped sections, while the chunks of GSD files are read as they are needed
+        assert np.array_equal(system.masses, reference.masses)
+        if source.endswith('gsd'):
+            assert system._pending_sections == {'type', 'charge', 'bond', 'angle', 'dihedral', 'improper'}
+        else:
+            assert system._pending_sections == set()
+        assert system.n_angles == reference.n_angles
+        assert system.angle_types == reference.angle_types
+        assert system.molecule_id.tolist() == reference.molecule_id.tolist()
+        if source.endswith('gsd'):
+            assert system._pending_sections == {'charge', 'dihedral', 'improper'}
+        assert system.bond_order.tolist() == reference.bond_order.tolist()
+        assert system.types.tolist() == reference.types.tolist()
+        
+        system = hxml.System()
+        system.load(source, sections=['bond'], list_compatibility=True)
+        assert system.bonds == reference._topology_as_list(reference.bonds, reference.bond_typeid, reference.bond_types)
+        assert system.bond_order == reference.bond_order.tolist()
+        assert system._pending_sections == {'position', 'type', 'mass', 'charge', 'angle', 'dihedral', 'improper'}
+        assert system.xyz == reference.xyz.tolist()
+        assert system.charges == reference.charges.tolist()
+        assert system.impropers == reference._topology_as_list(reference.impropers, reference.improper_typeid, reference.improper_types)
+        
+        # the native format always stores every section
+        system.save(str(tmp_path / "sections.hxb"))
+        system = hxml.System(str(tmp_path / "sections.hxb"))
+        assert system._pending_sections == set()
+        assert np.array_equal(system.charges, reference.charges)
+        assert np.array_equal(system.impropers, reference.impropers)
+    
+    # an XML file is read at most once more, however many skipped sections are accessed
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", sections=['position'], instrument=True)
+    system.bonds, system.angles, system.charges, system.types
+    assert system.load_stats['read_xml'].calls == 2
+    
+    # sections cannot be loaded once the source file is no longer available
+    source = tmp_path / "example.hoomdxml"
+    source.write_text(open(cwd + "/hoomdxml_reader/tests/example.hoomdxml").read())
+    system = hxml.System(str(source), sections=['position', 'bond'])
+    os.remove(source)
+    assert len(system.bonds) == 4
+    with pytest.raises(Exception, match="type"):
+        system.types
+    
+    with pytest.raises(Exception, match="Unknown section"):
+        hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", sections=['velocity'])
+
+def test_load_stats():
+    cwd = os.getcwd()
+    
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml")
+    assert system.load_stats is None
+    
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", instrument=True)
+    names = [phase.name for phase in system.load_stats]
+    assert names == ['read_xml', 'parse_position', 'parse_type', 'parse_mass', 'parse_charge',
+                     'parse_bond', 'parse_angle', 'parse_dihedral', 'parse_improper', 'bond_order']
+    assert all(phase.time >= 0 and phase.calls == 1 and phase.peak_memory is None for phase in system.load_stats)
+    assert system.load_stats.total_time == pytest.approx(sum(phase.time for phase in system.load_stats))
+    
+    # molecules are identified lazily, and recorded when this happens
+    assert 'infer_molecules' not in system.load_stats
+    system.molecules
+    assert system.load_stats['infer_molecules'].calls == 1
+    assert system.load_stats.as_dict()['phases'][-1]['name'] == 'infer_molecules'
+    
+    system = hxml.System()
+    system.load(cwd + "/hoomdxml_reader/tests/test.gsd", instrument='memory', sections=['position'])
+    assert [phase.name for phase in system.load_stats] == ['read_gsd']
+    assert system.load_stats['read_gsd'].peak_memory > 0
+    system.bonds
+    assert system.load_stats['read_gsd'].calls == 2
+    assert system.load_stats['bond_order'].peak_memory >= 0
+    assert system.load_stats.peak_memory >= system.load_stats['read_gsd'].peak_memory
+    
+    with pytest.raises(Exception):
+        hxml.System(cwd + "/hoomdxml_reader/tests/test.gsd", instrument='disk')
+    
+    # hooks receive each phase as it completes, and turn on instrumentation for all loads
+    received = []
+    def hook(stats, phase):
+        received.append((stats.filename, phase.name, phase.time))
+    hxml.add_load_hook(hook)
+    try:
+        system = hxml.System(cwd + "/hoomdxml_reader/tests/test.gsd")
+        # invalid values are rejected even while hooks turn on instrumentation
+        with pytest.raises(Exception, match="instrument must be"):
+            hxml.System(cwd + "/hoomdxml_reader/tests/test.gsd", instrument='disk')
+    finally:
+        hxml.remove_load_hook(hook)
+    assert [name for _, name, _ in received] == ['bond_order', 'read_gsd']
+    assert received[1] == (cwd + "/hoomdxml_reader/tests/test.gsd", 'read_gsd', system.load_stats['read_gsd'].time)
+    
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/test.gsd")
+    assert len(received) == 2
+    assert system.load_stats is None
+
+def test_selection():
+    cwd = os.getcwd()
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml")
+    
+    water = system.select_types('water')
+    assert isinstance(water, hxml.Selection)
+    assert water.indices.tolist() == [5, 6, 7, 8, 9]
+    assert system.select_types(['CH3', 'CH2']).indices.tolist() == [0, 1, 2, 3, 4]
+    assert system.select_types(['CH3', 'unknown']).indices.tolist() == [0, 4]
+    assert len(system.select_types('unknown')) == 0
+    
+    assert system.select_range(2, 6).indices.tolist() == [2, 3, 4, 5]
+    assert system.select_range(-2).indices.tolist() == [8, 9]
+    assert len(system.select_range(6, 2)) == 0
+    
+    # boolean set operations
+    assert (system.select_range(3, 7) & water).indices.tolist() == [5, 6]
+    assert (system.select_types('CH3') | system.select_range(8)).indices.tolist() == [0, 4, 8, 9]
+    assert (water - system.select_range(6, 9)).indices.tolist() == [5, 9]
+    assert (~water).indices.tolist() == [0, 1, 2, 3, 4]
+    assert ~~water == water
+    assert 7 in water and 4 not in water
+    assert water.mask.tolist() == [False]*5 + [True]*5
+    assert np.asarray(water).tolist() == [5, 6, 7, 8, 9]
+    assert water.__array__(copy=True) is not water.indices
+    assert water.__array__(copy=False) is water.indices
+    assert water.__array__(dtype=np.int32).dtype == np.int32
+    with pytest.raises(ValueError):
+        water.__array__(dtype=np.int32, copy=False)
+    
+    # molecule names, including renamed molecules
+    assert system.molecule_ids_by_name('molecule1').tolist() == [1, 2, 3, 4, 5]
+    assert system.select_molecule_names('molecule0').indices.tolist() == [0, 1, 2, 3, 4]
+    system.set_molecule_name_by_dictionary({'CH3CH2CH2CH2CH3': 'pentane', 'water': 'SOL'})
+    assert system.molecule_ids_by_name('molecule1').tolist() == []
+    assert system.molecule_ids_by_name(['SOL', 'pentane']).tolist() == [0, 1, 2, 3, 4, 5]
+    system.molecules[3].set_molecule_name('ion')
+    assert system.molecule_ids_by_name('SOL').tolist() == [1, 2, 4, 5]
+    assert system.select_molecule_names('ion').indices.tolist() == [7]
+    assert (system.select_molecule_names('SOL') & system.select_types('water')).indices.tolist() == [5, 6, 8, 9]
+    
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", ignore_zero_bond_order=True)
+    assert system.select_molecule_names('molecule0').indices.tolist() == [0, 1, 2, 3, 4]
+    assert len(system.select_molecule_names('molecule1')) == 0
+    
+    # selections of different systems cannot be combined
+    other = hxml.System(cwd + "/hoomdxml_reader/tests/test.gsd")
+    with pytest.raises(Exception):
+        water & other.select_range(0, 1)
+
+def test_subset():
+    cwd = os.getcwd()
+    molecule_dict = {'CH3CH2CH2CH2CH3': 'pentane', 'water': 'SOL'}
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", molecule_dict=molecule_dict)
+    
+    # a contiguous range of whole molecules shares the arrays and carries over the molecules
+    pentane = system.subset(molecule_names='pentane')
+    assert pentane.n_particles == 5
+    assert np.shares_memory(pentane.xyz, system.xyz)
+    assert pentane.types.tolist() == ['CH3', 'CH2', 'CH2', 'CH2', 'CH3']
+    assert pentane.bonds.tolist() == [[0, 1], [1, 2], [2, 3], [3, 4]]
+    assert pentane.angles.tolist() == [[0, 1, 2], [1, 2, 3], [2, 3, 4]]
+    assert pentane.dihedrals.tolist() == [[0, 1, 2, 3], [1, 2, 3, 4]]
+    assert pentane.bond_order.tolist() == [1, 2, 2, 2, 1]
+    assert pentane._molecules_inferred == True
+    assert [molecule.name for molecule in pentane.molecules] == ['pentane']
+    assert pentane.unique_molecules == {'CH3CH2CH2CH2CH3': 'pentane'}
+    assert pentane.box == system.box
+    
+    # renamed molecules keep their names
+    system.molecules[3].set_molecule_name('ion')
+    solvent = system.subset(molecule_names=['SOL', 'ion'])
+    assert solvent.n_particles == 5
+    assert solvent.n_bonds == 0
+    assert solvent.molecule_id.tolist() == [0, 1, 2, 3, 4]
+    assert [molecule.name for molecule in solvent.molecules] == ['SOL', 'SOL', 'ion', 'SOL', 'SOL']
+    assert [molecule.particles.tolist() for molecule in solvent.molecules] == [[0], [1], [2], [3], [4]]
+    
+    # a selection that splits a molecule drops the bonds that leave the subset; molecules are identified again
+    split = system.subset(system.select_range(0, 2) | system.select_range(6, 8))
+    assert split.n_particles == 4
+    assert np.allclose(split.xyz, system.xyz[[0, 1, 6, 7]])
+    assert split.masses.tolist() == [15.0, 14.0, 18.0, 18.0]
+    assert split.bonds.tolist() == [[0, 1]]
+    assert split.bond_types[split.bond_typeid[0]] == 'CH3-CH2'
+    assert split.n_angles == 0
+    assert split._molecules_inferred == False
+    assert [molecule.particles.tolist() for molecule in split.molecules] == [[0, 1], [2], [3]]
+    
+    # arrays of particle indices are accepted as well
+    assert system.subset([9, 5]).xyz.tolist() == [[0.0, 1.0, 0.0], [0.0, 2.0, 4.0]]
+    
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", ignore_zero_bond_order=True)
+    subset = system.subset(system.select_types(['CH3', 'CH2']) | system.select_range(7, 8))
+    assert subset.molecule_id.tolist() == [0, 0, 0, 0, 0, -1]
+    assert len(subset.molecules) == 1
+    
+    other = hxml.System(cwd + "/hoomdxml_reader/tests/test.gsd")
+    with pytest.raises(Exception):
+        system.subset(other.select_range(0, 1))
+
+def test_lazy_imports():
+    # heavy dependencies are only imported when they are used, e.g., not when reading an XML file
+    cwd = os.getcwd()
+    script = ("import sys, hoomdxml_reader, hoomdxml_reader.convert; "
+              f"system = hoomdxml_reader.System({cwd + '/hoomdxml_reader/tests/example.hoomdxml'!r}); "
+              "system.molecules; system.xyz; "
+              "print(','.join(m for m in ['networkx', 'gsd', 'mbuild', 'urllib.request', 'http.client'] if m in sys.modules))")
+    output = subprocess.check_output([sys.executable, '-c', script], text=True)
+    assert output.strip() == ''
+    
+    assert 'System_to_Compound' in dir(convert)
+    with pytest.raises(AttributeError):
+        convert.not_a_function
+
+def test_save_xml_gsd(tmp_path):
+    cwd = os.getcwd()
+    
+    def names(system, section):
+        return np.asarray(getattr(system, section + '_types'), dtype=str)[getattr(system, section + '_typeid')].tolist()
+    
+    for source in [cwd + "/hoomdxml_reader/tests/example.hoomdxml", cwd + "/hoomdxml_reader/tests/test.gsd"]:
+        reference = hxml.System(source)
+        for ext in ['hoomdxml', 'gsd']:
+            filename = str(tmp_path / f"saved.{ext}")
+            reference.save(filename)
+            system = hxml.System(filename)
+            
+            assert system.n_particles == reference.n_particles
+            assert system.box == reference.box
+            assert np.array_equal(system.xyz, reference.xyz)
+            assert system.types.tolist() == reference.types.tolist()
+            assert np.array_equal(system.masses, reference.masses)
+            assert np.array_equal(system.charges, reference.charges)
+            for section in ['bond', 'angle', 'dihedral', 'improper']:
+                assert np.array_equal(getattr(system, section + 's'), getattr(reference, section + 's'))
+                assert names(system, section) == names(reference, section)
+            assert [molecule.pattern for molecule in system.molecules] == [molecule.pattern for molecule in reference.molecules]
+    
+    # floating point values are written with enough digits to be read back exactly
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml")
+    rng = np.random.default_rng(0)
+    system._xyz = rng.normal(size=(system.n_particles, 3))
+    system._charges = rng.normal(size=system.n_particles).astype(np.float32)
+    system.save(str(tmp_path / "precision.xml"))
+    saved = hxml.System(str(tmp_path / "precision.xml"))
+    assert np.array_equal(saved.xyz, system.xyz)
+    assert np.array_equal(saved.charges.astype(np.float32), system.charges)
+    
+    # names containing characters that are special in XML are escaped
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml")
+    system._type_names = ['C&H2', 'CH3', '<water>']
+    system._bond_types = ['C&H2-C&H2', 'CH3-C&H2', 'C&H2-CH3']
+    system.save(str(tmp_path / "escaped.xml"))
+    saved = hxml.System(str(tmp_path / "escaped.xml"))
+    assert saved.types.tolist() == system.types.tolist()
+    assert names(saved, 'bond') == names(system, 'bond')
+    
+    # sections that were skipped when loading are loaded before saving
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", sections=['position'])
+    system.save(str(tmp_path / "sections.gsd"))
+    assert hxml.System(str(tmp_path / "sections.gsd")).n_angles == 3
+
+def test_convert_files(tmp_path, capsys):
+    from hoomdxml_reader.cli import convert_files, main
+    cwd = os.getcwd()
+    source = open(cwd + "/hoomdxml_reader/tests/example.hoomdxml").read()
+    (tmp_path / "in" / "sub").mkdir(parents=True)
+    for name in ["in/a.hoomdxml", "in/b.xml", "in/sub/c.xml"]:
+        (tmp_path / name).write_text(source)
+    (tmp_path / "in" / "notes.txt").write_text("not xml")
+    
+    # one GSD file per XML file, following the layout of the inputs
+    messages = []
+    summary = convert_files([str(tmp_path / "in")], output_dir=str(tmp_path / "out"), workers=2, log=messages.append)
+    assert summary['converted'] == 3 and summary['skipped'] == 0 and summary['failed'] == []
+    assert summary['particles'] == 30
+    assert len(messages) == 3
+    for name in ["out/a.gsd", "out/b.gsd", "out/sub/c.gsd"]:
+        system = hxml.System(str(tmp_path / name))
+        assert system.n_particles == 10
+        assert system.n_bonds == 4
+        assert [molecule.pattern for molecule in system.molecules] == ['CH3CH2CH2CH2CH3'] + ['water'] * 5
+    
+    # outputs that are up to date are skipped
+    summary = convert_files([str(tmp_path / "in")], output_dir=str(tmp_path / "out"), workers=1, log=messages.append)
+    assert summary['converted'] == 0 and summary['skipped'] == 3
+    # make the output of b.xml older than its input
+    mtime = os.stat(tmp_path / "in" / "b.xml").st_mtime_ns - 10**9
+    os.utime(tmp_path / "out" / "b.gsd", ns=(mtime, mtime))
+    summary = convert_files([str(tmp_path / "in" / "*.xml")], output_dir=str(tmp_path / "out"), workers=1, log=messages.append)
+    assert summary['converted'] == 1 and summary['skipped'] == 0
+    
+    # all inputs as frames of a single trajectory
+    trajectory = str(tmp_path / "trajectory.gsd")
+    assert main([str(tmp_path / "in"), "--trajectory", trajectory, "--workers", "1", "--quiet"]) == 0
+    frames = hxml.Trajectory(trajectory)
+    assert len(frames) == 3
+    assert [len(frame.xyz) for frame in frames] == [10, 10, 10]
+    summary = convert_files([str(tmp_path / "in")], trajectory=trajectory, workers=1, log=messages.append)
+    assert summary['skipped'] == 3
+    
+    # files that fail to convert are reported, without stopping the other conversions
+    (tmp_path / "in" / "broken.xml").write_text("<hoomd_xml>")
+    summary = convert_files([str(tmp_path / "in")], workers=1, log=messages.append)
+    assert summary['converted'] == 3
+    assert summary['failed'] == [str(tmp_path / "in" / "broken.xml")]
+    assert main([str(tmp_path / "missing")]) == 1
+    
+    # in a trajectory, files that fail are left out and reported, and the other frames are still written
+    capsys.readouterr()
+    assert main([str(tmp_path / "in"), "--trajectory", trajectory, "--workers", "2"]) == 1
+    output = capsys.readouterr()
+    assert "converted 3 file(s)" in output.out and "1 failed" in output.out
+    assert f"failed: {tmp_path / 'in' / 'broken.xml'}" in output.err
+    assert len(hxml.Trajectory(trajectory)) == 3
+    # the trajectory is written again the next time, since it is missing a frame
+    summary = convert_files([str(tmp_path / "in")], trajectory=trajectory, workers=1, log=messages.append)
+    assert summary['skipped'] == 0 and summary['converted'] == 3
+
+def test_molecule_properties(tmp_path):
+    cwd = os.getcwd()
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml")
+    
+    assert system.molecule_masses.tolist() == [72.0, 18.0, 18.0, 18.0, 18.0, 18.0]
+    assert system.molecule_charges.tolist() == [0.0] * 6
+    
+    # compare to calculations over the particles of each molecule
+    for i, molecule in enumerate(system.molecules):
+        particles = molecule.particles
+        masses = system.masses[particles]
+        com = (system.xyz[particles] * masses[:, None]).sum(axis=0) / masses.sum()
+        relative = system.xyz[particles] - com
+        gyration = (masses[:, None, None] * relative[:, :, None] * relative[:, None, :]).sum(axis=0) / masses.sum()
+        assert np.allclose(system.molecule_centers_of_mass[i], com)
+        assert np.allclose(system.molecule_gyration_tensors[i], gyration)
+        assert np.isclose(system.molecule_radii_of_gyration[i], np.sqrt(np.trace(gyration)))
+    assert np.allclose(system.molecule_centers_of_mass[0], [1.0, 0.0, 0.0])
+    radius = system.molecule_radii_of_gyration[0]
+    
+    # molecules that cross the periodic boundaries are unwrapped (Lx = 10)
+    system._xyz = system._xyz.copy()
+    system._xyz[:5, 0] = [3.5, 4.0, 4.5, -5.0, -4.5]
+    system._charges = np.array([0.5, -0.25, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0])
+    assert np.allclose(system.molecule_centers_of_mass[0], [4.5, 0.0, 0.0])
+    assert np.isclose(system.molecule_radii_of_gyration[0], radius)
+    assert system.molecule_charges.tolist() == [0.25, 1.0, 0.0, 0.0, 0.0, 0.0]
+    
+    # centers of mass are wrapped back into the box
+    system._xyz[:5, 0] = [4.5, 5.0, -4.5, -4.0, -3.5]
+    assert np.allclose(system.molecule_centers_of_mass[0], [-4.5, 0.0, 0.0])
+    
+    # molecules longer than half the box are unwrapped along their bonds: a straight chain of 8 beads,
+    # 1 apart, in a box with Lx = 10, starting at x = 2.5 such that it crosses the boundary
+    n = 8
+    x = (2.5 + np.arange(n) + 5.0) % 10.0 - 5.0
+    xml = ('<hoomd_xml version="1.7"><configuration time_step="0">'
+           '<box Lx="10" Ly="10" Lz="10"/>'
+           f'<position num="{n}">' + ' '.join(f'{value} 0 0' for value in x) + '</position>'
+           f'<type num="{n}">' + ' '.join(['A'] * n) + '</type>'
+           f'<mass num="{n}">' + ' '.join(['1.0'] * n) + '</mass>'
+           # bonds listed in reverse and from both ends, so that the chain is not simply followed in order
+           '<bond>' + ' '.join(f'A-A {i+1} {i}' if i % 2 else f'A-A {i} {i+1}' for i in reversed(range(n-1))) + '</bond>'
+           '</configuration></hoomd_xml>')
+    (tmp_path / "chain.hoomdxml").write_text(xml)
+    system = hxml.System(str(tmp_path / "chain.hoomdxml"))
+    assert len(system.molecules) == 1
+    assert np.isclose(system.molecule_radii_of_gyration[0], np.sqrt(np.mean((np.arange(n) - 3.5)**2)))
+    assert np.isclose(system.molecule_radii_of_gyration[0], 2.2913, atol=1e-4)
+    assert np.allclose(system.molecule_centers_of_mass[0], [-4.0, 0.0, 0.0])
+    assert np.allclose(system.molecule_gyration_tensors[0][0, 0], 5.25)
+    
+    # particles without a molecule are ignored
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", ignore_zero_bond_order=True)
+    assert system.molecule_masses.tolist() == [72.0]
+    assert system.molecule_gyration_tensors.shape == (1, 3, 3)
+    
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", identify_molecules=False)
+    assert system.molecule_centers_of_mass.shape == (0, 3)
+    assert system.molecule_radii_of_gyration.shape == (0,)
+
+def test_Molecule_view():
+    cwd = os.getcwd()
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml")
+    
+    molecules = system.molecules
+    assert len(molecules) == 6
+    assert [molecule.pattern for molecule in molecules] == ['CH3CH2CH2CH2CH3', 'water', 'water', 'water', 'water', 'water']
+    assert [molecule.n_particles for molecule in molecules] == [5, 1, 1, 1, 1, 1]
+    assert molecules[-1].particles.tolist() == [9]
+    assert [molecule.particles.tolist() for molecule in molecules[1:3]] == [[5], [6]]
+    assert len(molecules[1].bonds) == 0
+    with pytest.raises(IndexError):
+        molecules[6]
+    
+    # molecules are views; they do not hold their own copies of the data
+    assert not hasattr(molecules[0], '__dict__')
+    with pytest.raises(Exception):
+        molecules[0].add_particle(10, 'water')
+    
+    # names can be set on individual molecules, and are reset when renaming by dictionary
+    molecules[2].set_molecule_name('ice')
+    assert system.molecules[2].name == 'ice'
+    assert system.molecules[3].name == 'molecule1'
+    system.set_molecule_name_by_dictionary({'water': 'SOL'})
+    assert system.molecules[2].name == 'SOL'
+    
+    # views cannot be used after another file is loaded, whether or not its molecules have been identified yet
+    molecule = system.molecules[0]
+    system.load(cwd + "/hoomdxml_reader/tests/test.gsd")
+    with pytest.raises(Exception, match="identified again"):
+        molecule.particles
+    assert len(system.molecules) == 2
+    with pytest.raises(Exception, match="identified again"):
+        molecule.name
+    with pytest.raises(Exception, match="identified again"):
+        len(molecules)
+    
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml", list_compatibility=True)
+    assert system.molecules[0].particles == [0, 1, 2, 3, 4]
+    assert system.molecules[0].types == ['CH3', 'CH2', 'CH2', 'CH2', 'CH3']
+    assert system.molecules[0].bonds == [[0, 1], [1, 2], [2, 3], [3, 4]]
+
 @pytest.mark.skipif(sys.platform == 'win32', reason="mbuild CI is failing on windows for an unknown reason.")
 def test_mBuild_conversion():
     cwd = os.getcwd()
@@ -333,3 +1201,55 @@ def test_mBuild_conversion():
     assert mb_system_sol['molecule'][2]['particle'][0].n_direct_bonds == 0
     assert mb_system_sol['molecule'][3]['particle'][0].n_direct_bonds == 0
     assert mb_system_sol['molecule'][4]['particle'][0].n_direct_bonds == 0
+
+    # molecules cloned from templates match molecules built from scratch
+    mb_system_direct = convert.System_to_Compound(system, use_templates=False)
+    assert mb_system_direct.n_particles == mb_system.n_particles
+    for templated, direct in zip(mb_system['molecule'], mb_system_direct['molecule']):
+        assert isinstance(templated, convert.Molecule_to_Compound)
+        assert templated.name == direct.name
+        assert templated.n_bonds == direct.n_bonds
+        assert np.allclose(templated.xyz, direct.xyz)
+        assert [p.name for p in templated.particles()] == [p.name for p in direct.particles()]
+
+    # molecules are converted one at a time, honoring the selection
+    compounds = convert.iter_molecule_compounds(system, name_selection=['SOL'])
+    first = next(compounds)
+    assert isinstance(first, convert.Molecule_to_Compound)
+    assert first.name == 'SOL'
+    assert np.allclose(first.xyz, [[0.0, 1.0, 0.0]])
+    assert len(list(compounds)) == 4
+    assert len(list(convert.iter_molecule_compounds(system, name_selection=['none']))) == 0
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="mbuild CI is failing on windows for an unknown reason.")
+def test_mBuild_templates(monkeypatch):
+    pytest.importorskip("mbuild")
+    from hoomdxml_reader import _compound
+    cwd = os.getcwd()
+    
+    def hierarchy(compound):
+        return [(molecule.name, molecule.n_bonds, [particle.name for particle in molecule.particles()],
+                 np.asarray(molecule.xyz).tolist()) for molecule in compound['molecule']]
+    
+    # example.hoomdxml has a molecule that appears only once (pentane) and one that repeats (water)
+    for source in [cwd + "/hoomdxml_reader/tests/example.hoomdxml", cwd + "/hoomdxml_reader/tests/test.gsd"]:
+        system = hxml.System(source)
+        templated = convert.System_to_Compound(system, use_templates=True)
+        direct = convert.System_to_Compound(system, use_templates=False)
+        assert templated.n_particles == direct.n_particles == system.n_particles
+        assert templated.n_bonds == direct.n_bonds == system.n_bonds
+        assert hierarchy(templated) == hierarchy(direct)
+        assert [molecule.name for molecule in templated['molecule']] == [molecule.name for molecule in system.molecules]
+        for molecule in templated['molecule']:
+            assert len(molecule['particle']) == molecule.n_particles
+    
+    # children are added in a single call from mbuild 0.11, and one at a time before, with the same labels
+    system = hxml.System(cwd + "/hoomdxml_reader/tests/example.hoomdxml")
+    reference = hierarchy(convert.System_to_Compound(system, use_templates=False))
+    for version, batch in [('0.10.5', False), ('0.11.0', True), ('1.0', True), ('dev', False)]:
+        monkeypatch.setattr(mb, '__version__', version, raising=False)
+        assert _compound._supports_batch_add() == batch
+        compound = convert.System_to_Compound(system)
+        assert len(compound['molecule']) == 6
+        assert len(compound['molecule'][0]['particle']) == 5
+        assert hierarchy(compound) == reference
@@ -0,0 +1,248 @@
+"""
+Module for iterating over the frames of a GSD trajectory.
+
+"""
+
+__all__ = ["Trajectory", "Frame"]
+
+import numpy as np
+
+from hoomdxml_reader.hoomdxml_reader import System
+from hoomdxml_reader.writers import _gsd_modes
+
+
+class Frame(object):
+    """
+    Per-frame data yielded when iterating over a Trajectory.
+
+    To avoid allocating new arrays for every frame, the same Frame (and the same
+    arrays) are reused for every frame of an iteration; copy any array that needs
+    to outlive the current iteration step.
+
+    Returns
+    -------
+    index : int
+        Index of the frame in the GSD file.
+    step : int
+        Simulation timestep of the frame.
+    xyz : numpy.ndarray, shape=(n_particles, 3), dtype=float32
+        Positions of each particle.
+    box : list, shape(3), dtype=float,
+        List of the box length formatted as [Lx, Ly, Lz]
+    velocities : numpy.ndarray, shape=(n_particles, 3), dtype=float32
+        Velocities of each particle, if requested; None otherwise.
+    images : numpy.ndarray, shape=(n_particles, 3), dtype=int32
+        Periodic image of each particle, if requested; None otherwise.
+    """
+    __slots__ = ['index', 'step', 'xyz', 'box', 'velocities', 'images']
+
+    def __init__(self, xyz, velocities=None, images=None):
+        self.index = None
+        self.step = None
+        self.xyz = xyz
+        self.box = []
+        self.velocities = velocities
+        self.images = images
+
+
+class Trajectory(object):
+    """
+    Class to iterate over the frames of a GSD trajectory.
+
+    The topology (types, masses, charges, bonds, angles, dihedrals and impropers) and
+    molecules are parsed once, from a single reference frame, and are available via
+    the `system` property. Iterating over the trajectory then only reads the per-frame
+    data (positions, box and, optionally, velocities and images) from a single open
+    file handle, copying it into buffers that are reused for every frame.
+    The positions and box of `system` are updated as each frame is read, such that
+    `system` always reflects the current frame.
+
+    Parameters
+    ----------
+    file : string
+        Name of the gsd file to load
+    frame : int, optional, default=0
+        Frame used to define the topology.
+    identify_molecules : bool, optional, default=True
+        If True, the code will group the particles based upon their underlying connectivity.
+        Particles bonded together will be considered a molecule.
+    ignore_zero_bond_order : bool, optional, default=False
+        If True, particles without any bonds (i.e., bond order = 0) will be ignored when
+        identifying molecules (i.e., they will not appear in the molecule list).
+    molecule_dict : dict, dtype=str, optional, default=None
+        A dict that defines the molecule 'pattern' and associated user defined name.
+    """
+
+    def __init__(self, file, frame=0, identify_molecules=True, ignore_zero_bond_order=False, molecule_dict=None):
+        # gsd is imported when it is first needed, so that importing hoomdxml_reader does not import it
+        import gsd.hoomd
+        self._filename = file
+        self._trajectory = gsd.hoomd.open(name=file, mode=_gsd_modes()[0])
+
+        self._system = System(identify_molecules=identify_molecules, ignore_zero_bond_order=ignore_zero_bond_order)
+        self._system._filename = file
+        self._system._frame = frame
+        self._system._load_gsd_snapshot(self._trajectory[frame])
+        if molecule_dict is not None:
+            self._system.set_molecule_name_by_dictionary(molecule_dict)
+
+        # the positions of the system are the buffer each frame is read into
+        self._xyz = np.array(self._system._xyz, dtype=np.float32)
+        self._system._xyz = self._xyz
+
+    def __len__(self):
+        return len(self._trajectory)
+
+    def __iter__(self):
+        return self.iterate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the underlying GSD file."""
+        if self._trajectory is not None:
+            self._trajectory.close()
+            self._trajectory = None
+
+    # read a chunk of a given frame; as in GSD, data not stored in a frame is taken from frame 0
+    def _read_chunk(self, frame, name):
+        gsd_file = self._trajectory.file
+        if gsd_file.chunk_exists(frame=frame, name=name):
+            return gsd_file.read_chunk(frame=frame, name=name)
+        if frame != 0 and gsd_file.chunk_exists(frame=0, name=name):
+            return gsd_file.read_chunk(frame=0, name=name)
+        return None
+
+    # copy the data of a chunk into a preallocated buffer, or fill with a default value if it is not stored
+    def _read_into(self, frame, name, out, default=0):
+        data = self._read_chunk(frame, name)
+        if data is None:
+            out.fill(default)
+            return
+        if data.size != out.size:
+            raise Exception(f"The number of particles in frame {frame} does not match the topology frame.")
+        np.copyto(out, data.reshape(out.shape))
+
+    def _read_box(self, frame):
+        box = self._read_chunk(frame, 'configuration/box')
+        if box is None:
+            return [1.0, 1.0, 1.0]
+        return [float(box[0]), float(box[1]), float(box[2])]
+
+    def iterate(self, start=None, stop=None, step=None, velocities=False, images=False):
+        """Iterate over the frames of the trajectory.
+
+        Parameters
+        ----------
+        start : int, optional, default=None
+            First frame to read.
+        stop : int, optional, default=None
+            Frame at which to stop (exclusive).
+        step : int, optional, default=None
+            Stride between frames.
+        velocities : bool, optional, default=False
+            If True, particle velocities are read for each frame.
+        images : bool, optional, default=False
+            If True, particle images are read for each frame.
+
+        Returns
+        -------
+        frames : iterator, dtype=Frame
+            Iterator that yields a Frame for each selected frame. The same Frame, and
+            the same arrays, are reused for every frame.
+        """
+        if self._trajectory is None:
+            raise Exception("The trajectory has been closed.")
+
+        n_particles = self._system.n_particles
+        current = Frame(self._xyz)
+        if velocities:
+            current.velocities = np.zeros((n_particles, 3), dtype=np.float32)
+        if images:
+            current.images = np.zeros((n_particles, 3), dtype=np.int32)
+
+        for i in range(len(self))[slice(start, stop, step)]:
+            self._read_into(i, 'particles/position', current.xyz)
+            if velocities:
+                self._read_into(i, 'particles/velocity', current.velocities)
+            if images:
+                self._read_into(i, 'particles/image', current.images)
+
+            timestep = self._read_chunk(i, 'configuration/step')
+            current.index = i
+            current.step = int(timestep[0]) if timestep is not None else 0
+            current.box = self._read_box(i)
+            self._system._box = current.box
+            self._system._frame = i
+            yield current
+
+    def stack_positions(self, start=None, stop=None, step=None, filename=None):
+        """Read the positions of a range of frames into a single array.
+
+        The array is allocated once, with shape (n_frames, n_particles, 3), and the positions
+        of each frame are read directly into it. If a filename is given, the array is backed
+        by a memory-mapped .npy file on disk, such that trajectories larger than the available
+        memory can be stacked; the file can later be re-opened without reading the GSD file,
+        e.g., with ``numpy.load(filename, mmap_mode='r')``.
+
+        Parameters
+        ----------
+        start : int, optional, default=None
+            First frame to read.
+        stop : int, optional, default=None
+            Frame at which to stop (exclusive).
+        step : int, optional, default=None
+            Stride between frames.
+        filename : string, optional, default=None
+            Name of the .npy file that backs the array. If None, the array is held in memory.
+
+        Returns
+        -------
+        positions : numpy.ndarray or numpy.memmap, shape=(n_frames, n_particles, 3), dtype=float32
+            Positions of each particle in each selected frame.
+        """
+        if self._trajectory is None:
+            raise Exception("The trajectory has been closed.")
+
+        frames = range(len(self))[slice(start, stop, step)]
+        shape = (len(frames), self._system.n_particles, 3)
+        if filename is None:
+            positions = np.empty(shape, dtype=np.float32)
+        else:
+            positions = np.lib.format.open_memmap(filename, mode='w+', dtype=np.float32, shape=shape)
+
+        for i, frame in enumerate(frames):
+            self._read_into(frame, 'particles/position', positions[i])
+
+        if filename is not None:
+            positions.flush()
+        return positions
+
+    @property
+    def system(self):
+        """The System defined by the topology frame, updated with the positions and box of the current frame.
+
+        Parameters
+        ----------
+        Returns
+        -------
+        system : instance of the hoomdxml_reader System class
+        """
+        return self._system
+
+    @property
+    def n_frames(self):
+        """The total number of frames in the trajectory.
+
+        Parameters
+        ----------
+        Returns
+        -------
+        n_frames : int
+            Number of frames in the GSD file.
+        """
+        return len(self)
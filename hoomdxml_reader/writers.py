@@ -0,0 +1,153 @@
+"""
+Module for writing a System to hoomd XML and GSD files.
+
+"""
+
+__all__ = []
+
+import numpy as np
+
+# number of lines formatted at a time when writing XML; bounds the memory used for the formatted text
+_CHUNK_SIZE = 2**16
+
+
+# shortest %-format that reproduces the values of a floating point array exactly when parsed again
+def _float_format(array):
+    if np.asarray(array).dtype.itemsize <= 4:
+        return '%.9g'
+    return '%.17g'
+
+
+# write an (n, width) array of numbers as lines of width values, formatting a chunk of lines with a single % operation
+def _write_rows(f, array, fmt):
+    array = np.asarray(array)
+    width = 1 if array.ndim == 1 else array.shape[1]
+    line = ' '.join([fmt] * width) + '\n'
+    flat = array.reshape(-1, width)
+    for start in range(0, len(flat), _CHUNK_SIZE):
+        chunk = flat[start:start+_CHUNK_SIZE]
+        f.write((line * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+# the table of type names, escaped once for use as XML text (e.g., 'C&H2' is written as 'C&amp;H2').
+# Only &, < and > need to be escaped in text; xml.sax.saxutils.escape is not used, since importing it
+# imports urllib and http.client, which would slow down importing hoomdxml_reader.
+def _escaped_names(types):
+    return np.asarray([name.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;') for name in types], dtype=object)
+
+
+# write the name of each entry, followed by its particle indices, e.g., 'CH3-CH2 0 1' for a bond
+def _write_topology(f, tag, group, typeid, types):
+    group = np.asarray(group).reshape(len(typeid), -1)
+    names = _escaped_names(types)
+    line = '%s' + ' %d' * group.shape[1] + '\n'
+    f.write(f'<{tag} num="{len(group)}">\n')
+    for start in range(0, len(group), _CHUNK_SIZE):
+        rows = np.empty((len(group[start:start+_CHUNK_SIZE]), group.shape[1] + 1), dtype=object)
+        rows[:, 0] = names[typeid[start:start+_CHUNK_SIZE]]
+        rows[:, 1:] = group[start:start+_CHUNK_SIZE]
+        f.write((line * len(rows)) % tuple(rows.ravel().tolist()))
+    f.write(f'</{tag}>\n')
+
+
+def write_xml(system, filename):
+    """Write the particles and topology of a System to a hoomd XML file.
+
+    Each section is formatted in chunks of lines, with a single %-format operation per chunk,
+    and streamed to the file. Floating point values are written with enough digits to be
+    read back exactly at the precision they are stored in (9 significant digits for single
+    precision, 17 for double precision).
+
+    Parameters
+    ----------
+    system : System
+        System to write.
+    filename : string
+        Name of the file to write.
+    """
+    n_particles = system._n_particles
+    box = list(system._box) + [0.0] * (3 - len(system._box))
+    with open(filename, 'w', buffering=2**20) as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<hoomd_xml version="1.7">\n')
+        f.write(f'<configuration time_step="0" dimensions="3" natoms="{n_particles}">\n')
+        f.write('<box Lx="%.17g" Ly="%.17g" Lz="%.17g" xy="0" xz="0" yz="0"/>\n' % tuple(box[:3]))
+
+        f.write(f'<position num="{n_particles}">\n')
+        _write_rows(f, system._xyz, _float_format(system._xyz))
+        f.write('</position>\n')
+
+        f.write(f'<type num="{n_particles}">\n')
+        names = _escaped_names(system._type_names)
+        for start in range(0, n_particles, _CHUNK_SIZE):
+            f.write('\n'.join(names[system._typeid[start:start+_CHUNK_SIZE]].tolist()))
+            f.write('\n')
+        f.write('</type>\n')
+
+        for tag, values in (('mass', system._masses), ('charge', system._charges)):
+            f.write(f'<{tag} num="{len(values)}">\n')
+            _write_rows(f, values, _float_format(values))
+            f.write(f'</{tag}>\n')
+
+        for tag in ('bond', 'angle', 'dihedral', 'improper'):
+            group = getattr(system, f'_{tag}s')
+            if len(group) > 0:
+                _write_topology(f, tag, group, getattr(system, f'_{tag}_typeid'), getattr(system, f'_{tag}_types'))
+
+        f.write('</configuration>\n')
+        f.write('</hoomd_xml>\n')
+
+
+# the modes in which this version of gsd opens a file for reading and for writing.
+# gsd >= 2.8 names the frame class Frame and deprecates the 'rb' and 'wb' modes; earlier versions only support these
+def _gsd_modes():
+    # gsd is imported when it is first needed, so that it is not imported by programs that only read XML files
+    import gsd.hoomd
+
+    if hasattr(gsd.hoomd, 'Frame'):
+        return 'r', 'w'
+    return 'rb', 'wb'
+
+
+# build a GSD frame holding the particles and topology of a System.
+# Returns the frame along with the mode in which this version of gsd opens a file for writing.
+def _gsd_frame(system):
+    import gsd.hoomd
+
+    # earlier versions of gsd name the frame class Snapshot
+    mode = _gsd_modes()[1]
+    frame = gsd.hoomd.Frame() if hasattr(gsd.hoomd, 'Frame') else gsd.hoomd.Snapshot()
+
+    box = list(system._box) + [0.0] * (3 - len(system._box))
+    frame.configuration.box = box[:3] + [0.0, 0.0, 0.0]
+    frame.particles.N = system._n_particles
+    frame.particles.position = system._xyz
+    frame.particles.typeid = system._typeid
+    frame.particles.types = list(system._type_names)
+    frame.particles.mass = system._masses
+    frame.particles.charge = system._charges
+    for name in ('bond', 'angle', 'dihedral', 'improper'):
+        data = getattr(frame, f'{name}s')
+        group = getattr(system, f'_{name}s')
+        data.N = len(group)
+        data.group = group
+        data.typeid = getattr(system, f'_{name}_typeid')
+        data.types = list(getattr(system, f'_{name}_types'))
+    return frame, mode
+
+
+def write_gsd(system, filename):
+    """Write the particles and topology of a System as a single frame of a GSD file.
+
+    Parameters
+    ----------
+    system : System
+        System to write.
+    filename : string
+        Name of the file to write.
+    """
+    import gsd.hoomd
+
+    frame, mode = _gsd_frame(system)
+    with gsd.hoomd.open(name=filename, mode=mode) as f:
+        f.append(frame)